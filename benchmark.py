@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Banco de pruebas de rendimiento del contador de palabras
+
+Genera corpus sintéticos con distribución de Zipf, mide el rendimiento de
+cada motor de ContadorPalabras (MB/s, palabras/s y memoria máxima) y guarda
+los resultados en JSON para compararlos con una ejecución de referencia.
+
+Ejemplos:
+    python benchmark.py --tamanos 1MB 100MB --salida resultados.json
+    python benchmark.py --tamanos 1MB --base referencia.json --umbral 0.10
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from itertools import accumulate
+from typing import List, Optional
+
+from contador import ContadorPalabras, MOTORES
+
+
+# Letras usadas para generar el vocabulario sintético (incluye caracteres multibyte)
+LETRAS = "abcdefghijklmnopqrstuvwxyzáéíóúñ"
+
+UNIDADES = {'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+
+def interpretar_tamano(texto: str) -> int:
+    """Convierte textos como '100MB' o '1GB' en un número de bytes"""
+    texto = texto.strip().upper()
+    for unidad, factor in UNIDADES.items():
+        if texto.endswith(unidad):
+            return int(float(texto[:-len(unidad)]) * factor)
+    return int(texto)
+
+
+def generar_vocabulario(tamano_vocabulario: int, semilla: int) -> List[str]:
+    """Genera palabras distintas de longitud variable"""
+    aleatorio = random.Random(semilla)
+    vocabulario = set()
+    while len(vocabulario) < tamano_vocabulario:
+        longitud = aleatorio.randint(2, 12)
+        vocabulario.add("".join(aleatorio.choice(LETRAS) for _ in range(longitud)))
+    return sorted(vocabulario)
+
+
+def generar_corpus(ruta: str, tamano_bytes: int, tamano_vocabulario: int = 50000,
+                   exponente_zipf: float = 1.1, semilla: int = 42) -> None:
+    """
+    Escribe un corpus de unos tamano_bytes bytes cuyas palabras siguen una
+    distribución de Zipf con el exponente indicado sobre el vocabulario
+    """
+    aleatorio = random.Random(semilla)
+    vocabulario = generar_vocabulario(tamano_vocabulario, semilla)
+    pesos_acumulados = list(accumulate(1.0 / (rango ** exponente_zipf)
+                                       for rango in range(1, tamano_vocabulario + 1)))
+    
+    escritos = 0
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        while escritos < tamano_bytes:
+            palabras = aleatorio.choices(vocabulario, cum_weights=pesos_acumulados, k=10000)
+            # Líneas de 20 palabras para que el corpus tenga saltos de línea realistas
+            lineas = (" ".join(palabras[i:i + 20]) for i in range(0, len(palabras), 20))
+            bloque = "\n".join(lineas) + "\n"
+            archivo.write(bloque)
+            escritos += len(bloque.encode('utf-8'))
+
+
+def obtener_corpus(directorio: str, tamano_bytes: int, tamano_vocabulario: int,
+                   exponente_zipf: float) -> str:
+    """Devuelve la ruta del corpus pedido, generándolo solo si no existe todavía"""
+    os.makedirs(directorio, exist_ok=True)
+    nombre = f"corpus_{tamano_bytes}_{tamano_vocabulario}_{exponente_zipf}.txt"
+    ruta = os.path.join(directorio, nombre)
+    if not os.path.exists(ruta):
+        print(f"📝 Generando corpus {nombre}...", file=sys.stderr)
+        generar_corpus(ruta + ".tmp", tamano_bytes, tamano_vocabulario, exponente_zipf)
+        os.replace(ruta + ".tmp", ruta)
+    return ruta
+
+
+def medir_en_proceso(motor: str, ruta: str) -> dict:
+    """Cuenta el corpus con un motor en el proceso actual y mide tiempo y memoria"""
+    contador = ContadorPalabras(motor=motor)
+    inicio = time.perf_counter()
+    exito, mensaje = contador.procesar_archivo(ruta)
+    segundos = time.perf_counter() - inicio
+    if not exito:
+        raise RuntimeError(mensaje)
+    
+    # En Linux ru_maxrss está en KB; en macOS, en bytes. Con el motor paralelo
+    # cuenta también el mayor de los procesos trabajadores.
+    factor = 1 if sys.platform == 'darwin' else 1024
+    rss_maximo = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                     resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * factor
+    
+    return {'segundos': segundos, 'palabras': contador.numero_total_palabras, 'rss_maximo_bytes': rss_maximo}
+
+
+def medir(motor: str, ruta: str, repeticiones: int) -> dict:
+    """
+    Mide un motor sobre un corpus en un proceso nuevo por repetición, para que
+    la memoria máxima de cada motor no se mezcle con la de los demás.
+    Se queda con la repetición más rápida.
+    """
+    mejores = None
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, os.path.abspath(__file__), '--medir', motor, ruta],
+                                capture_output=True, text=True, check=True).stdout
+        medicion = json.loads(salida)
+        if mejores is None or medicion['segundos'] < mejores['segundos']:
+            mejores = medicion
+    
+    tamano = os.path.getsize(ruta)
+    return {
+        'corpus': os.path.basename(ruta),
+        'tamano_bytes': tamano,
+        'motor': motor,
+        'segundos': mejores['segundos'],
+        'mb_s': tamano / (1024 ** 2) / mejores['segundos'],
+        'palabras_s': mejores['palabras'] / mejores['segundos'],
+        'rss_maximo_mb': mejores['rss_maximo_bytes'] / (1024 ** 2),
+    }
+
+
+def comparar_con_base(resultados: List[dict], base: List[dict], umbral: float) -> List[str]:
+    """
+    Compara cada medición con la de referencia del mismo corpus y motor
+    Retorna la lista de regresiones: caída de MB/s o aumento de memoria mayor que el umbral
+    """
+    referencia = {(r['corpus'], r['motor']): r for r in base}
+    regresiones = []
+    
+    for resultado in resultados:
+        anterior = referencia.get((resultado['corpus'], resultado['motor']))
+        if anterior is None:
+            continue
+        nombre = f"{resultado['motor']} / {resultado['corpus']}"
+        if resultado['mb_s'] < anterior['mb_s'] * (1 - umbral):
+            regresiones.append(f"{nombre}: {resultado['mb_s']:.1f} MB/s frente a {anterior['mb_s']:.1f} MB/s")
+        if resultado['rss_maximo_mb'] > anterior['rss_maximo_mb'] * (1 + umbral):
+            regresiones.append(f"{nombre}: {resultado['rss_maximo_mb']:.1f} MB de memoria "
+                               f"frente a {anterior['rss_maximo_mb']:.1f} MB")
+    
+    return regresiones
+
+
+def crear_parser() -> argparse.ArgumentParser:
+    """Crea el analizador de argumentos del banco de pruebas"""
+    parser = argparse.ArgumentParser(description="Banco de pruebas de rendimiento del contador de palabras")
+    parser.add_argument('--tamanos', nargs='+', default=['1MB', '100MB', '1GB'],
+                        help="tamaños de los corpus a generar (por ejemplo 1MB 100MB 1GB)")
+    parser.add_argument('--vocabulario', type=int, default=50000,
+                        help="número de palabras distintas del vocabulario sintético")
+    parser.add_argument('--zipf', type=float, default=1.1,
+                        help="exponente de la distribución de Zipf")
+    parser.add_argument('--motores', nargs='+', choices=MOTORES, default=list(MOTORES),
+                        help="motores a medir")
+    parser.add_argument('--repeticiones', type=int, default=3,
+                        help="repeticiones por medición (se usa la más rápida)")
+    parser.add_argument('--directorio', default='.benchmark',
+                        help="directorio donde se guardan los corpus generados")
+    parser.add_argument('--salida', default=None,
+                        help="archivo JSON donde guardar los resultados")
+    parser.add_argument('--base', default=None,
+                        help="archivo JSON de una ejecución anterior con la que comparar")
+    parser.add_argument('--umbral', type=float, default=0.10,
+                        help="empeoramiento relativo que se considera regresión (por defecto 0.10)")
+    parser.add_argument('--medir', nargs=2, metavar=('MOTOR', 'RUTA'), help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Ejecuta el banco de pruebas. Retorna 1 si hay regresiones respecto a la base."""
+    argumentos = crear_parser().parse_args(argv)
+    
+    # Modo interno: una sola medición en un proceso limpio
+    if argumentos.medir:
+        print(json.dumps(medir_en_proceso(*argumentos.medir)))
+        return 0
+    
+    resultados = []
+    for tamano in argumentos.tamanos:
+        ruta = obtener_corpus(argumentos.directorio, interpretar_tamano(tamano),
+                              argumentos.vocabulario, argumentos.zipf)
+        for motor in argumentos.motores:
+            resultado = medir(motor, ruta, argumentos.repeticiones)
+            resultados.append(resultado)
+            print(f"⏱️  {motor:10s} {tamano:>6s}: {resultado['mb_s']:8.1f} MB/s  "
+                  f"{resultado['palabras_s']:12,.0f} palabras/s  {resultado['rss_maximo_mb']:8.1f} MB")
+    
+    informe = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'resultados': resultados,
+    }
+    if argumentos.salida:
+        with open(argumentos.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(informe, archivo, indent=2)
+        print(f"\n💾 Resultados guardados en {argumentos.salida}")
+    
+    if argumentos.base:
+        with open(argumentos.base, 'r', encoding='utf-8') as archivo:
+            base = json.load(archivo)['resultados']
+        regresiones = comparar_con_base(resultados, base, argumentos.umbral)
+        if regresiones:
+            print("\n❌ Regresiones de rendimiento:")
+            for regresion in regresiones:
+                print(f"   - {regresion}")
+            return 1
+        print("\n✅ Sin regresiones respecto a la base")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,163 +1,4145 @@
 # Programa para contar palabras en un archivo de texto
 # Refactorizado con programación orientada a objetos
 
+import io
 import os
+import re
+import sys
+import bz2
+import csv
 import glob
-from collections import Counter
-from typing import List, Tuple, Optional
+import gzip
+import http
+import json
+import lzma
+import mmap
+import stat
+import time
+import zlib
+import array
+import errno
+import queue
+import heapq
+import base64
+import bisect
+import codecs
+import shutil
+import socket
+import struct
+import asyncio
+import hashlib
+import sqlite3
+import argparse
+import functools
+import itertools
+import threading
+import contextlib
+import subprocess
+import tracemalloc
+import unicodedata
+from collections import Counter, deque
+from collections.abc import ItemsView, Mapping, ValuesView
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from urllib.parse import parse_qs, urlsplit
+from typing import BinaryIO, Callable, Iterable, Iterator, List, TextIO, Tuple, Optional, Union
+
+# Dependencia opcional: solo se necesita para leer archivos .zst
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Dependencia opcional: solo se necesita para el motor 'numpy', que sin ella
+# cuenta con el mismo algoritmo por bytes que el motor 'mmap'
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Motores de conteo disponibles en ContadorPalabras
+MOTORES = ('completo', 'streaming', 'paralelo', 'mmap', 'numpy')
+
+# Ruta especial que representa la entrada estándar
+ENTRADA_ESTANDAR = '-'
+
+# Número de palabras más frecuentes que se muestran por defecto
+TOP_POR_DEFECTO = 10
+
+# Número de bytes que se leen en cada bloque en modo streaming
+TAMANO_BLOQUE_POR_DEFECTO = 1024 * 1024
+
+# Tamaño aproximado en bytes de cada rango que cuenta un proceso en modo paralelo
+TAMANO_RANGO_POR_DEFECTO = 64 * 1024 * 1024
+
+# Bytes del principio de cada archivo que se examinan para detectar su codificación
+TAMANO_MUESTRA_CODIFICACION = 64 * 1024
+
+# Primo de FNV de 64 bits, con el que el motor 'numpy' calcula el hash de las palabras
+BASE_HASH_VECTORIZADO = 0x100000001B3
+
+# Marcas de orden de bytes (BOM). Las de UTF-32 van antes porque la de
+# UTF-32 LE empieza igual que la de UTF-16 LE.
+MARCAS_ORDEN_BYTES = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Qué hacer con los bytes que no son válidos en la codificación del archivo:
+# fallar, sustituirlos por U+FFFD, descartarlos o conservarlos como \xNN
+POLITICAS_DECODIFICACION = {
+    'estricto': 'strict',
+    'reemplazar': 'contador.reemplazar',
+    'omitir': 'contador.omitir',
+    'bytes': 'contador.bytes',
+}
+
+# Bytes ASCII que str.split() trata como espacio. En UTF-8 nunca forman parte de
+# un carácter multibyte, así que cortar en ellos no parte ninguna palabra.
+_RE_ESPACIO_ASCII = re.compile(rb'[ \t\n\r\x0b\x0c\x1c-\x1f]')
+# Firmas (magic bytes) de los formatos comprimidos que se descomprimen al vuelo.
+# Se necesitan como mucho TAMANO_CABECERA_COMPRESION bytes para reconocerlas.
+TAMANO_CABECERA_COMPRESION = 10
+FIRMAS_COMPRESION = (
+    (b'\x1f\x8b', 'gzip'),
+    # 'BZh' + nivel (1-9) + firma del primer bloque, para no confundirlo con texto
+    (re.compile(rb'BZh[1-9]1AY&SY'), 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+)
+EXTENSIONES_COMPRESION = ('.gz', '.bz2', '.xz', '.zst')
+
+# Formato binario de las tablas de frecuencias (ver EscritorTablaFrecuencias)
+FIRMA_TABLA = b'CPTF'
+VERSION_TABLA = 1
+TAMANO_CABECERA_TABLA = len(FIRMA_TABLA) + struct.calcsize('<BQQ')
+
+# Listas de palabras vacías incluidas (en minúsculas: combinar con Tokenizador(minusculas=True))
+PALABRAS_VACIAS = {
+    'es': frozenset("""
+        a al algo algunas algunos ante antes como con contra cual cuando de del desde donde
+        durante e el ella ellas ellos en entre era erais eran eras eres es esa esas ese eso esos
+        esta estaba estado estamos estan estar estas este esto estos estoy está están fue fueron
+        fui ha habia había han has hasta hay he la las le les lo los me mi mis mucho muchos muy
+        más nada ni no nos nosotros o os otra otras otro otros para pero poco por porque que
+        quien quienes qué se sea ser si sido siendo sin sobre sois somos son soy su sus sí
+        también tanto te tenemos tener tengo ti tiene tienen todo todos tu tus tú un una uno
+        unos vosotros y ya yo él
+    """.split()),
+    'en': frozenset("""
+        a about above after again against all am an and any are as at be because been before
+        being below between both but by can could did do does doing down during each few for
+        from further had has have having he her here hers herself him himself his how i if in
+        into is it its itself just me more most my myself no nor not now of off on once only or
+        other our ours ourselves out over own same she should so some such than that the their
+        theirs them themselves then there these they this those through to too under until up
+        very was we were what when where which while who whom why will with would you your
+        yours yourself yourselves
+    """.split()),
+}
+
+# Bloques Unicode de marcas diacríticas combinables (tildes, diéresis, cedillas...)
+_MARCAS_COMBINABLES = '\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f'
+_RE_MARCAS_COMBINABLES = re.compile(f'[{_MARCAS_COMBINABLES}]+')
+# Signos de puntuación al principio o al final de una palabra
+_RE_PUNTUACION_BORDES = re.compile(f'(?:^|(?<=\\s))[^\\w\\s{_MARCAS_COMBINABLES}]+'
+                                   f'|[^\\w\\s{_MARCAS_COMBINABLES}]+(?=\\s|$)')
+
+_BYTES_ESPACIO_ASCII = [bytes([codigo]) for codigo in b' \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f']
+
+
+def cargar_palabras_vacias(fuentes: Iterable[str]) -> frozenset:
+    """
+    Une varias listas de palabras vacías. Cada fuente es un idioma incluido
+    ('es', 'en') o la ruta de un archivo de texto con palabras separadas por
+    espacios o saltos de línea (las líneas que empiezan por '#' se ignoran).
+    """
+    palabras = set()
+    for fuente in fuentes:
+        if fuente in PALABRAS_VACIAS:
+            palabras |= PALABRAS_VACIAS[fuente]
+            continue
+        with open(fuente, 'r', encoding='utf-8') as archivo:
+            for linea in archivo:
+                if not linea.lstrip().startswith('#'):
+                    palabras.update(linea.split())
+    return frozenset(palabras)
+
+
+def segmentar_bloques(bloques: Iterable[str]) -> Iterator[str]:
+    """
+    Recorre bloques de texto y produce segmentos que terminan en un límite de palabra.
+    La palabra que queda cortada al final de un bloque se arrastra al siguiente,
+    de modo que segmento.split() da exactamente las mismas palabras que texto.split().
+    También funciona con bloques de bytes, cortando en los espacios ASCII.
+    """
+    resto = ""
+    for bloque in bloques:
+        if not bloque:
+            continue
+        texto = resto + bloque if resto else bloque
+        
+        if texto[-1:].isspace():
+            resto = ""
+            yield texto
+        else:
+            # La última palabra puede continuar en el siguiente bloque
+            partes = texto.rsplit(None, 1)
+            resto = partes[-1]
+            if len(partes) == 2:
+                yield partes[0]
+    
+    if resto:
+        yield resto
+
+
+def palabras_mas_frecuentes(frecuencias: Mapping, n: Optional[int] = TOP_POR_DEFECTO) -> List[Tuple[str, int]]:
+    """
+    Devuelve las n palabras más frecuentes como lista de (palabra, frecuencia).
+    Los empates se resuelven por orden alfabético, así el resultado no depende
+    del orden en que se contaron las palabras (serie, paralelo, lotes...).
+    Para n pequeño frente al vocabulario usa una selección con montículo en
+    O(V log n) en lugar de ordenar todo el vocabulario. Con n=None lo ordena entero.
+    """
+    clave = lambda item: (-item[1], item[0])
+    if n is None or n >= len(frecuencias):
+        return sorted(frecuencias.items(), key=clave)
+    if n <= 0:
+        return []
+    return heapq.nsmallest(n, frecuencias.items(), key=clave)
+
+
+def es_flujo(ruta_archivo: str) -> bool:
+    """Indica si la ruta es una tubería o un dispositivo de caracteres (solo lectura secuencial)"""
+    try:
+        modo = os.stat(ruta_archivo).st_mode
+    except OSError:
+        return False
+    return stat.S_ISFIFO(modo) or stat.S_ISCHR(modo)
+
+
+def leer_bloques_binarios(archivo, tamano_bloque: int, limite: Optional[int] = None) -> Iterator[bytes]:
+    """Lee bloques de bytes de un archivo abierto, como máximo 'limite' bytes en total"""
+    pendiente = limite
+    while pendiente is None or pendiente > 0:
+        a_leer = tamano_bloque if pendiente is None else min(tamano_bloque, pendiente)
+        datos = archivo.read(a_leer)
+        if not datos:
+            break
+        if pendiente is not None:
+            pendiente -= len(datos)
+        yield datos
+
+
+def decodificar_bloques(bloques: Iterable[bytes], codificacion: str = 'utf-8',
+                        errores: str = 'strict') -> Iterator[str]:
+    """
+    Decodifica bloques de bytes respetando los caracteres partidos entre
+    bloques. En las codificaciones compatibles con ASCII, un bloque con bytes
+    nulos lanza ErrorArchivoBinario.
+    """
+    decodificador = codecs.getincrementaldecoder(codificacion)(errores)
+    comprobar_nulos = es_compatible_ascii(codificacion)
+    for datos in bloques:
+        if comprobar_nulos:
+            rechazar_bytes_nulos(datos)
+        texto = decodificador.decode(datos)
+        if texto:
+            yield texto
+    texto = decodificador.decode(b"", final=True)
+    if texto:
+        yield texto
+
+
+class ErrorArchivoBinario(ValueError):
+    """El archivo contiene bytes nulos: no es texto en una codificación compatible con ASCII"""
+
+
+def rechazar_bytes_nulos(datos: bytes) -> None:
+    """Lanza ErrorArchivoBinario si los datos contienen algún byte nulo"""
+    if b"\x00" in datos:
+        raise ErrorArchivoBinario("parece un archivo binario (contiene bytes nulos)")
+
+
+# Bytes no válidos que han encontrado las políticas no estrictas en cada hilo
+_bytes_no_validos = threading.local()
+
+
+def bytes_no_validos_hilo() -> int:
+    """Total de bytes no válidos sustituidos u omitidos hasta ahora en el hilo actual"""
+    return getattr(_bytes_no_validos, 'cantidad', 0)
+
+
+def _registrar_politica(nombre: str, gestor: Callable) -> None:
+    """Registra un gestor de errores de codecs que además cuenta los bytes no válidos"""
+    def gestionar(error: UnicodeError):
+        _bytes_no_validos.cantidad = bytes_no_validos_hilo() + (error.end - error.start)
+        return gestor(error)
+    codecs.register_error(nombre, gestionar)
+
+
+_registrar_politica('contador.reemplazar', codecs.replace_errors)
+_registrar_politica('contador.omitir', codecs.ignore_errors)
+_registrar_politica('contador.bytes', codecs.backslashreplace_errors)
+
+
+def detectar_codificacion(muestra: bytes) -> Tuple[str, str]:
+    """
+    Deduce la codificación de un texto a partir de sus primeros bytes: por la
+    marca de orden de bytes si la tiene; si no, UTF-8 cuando la muestra es
+    UTF-8 válido (un carácter partido al final no cuenta como error), CP1252
+    cuando sus bytes son todos válidos en CP1252 y Latin-1 en otro caso.
+    Retorna: (codificacion, origen) con origen 'bom' o 'muestra'
+    """
+    for marca, codificacion in MARCAS_ORDEN_BYTES:
+        if muestra.startswith(marca):
+            return codificacion, 'bom'
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(muestra, final=False)
+        return 'utf-8', 'muestra'
+    except UnicodeDecodeError:
+        pass
+    try:
+        muestra.decode('cp1252')
+        return 'cp1252', 'muestra'
+    except UnicodeDecodeError:
+        # Latin-1 asigna un carácter a cada byte, así que nunca falla
+        return 'latin-1', 'muestra'
+
+
+@functools.lru_cache(maxsize=None)
+def es_compatible_ascii(codificacion: str) -> bool:
+    """
+    Indica si la codificación representa los espacios ASCII con un solo byte
+    propio, como UTF-8 o Latin-1. En UTF-16 y UTF-32 no es así, y los motores
+    que cortan los bytes en espacios no se pueden usar.
+    """
+    if codecs.lookup(codificacion).name == 'utf-8-sig':
+        return True
+    espacios = bytes(range(0x1c, 0x20)) + b" \t\n\r\x0b\x0c"
+    return espacios.decode('latin-1').encode(codificacion) == espacios
+
+
+def cortar_en_ultimo_espacio(datos: bytes) -> Tuple[bytes, bytes]:
+    """
+    Separa los bytes en (parte_completa, palabra_pendiente), cortando justo
+    después del último espacio ASCII
+    """
+    corte = max(datos.rfind(espacio) for espacio in _BYTES_ESPACIO_ASCII) + 1
+    return datos[:corte], datos[corte:]
+
+
+def formato_por_cabecera(cabecera: bytes) -> Optional[str]:
+    """Identifica el formato de compresión por los bytes iniciales. Retorna None si no está comprimido."""
+    for firma, formato in FIRMAS_COMPRESION:
+        if isinstance(firma, bytes):
+            if cabecera.startswith(firma):
+                return formato
+        elif firma.match(cabecera):
+            return formato
+    return None
+
+
+def detectar_compresion(ruta_archivo: str) -> Optional[str]:
+    """Detecta el formato de compresión de un archivo leyendo solo sus primeros bytes"""
+    with open(ruta_archivo, 'rb') as archivo:
+        return formato_por_cabecera(archivo.read(TAMANO_CABECERA_COMPRESION))
+
+
+def descomprimir_flujo(flujo: BinaryIO, formato: str) -> BinaryIO:
+    """Envuelve un flujo binario comprimido (entrada estándar, tubería...) para leerlo descomprimido"""
+    if formato == 'gzip':
+        return gzip.GzipFile(fileobj=flujo, mode='rb')
+    if formato == 'bz2':
+        return bz2.BZ2File(flujo)
+    if formato == 'xz':
+        return lzma.LZMAFile(flujo)
+    if formato == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("para leer archivos zstd instale el paquete 'zstandard'")
+        return zstandard.ZstdDecompressor().stream_reader(flujo, read_across_frames=True, closefd=False)
+    raise ValueError(f"Formato de compresión desconocido: '{formato}'")
+
+
+def abrir_descomprimido(ruta_archivo: str, formato: str) -> BinaryIO:
+    """Abre un archivo comprimido como flujo binario que se descomprime al leerlo"""
+    if formato == 'gzip':
+        return gzip.open(ruta_archivo, 'rb')
+    if formato == 'bz2':
+        return bz2.open(ruta_archivo, 'rb')
+    if formato == 'xz':
+        return lzma.open(ruta_archivo, 'rb')
+    if formato == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("para leer archivos zstd instale el paquete 'zstandard'")
+        return zstandard.ZstdDecompressor().stream_reader(open(ruta_archivo, 'rb'),
+                                                          read_across_frames=True, closefd=True)
+    raise ValueError(f"Formato de compresión desconocido: '{formato}'")
+
+
+def leer_con_anticipacion(bloques: Iterable[bytes], profundidad: int = 4) -> Iterator[bytes]:
+    """
+    Produce los bloques de otro iterador leyéndolos en un hilo aparte, con una
+    cola de como mucho 'profundidad' bloques. zlib, bz2 y lzma liberan el GIL,
+    así que la descompresión se solapa con la separación en palabras.
+    """
+    cola = queue.Queue(maxsize=profundidad)
+    detener = threading.Event()
+    fin = object()
+    
+    def encolar(elemento) -> None:
+        while not detener.is_set():
+            try:
+                cola.put(elemento, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+    
+    def producir() -> None:
+        try:
+            for bloque in bloques:
+                if detener.is_set():
+                    return
+                encolar(bloque)
+            encolar(fin)
+        except BaseException as error:
+            encolar(error)
+    
+    hilo = threading.Thread(target=producir, daemon=True)
+    hilo.start()
+    try:
+        while True:
+            elemento = cola.get()
+            if elemento is fin:
+                break
+            if isinstance(elemento, BaseException):
+                raise elemento
+            yield elemento
+    finally:
+        detener.set()
+        hilo.join()
+
+
+def es_bgzf(ruta_archivo: str) -> bool:
+    """
+    Indica si el archivo es gzip en bloques (BGZF, el formato de bgzip). Cada
+    bloque es un miembro gzip independiente que declara su tamaño en la cabecera,
+    así que los bloques se pueden descomprimir en paralelo.
+    """
+    with open(ruta_archivo, 'rb') as archivo:
+        cabecera = archivo.read(18)
+    return (len(cabecera) == 18 and cabecera[:4] == b'\x1f\x8b\x08\x04' and
+            cabecera[10:12] == b'\x06\x00' and cabecera[12:16] == b'BC\x02\x00')
+
+
+def _miembros_bgzf(archivo) -> Iterator[bytes]:
+    """Recorre los bloques comprimidos de un archivo BGZF sin descomprimirlos"""
+    while True:
+        cabecera = archivo.read(18)
+        if not cabecera:
+            return
+        if len(cabecera) < 18 or cabecera[12:14] != b'BC':
+            raise ValueError("bloque BGZF no válido")
+        tamano_bloque = struct.unpack('<H', cabecera[16:18])[0] + 1
+        yield cabecera + archivo.read(tamano_bloque - 18)
+
+
+def _descomprimir_miembros_gzip(miembros: List[bytes]) -> bytes:
+    """Descomprime una lista de miembros gzip completos. Se ejecuta en un hilo trabajador."""
+    return b"".join(zlib.decompress(miembro, wbits=31) for miembro in miembros)
+
+
+def descomprimir_bgzf_paralelo(ruta_archivo: str, num_hilos: int,
+                               miembros_por_tarea: int = 64) -> Iterator[bytes]:
+    """Descomprime un archivo BGZF con varios hilos, produciendo los datos en orden"""
+    with open(ruta_archivo, 'rb') as archivo, ThreadPoolExecutor(max_workers=num_hilos) as ejecutor:
+        pendientes = deque()
+        tanda = []
+        for miembro in _miembros_bgzf(archivo):
+            tanda.append(miembro)
+            if len(tanda) == miembros_por_tarea:
+                pendientes.append(ejecutor.submit(_descomprimir_miembros_gzip, tanda))
+                tanda = []
+                # Limitar las tareas en vuelo mantiene acotada la memoria
+                if len(pendientes) > num_hilos * 2:
+                    yield pendientes.popleft().result()
+        if tanda:
+            pendientes.append(ejecutor.submit(_descomprimir_miembros_gzip, tanda))
+        while pendientes:
+            yield pendientes.popleft().result()
+
+
+def calcular_rangos(ruta_archivo: str, tamano_rango: int) -> List[Tuple[int, int]]:
+    """
+    Divide un archivo en rangos de bytes [inicio, fin) de unos tamano_rango bytes.
+    Cada corte se desplaza hasta el siguiente espacio ASCII para no partir palabras.
+    """
+    tamano = os.path.getsize(ruta_archivo)
+    rangos = []
+    inicio = 0
+    
+    with open(ruta_archivo, 'rb') as archivo:
+        while inicio < tamano:
+            fin = inicio + tamano_rango
+            if fin >= tamano:
+                fin = tamano
+            else:
+                fin = _buscar_espacio_ascii(archivo, fin, tamano)
+            rangos.append((inicio, fin))
+            inicio = fin
+    
+    return rangos
+
+
+def _buscar_espacio_ascii(archivo, posicion: int, tamano: int) -> int:
+    """Devuelve la primera posición >= posicion con un espacio ASCII, o el final del archivo"""
+    archivo.seek(posicion)
+    for datos in leer_bloques_binarios(archivo, 64 * 1024):
+        coincidencia = _RE_ESPACIO_ASCII.search(datos)
+        if coincidencia:
+            return posicion + coincidencia.start()
+        posicion += len(datos)
+    return tamano
+
+
+def decodificar_vocabulario(contador_bytes: Counter, codificacion: str = 'utf-8',
+                            errores: str = 'strict') -> Tuple[int, Counter]:
+    """
+    Convierte un conteo con claves bytes en uno con claves str, decodificando
+    solo el vocabulario distinto (ver decodificar_claves_unidas)
+    Retorna: (numero_total_palabras, contador_palabras)
+    """
+    return decodificar_claves_unidas(b" ".join(contador_bytes), list(contador_bytes.values()),
+                                     codificacion, errores)
+
+
+def sumar_conteos(primero: Counter, segundo: Counter) -> Counter:
+    """
+    Suma dos conteos con las claves del primero delante, como primero.update(segundo),
+    pero copiando los diccionarios en C y recorriendo solo las palabras comunes
+    """
+    comunes = primero.keys() & segundo.keys()
+    suma = Counter(primero)
+    dict.update(suma, segundo)
+    for palabra in comunes:
+        suma[palabra] = primero[palabra] + segundo[palabra]
+    return suma
+
+
+def decodificar_claves_unidas(unidas: bytes, frecuencias: List[int], codificacion: str = 'utf-8',
+                              errores: str = 'strict') -> Tuple[int, Counter]:
+    """
+    Decodifica un vocabulario de claves bytes unidas por un espacio ASCII, con
+    la frecuencia de cada clave en el mismo orden. Se decodifica y se separa
+    todo de una vez y, si cada clave da una palabra distinta, el Counter se
+    crea de golpe, sin un paso del intérprete por clave. Si no, bytes.split()
+    no cortó en todos los espacios de str.split() (\\xa0, \\u3000...) o dos
+    claves dan la misma palabra, y se combinan clave a clave. Con una política
+    no estricta, los bytes no válidos de cada clave se cuentan tantas veces
+    como aparece la clave.
+    Retorna: (numero_total_palabras, contador_palabras)
+    """
+    if not frecuencias:
+        return 0, Counter()
+    
+    antes = bytes_no_validos_hilo()
+    texto = unidas.decode(codificacion, errores)
+    palabras = texto.split(" ")
+    separadas = len(palabras) == len(frecuencias)
+    
+    if bytes_no_validos_hilo() != antes or not separadas:
+        _bytes_no_validos.cantidad = antes
+        decodificadas = []
+        for clave, frecuencia in zip(unidas.split(b" "), frecuencias):
+            previos = bytes_no_validos_hilo()
+            decodificadas.append(clave.decode(codificacion, errores))
+            despues = bytes_no_validos_hilo()
+            _bytes_no_validos.cantidad = despues + (despues - previos) * (frecuencia - 1)
+        if not separadas:
+            # Un byte no válido se llevó el espacio que separaba dos claves
+            palabras = decodificadas
+    
+    if separadas and texto.split() == palabras:
+        contador = Counter(dict(zip(palabras, frecuencias)))
+        if len(contador) == len(frecuencias):
+            return sum(frecuencias), contador
+    
+    numero_palabras = 0
+    contador = Counter()
+    for decodificada, frecuencia in zip(palabras, frecuencias):
+        partes = decodificada.split()
+        numero_palabras += frecuencia * len(partes)
+        for palabra in partes:
+            contador[palabra] += frecuencia
+    
+    return numero_palabras, contador
+
+
+def _contar_rango(ruta_archivo: str, inicio: int, fin: int, tamano_bloque: int,
+                  codificacion: str = 'utf-8', errores: str = 'strict') -> Tuple[int, Counter, int]:
+    """
+    Cuenta las palabras de un rango de bytes. Se ejecuta en un proceso trabajador.
+    Retorna: (numero_palabras, contador, bytes_no_validos)
+    """
+    numero_palabras = 0
+    contador = Counter()
+    # Los bytes no válidos se devuelven en el resultado y no se dejan en el
+    # contador del hilo, que puede ser el del proceso principal
+    antes = bytes_no_validos_hilo()
+    
+    with open(ruta_archivo, 'rb') as archivo:
+        archivo.seek(inicio)
+        bloques = decodificar_bloques(leer_bloques_binarios(archivo, tamano_bloque, fin - inicio),
+                                      codificacion, errores)
+        for segmento in segmentar_bloques(bloques):
+            palabras = segmento.split()
+            numero_palabras += len(palabras)
+            contador.update(palabras)
+    
+    no_validos = bytes_no_validos_hilo() - antes
+    _bytes_no_validos.cantidad = antes
+    return numero_palabras, contador, no_validos
+
+
+def _posiciones_bytes(inicios, longitudes):
+    """Índices de todos los bytes de varias palabras (inicio y longitud), una tras otra"""
+    desplazamientos = numpy.cumsum(longitudes) - longitudes
+    return numpy.repeat(inicios - desplazamientos, longitudes) + numpy.arange(longitudes.sum())
+
+
+def _vista_octetos(datos):
+    """
+    Vista sin copia de un array de bytes terminado en 8 bytes de relleno, en la
+    que el elemento k son los 8 bytes que empiezan en k como un entero little-endian
+    """
+    return numpy.ndarray(shape=(len(datos) - 7,), dtype='<u8', buffer=datos, strides=(1,))
+
+
+def _mascara_octetos(restantes):
+    """Máscara que deja, de los 8 bytes leídos de cada palabra, solo los que aún le pertenecen"""
+    return numpy.uint64(0xFFFFFFFFFFFFFFFF) >> (64 - 8 * numpy.minimum(restantes, 8)).astype(numpy.uint64)
+
+
+def _bytes_distintos(octetos_a, inicios_a, longitudes_a, octetos_b, inicios_b, longitudes_b):
+    """
+    Compara cada palabra de octetos_a (ver _vista_octetos) con su pareja de
+    octetos_b sin bucle de Python por palabra: primero las longitudes y
+    después los bytes, de 8 en 8, solo en las palabras que siguen igualadas
+    Retorna un array booleano, True donde las palabras son distintas
+    """
+    distintos = longitudes_a != longitudes_b
+    pendientes = numpy.flatnonzero(~distintos)
+    desplazamiento = 0
+    while len(pendientes):
+        restantes = longitudes_a[pendientes] - desplazamiento
+        diferentes = ((octetos_a[inicios_a[pendientes] + desplazamiento]
+                       ^ octetos_b[inicios_b[pendientes] + desplazamiento]) & _mascara_octetos(restantes)) != 0
+        distintos[pendientes[diferentes]] = True
+        pendientes = pendientes[~diferentes & (restantes > 8)]
+        desplazamiento += 8
+    return distintos
+
+
+class ConteoVectorizado:
+    """
+    Conteo de palabras sobre bytes con NumPy, sin un paso del intérprete por
+    palabra. Cada segmento (que debe terminar en un límite de palabra) se cuenta así:
+    
+    - se marcan los espacios ASCII y los cambios entre espacio y no espacio
+      dan el inicio y el fin de todas las palabras
+    - el hash de todas las palabras se calcula a la vez sobre grupos de 8
+      bytes leídos como enteros. Las palabras de hasta 7 bytes (la mayoría)
+      se resuelven en una sola operación, con un hash sin colisiones entre
+      ellas, y las largas siguen solo ellas con FNV-1a
+    - una ordenación de los hashes agrupa las palabras iguales (como
+      numpy.unique) y el tamaño de cada grupo es su número de apariciones
+    
+    Cada segmento deja pendientes sus palabras distintas (hash, frecuencia,
+    posición de la primera aparición y bytes) sin tocar el vocabulario ya
+    combinado: actualizarlo en cada segmento costaría O(vocabulario) por
+    segmento. Los pendientes se combinan con el vocabulario de una vez, con
+    una sola ordenación de los hashes y numpy.add.reduceat, al pedir el
+    resultado o cuando superan al vocabulario combinado (así el coste total
+    sigue siendo O(N log N)). El vocabulario combinado guarda por palabra, en
+    orden de aparición, su hash, su frecuencia y sus bytes en una arena.
+    
+    Las colisiones se resuelven comparando los bytes de las palabras, también
+    de forma vectorial, cuando alguna de las dos es larga: dentro del segmento
+    cada palabra con la anterior de su grupo y al combinar cada palabra con la
+    primera de su hash. Las que no coinciden se cuentan aparte en un Counter.
+    """
+    
+    # Palabras distintas pendientes que se acumulan como mínimo antes de combinarlas,
+    # y bytes de segmento pendientes a partir de los que se combinan siempre
+    MINIMO_PENDIENTES = 1 << 20
+    MAXIMO_BYTES_PENDIENTES = 64 * 1024 * 1024
+    # Un segmento de al menos PALABRAS_MUESTRA palabras con más de esta proporción de
+    # palabras distintas indica un vocabulario en el que ordenar no compensa
+    PROPORCION_DISTINTAS_MAXIMA = 0.9
+    PALABRAS_MUESTRA = 1 << 16
+    
+    def __init__(self):
+        if numpy is None:
+            raise RuntimeError("para el conteo vectorizado instale el paquete 'numpy'")
+        self.numero_palabras = 0
+        # Posición del próximo segmento en el flujo, para ordenar las primeras apariciones
+        self._posicion = 0
+        # Vocabulario combinado, por palabra en orden de aparición: hash, frecuencia,
+        # primera aparición, y posición y longitud de sus bytes en la arena
+        self._hashes = numpy.empty(0, dtype=numpy.uint64)
+        self._frecuencias = numpy.empty(0, dtype=numpy.int64)
+        self._primeras = numpy.empty(0, dtype=numpy.int64)
+        self._desplazamientos = numpy.empty(0, dtype=numpy.int64)
+        self._longitudes = numpy.empty(0, dtype=numpy.int64)
+        # La arena termina siempre en 8 bytes de relleno para _vista_octetos
+        self._arena = numpy.zeros(8, dtype=numpy.uint8)
+        # (hashes, frecuencias, primeras, longitudes, inicios, datos) de cada segmento aún sin
+        # combinar: se guarda el segmento entero, copiar los bytes de cada palabra costaría más
+        self._pendientes = []
+        self._cantidad_pendiente = 0
+        self._bytes_pendientes = 0
+        # (primera aparición, palabra, frecuencia) que no se pueden contar por hash, aún sin combinar
+        self._colisiones_pendientes = []
+        self._colisiones = Counter()
+        # Con un vocabulario casi sin repeticiones, el resto se cuenta con Counter (ver contar)
+        self.directo = False
+    
+    def _hashes_palabras(self, octetos, inicios, longitudes):
+        """
+        Hash de 64 bits de cada palabra. Los 7 primeros bytes y la longitud
+        forman un solo entero que se multiplica por el primo de FNV, así que dos
+        palabras de hasta 7 bytes tienen el mismo hash solo si son iguales. El
+        resto de bytes se añade con FNV-1a en grupos de 8.
+        """
+        base = numpy.uint64(BASE_HASH_VECTORIZADO)
+        hashes = (octetos[inicios] & _mascara_octetos(longitudes.clip(max=7))) | (
+            longitudes.clip(max=255).astype(numpy.uint64) << numpy.uint64(56))
+        hashes *= base
+        pendientes = numpy.flatnonzero(longitudes > 7)
+        desplazamiento = 7
+        while len(pendientes):
+            restantes = longitudes[pendientes] - desplazamiento
+            grupos = octetos[inicios[pendientes] + desplazamiento] & _mascara_octetos(restantes)
+            hashes[pendientes] = (hashes[pendientes] ^ grupos) * base
+            pendientes = pendientes[restantes > 8]
+            desplazamiento += 8
+        return hashes
+    
+    def contar(self, segmento: bytes) -> None:
+        """Suma las palabras de un segmento de bytes"""
+        posicion = self._posicion
+        self._posicion += len(segmento)
+        if self.directo:
+            self.numero_palabras += self._contar_directo(segmento)
+            return
+        relleno = numpy.zeros(len(segmento) + 8, dtype=numpy.uint8)
+        relleno[:len(segmento)] = numpy.frombuffer(segmento, dtype=numpy.uint8)
+        datos = relleno[:len(segmento)]
+        # Marca de los bytes que no son espacio (los de bytes.split(): 9 a 13 y 32),
+        # con un falso a cada lado para que toda palabra tenga inicio y fin
+        es_palabra = numpy.zeros(len(datos) + 2, dtype=bool)
+        numpy.greater(datos - numpy.uint8(9), 4, out=es_palabra[1:-1])
+        es_palabra[1:-1] &= datos != 32
+        inicios = numpy.flatnonzero(es_palabra[1:] > es_palabra[:-1])
+        if not len(inicios):
+            return
+        fines = numpy.flatnonzero(es_palabra[1:] < es_palabra[:-1])
+        longitudes = fines - inicios
+        self.numero_palabras += len(inicios)
+        
+        # Agrupar por hash como numpy.unique, pero con la ordenación no estable,
+        # mucho más rápida: la primera aparición de cada grupo es su índice mínimo
+        octetos = _vista_octetos(relleno)
+        hashes = self._hashes_palabras(octetos, inicios, longitudes)
+        orden = numpy.argsort(hashes)
+        ordenados = hashes[orden]
+        comienza_grupo = numpy.empty(len(orden), dtype=bool)
+        comienza_grupo[0] = True
+        numpy.not_equal(ordenados[1:], ordenados[:-1], out=comienza_grupo[1:])
+        
+        # Cada palabra se compara con la anterior de su grupo, salvo si las dos son
+        # cortas (su hash ya es exacto). Una colisión dentro del segmento es tan
+        # improbable que entonces se cuenta entero sin NumPy
+        largas = longitudes[orden] > 7
+        repetidas = numpy.flatnonzero(~comienza_grupo & (largas | numpy.roll(largas, 1)))
+        if _bytes_distintos(octetos, inicios[orden[repetidas]], longitudes[orden[repetidas]],
+                            octetos, inicios[orden[repetidas - 1]], longitudes[orden[repetidas - 1]]).any():
+            self._colisiones_pendientes.extend(
+                (posicion + indice, palabra, frecuencia)
+                for indice, (palabra, frecuencia) in enumerate(Counter(segmento.split()).items()))
+            return
+        
+        comienzos = numpy.flatnonzero(comienza_grupo)
+        if len(orden) >= self.PALABRAS_MUESTRA and len(comienzos) > self.PROPORCION_DISTINTAS_MAXIMA * len(orden):
+            # Casi todas las palabras son distintas: combinar los hashes costaría
+            # ordenar todas las apariciones, más que un Counter. Lo ya contado se
+            # combina antes, así las claves siguen en orden de aparición
+            self._combinar()
+            self.directo = True
+            self._contar_directo(segmento)
+            return
+        primeras = numpy.minimum.reduceat(orden, comienzos)
+        self._pendientes.append((ordenados[comienzos], numpy.diff(comienzos, append=len(orden)),
+                                 posicion + inicios[primeras], longitudes[primeras], inicios[primeras], relleno))
+        self._cantidad_pendiente += len(comienzos)
+        self._bytes_pendientes += len(relleno)
+        if (self._cantidad_pendiente > max(self.MINIMO_PENDIENTES, len(self._frecuencias))
+                or self._bytes_pendientes > self.MAXIMO_BYTES_PENDIENTES):
+            self._combinar()
+    
+    def _contar_directo(self, segmento: bytes) -> int:
+        """Cuenta un segmento con Counter, tras todo lo contado antes. Retorna su número de palabras"""
+        palabras = segmento.split()
+        self._colisiones.update(palabras)
+        return len(palabras)
+    
+    def _combinar(self) -> None:
+        """Combina las palabras pendientes con el vocabulario con una sola ordenación"""
+        colisiones, self._colisiones_pendientes = self._colisiones_pendientes, []
+        self._combinar_hashes(colisiones)
+        # Las colisiones se cuentan en orden de aparición, como las claves de Counter
+        for _, palabra, frecuencia in sorted(colisiones, key=lambda colision: colision[0]):
+            self._colisiones[palabra] += frecuencia
+    
+    def _combinar_hashes(self, colisiones: list) -> None:
+        """Combina los hashes pendientes y añade a colisiones las palabras que no coinciden con su hash"""
+        if not self._pendientes:
+            return
+        ocupado = len(self._arena) - 8
+        partes = list(zip(*self._pendientes))
+        self._pendientes, self._cantidad_pendiente, self._bytes_pendientes = [], 0, 0
+        hashes = numpy.concatenate([self._hashes, *partes[0]])
+        frecuencias = numpy.concatenate([self._frecuencias, *partes[1]])
+        primeras = numpy.concatenate([self._primeras, *partes[2]])
+        longitudes = numpy.concatenate([self._longitudes, *partes[3]])
+        # Los segmentos van tras la arena: cada palabra pendiente apunta a su segmento
+        bases = ocupado + numpy.cumsum([0] + [len(datos) for datos in partes[5][:-1]])
+        arena = numpy.concatenate([self._arena[:ocupado], *partes[5], self._arena[ocupado:]])
+        desplazamientos = numpy.concatenate([self._desplazamientos] + [
+            base + inicios for base, inicios in zip(bases.tolist(), partes[4])])
+        
+        # Estable: el vocabulario y los segmentos están en orden de aparición, así que
+        # la primera entrada de cada grupo es la primera aparición de su hash
+        orden = numpy.argsort(hashes, kind='stable')
+        ordenados = hashes[orden]
+        comienza_grupo = numpy.empty(len(orden), dtype=bool)
+        comienza_grupo[0] = True
+        numpy.not_equal(ordenados[1:], ordenados[:-1], out=comienza_grupo[1:])
+        
+        # Cada entrada se compara con la primera de su grupo si alguna de las dos es larga
+        primera_grupo = orden[numpy.maximum.accumulate(numpy.where(comienza_grupo, numpy.arange(len(orden)), 0))]
+        largas = numpy.flatnonzero(~comienza_grupo & ((longitudes[orden] > 7) | (longitudes[primera_grupo] > 7)))
+        octetos = _vista_octetos(arena)
+        distintas = largas[_bytes_distintos(octetos, desplazamientos[orden[largas]], longitudes[orden[largas]],
+                                            octetos, desplazamientos[primera_grupo[largas]],
+                                            longitudes[primera_grupo[largas]])]
+        if len(distintas):
+            conservar = numpy.ones(len(orden), dtype=bool)
+            conservar[distintas] = False
+            for indice in orden[distintas].tolist():
+                inicio = desplazamientos[indice]
+                colisiones.append((int(primeras[indice]), arena[inicio:inicio + longitudes[indice]].tobytes(),
+                                   int(frecuencias[indice])))
+            orden, comienza_grupo = orden[conservar], comienza_grupo[conservar]
+        
+        comienzos = numpy.flatnonzero(comienza_grupo)
+        representantes = orden[comienzos]
+        totales = numpy.add.reduceat(frecuencias[orden], comienzos)
+        en_orden = numpy.argsort(primeras[representantes])
+        representantes = representantes[en_orden]
+        
+        self._hashes = hashes[representantes]
+        self._frecuencias = totales[en_orden]
+        self._primeras = primeras[representantes]
+        self._longitudes = longitudes[representantes]
+        self._desplazamientos = numpy.cumsum(self._longitudes) - self._longitudes
+        self._arena = numpy.concatenate([arena[_posiciones_bytes(desplazamientos[representantes],
+                                                                 self._longitudes)],
+                                         numpy.zeros(8, dtype=numpy.uint8)])
+    
+    def claves_unidas(self) -> Tuple[bytes, List[int], Counter]:
+        """
+        Las palabras distintas del vocabulario combinado unidas por un espacio
+        ASCII y sus frecuencias, en el mismo orden que contador_bytes, para
+        decodificar_claves_unidas, y el Counter de las contadas aparte
+        (colisiones y conteo directo), que pueden repetir palabras del
+        vocabulario. Los bytes salen de la arena de una vez, sin crear un
+        objeto bytes por palabra.
+        """
+        self._combinar()
+        ocupado = len(self._arena) - 8
+        cantidad = len(self._longitudes)
+        unidas = numpy.full(ocupado + max(cantidad - 1, 0), ord(" "), dtype=numpy.uint8)
+        # La palabra i se desplaza i posiciones para dejar sitio a los espacios anteriores
+        unidas[numpy.arange(ocupado) + numpy.repeat(numpy.arange(cantidad), self._longitudes)] = \
+            self._arena[:ocupado]
+        return unidas.tobytes(), self._frecuencias.tolist(), self._colisiones
+    
+    def contador_bytes(self) -> Counter:
+        """Conteo con claves bytes, en el mismo orden que daría Counter sobre las palabras"""
+        self._combinar()
+        contador = Counter()
+        arena = self._arena.tobytes()
+        for desplazamiento, longitud, frecuencia in zip(self._desplazamientos.tolist(),
+                                                        self._longitudes.tolist(),
+                                                        self._frecuencias.tolist()):
+            contador[arena[desplazamiento:desplazamiento + longitud]] += frecuencia
+        contador.update(self._colisiones)
+        return contador
+
+
+def _trigramas(texto: str) -> set:
+    """Trigramas de un texto, con marcas de principio y final para que cuenten los bordes"""
+    texto = f"\x00{texto}\x00"
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceDirectorio:
+    """
+    Índice de los nombres de un directorio para sugerir los parecidos a uno
+    que no existe, sin volver a recorrer el directorio en cada consulta.
+    Se construye con una sola pasada de os.scandir:
+    
+    - los nombres en minúsculas ordenados, para buscar prefijos y nombres
+      exactos por búsqueda binaria
+    - los mismos nombres unidos en un solo texto separado por '\\0' (que no
+      puede aparecer en un nombre), donde las subcadenas se buscan en C
+    - un índice de trigramas (trigrama -> posiciones) para los nombres con
+      erratas, que se completa con los trigramas de cada consulta
+    
+    Sigue siendo válido mientras no cambie la fecha de modificación del
+    directorio, que se actualiza al crear, borrar o renombrar entradas.
+    """
+    
+    # Trigramas presentes en más entradas que esto (por ejemplo '.tx') no sirven
+    # para elegir candidatos: recorrer sus posiciones costaría tanto como el directorio
+    MAXIMO_TRIGRAMA_SELECTIVO = 1000
+    # Similitud mínima (coeficiente de Dice entre trigramas) para sugerir un nombre con erratas
+    SIMILITUD_MINIMA = 0.5
+    
+    def __init__(self, ruta_directorio: str):
+        self.ruta_directorio = ruta_directorio
+        self.mtime_ns = os.stat(ruta_directorio).st_mtime_ns
+        self.construido_ns = time.time_ns()
+        
+        with os.scandir(ruta_directorio) as entradas:
+            claves = sorted((entrada.name.lower(), entrada.name) for entrada in entradas)
+        self.nombres = [nombre for _, nombre in claves]
+        self._minusculas = [minusculas for minusculas, _ in claves]
+        self.archivos_txt = [nombre for minusculas, nombre in claves if minusculas.endswith('.txt')]
+        
+        self._texto = "\x00" + "\x00".join(self._minusculas) + "\x00"
+        # Desplazamiento en _texto del primer carácter de cada nombre
+        self._inicios = list(itertools.accumulate((len(minusculas) + 1 for minusculas in self._minusculas),
+                                                  initial=1))
+        self._posiciones_trigrama = {}
+    
+    def vigente(self, mtime_ns: int) -> bool:
+        """
+        Indica si el índice sigue describiendo el directorio. Si se construyó
+        poco después de la última modificación, el directorio pudo cambiar
+        otra vez sin que cambie su fecha (la resolución de algunos sistemas de
+        archivos, como NFS, es de un segundo) y no se da por bueno.
+        """
+        return mtime_ns == self.mtime_ns and self.construido_ns - self.mtime_ns > 2 * 10 ** 9
+    
+    def _rango_prefijo(self, prefijo: str) -> range:
+        """Posiciones de los nombres que empiezan por el prefijo (en minúsculas)"""
+        inicio = bisect.bisect_left(self._minusculas, prefijo)
+        fin = bisect.bisect_left(self._minusculas, prefijo + '\U0010ffff', inicio)
+        return range(inicio, fin)
+    
+    def _con_subcadena(self, subcadena: str) -> List[int]:
+        """Posiciones de los nombres que contienen la subcadena (en minúsculas, sin '\\0' salvo en los bordes)"""
+        posiciones = []
+        for coincidencia in re.finditer(re.escape(subcadena), self._texto):
+            # El segundo carácter siempre pertenece al nombre, aunque la subcadena empiece por '\0'
+            posicion = bisect.bisect_right(self._inicios, coincidencia.start() + 1) - 1
+            if not posiciones or posiciones[-1] != posicion:
+                posiciones.append(posicion)
+        return posiciones
+    
+    def _contenidos_en(self, texto: str) -> Iterator[int]:
+        """Posiciones de los nombres que son subcadenas del texto (en minúsculas)"""
+        subcadenas = {texto[i:j] for i in range(len(texto)) for j in range(i + 1, len(texto) + 1)}
+        for subcadena in subcadenas:
+            posicion = bisect.bisect_left(self._minusculas, subcadena)
+            while posicion < len(self._minusculas) and self._minusculas[posicion] == subcadena:
+                yield posicion
+                posicion += 1
+    
+    def _posiciones(self, trigrama: str) -> List[int]:
+        """Posiciones de los nombres con el trigrama, o [] si es demasiado común para ser útil"""
+        posiciones = self._posiciones_trigrama.get(trigrama)
+        if posiciones is None:
+            if self._texto.count(trigrama) > self.MAXIMO_TRIGRAMA_SELECTIVO:
+                posiciones = []
+            else:
+                posiciones = self._con_subcadena(trigrama)
+            self._posiciones_trigrama[trigrama] = posiciones
+        return posiciones
+    
+    def _parecidos(self, texto: str, limite: int) -> Iterator[Tuple[int, float]]:
+        """Posiciones de los nombres con la mayoría de trigramas en común con el texto y su similitud"""
+        trigramas_texto = _trigramas(texto)
+        comunes = Counter()
+        for trigrama in trigramas_texto:
+            comunes.update(self._posiciones(trigrama))
+        
+        # La similitud exacta solo se calcula para los candidatos con más trigramas selectivos en común
+        for posicion, _ in heapq.nlargest(limite * 10, comunes.items(), key=lambda elemento: elemento[1]):
+            trigramas_nombre = _trigramas(self._minusculas[posicion])
+            similitud = 2 * len(trigramas_texto & trigramas_nombre) / (len(trigramas_texto) + len(trigramas_nombre))
+            if similitud >= self.SIMILITUD_MINIMA:
+                yield posicion, similitud
+    
+    def buscar(self, nombre_buscado: str, limite: int) -> List[str]:
+        """
+        Busca hasta 'limite' nombres parecidos al buscado, sin distinguir
+        mayúsculas, de más a menos parecido:
+        1. los que empiezan por el nombre buscado sin extensión
+        2. los que contienen el nombre buscado
+        3. los que están contenidos en el nombre buscado
+        4. los que comparten la mayoría de sus trigramas (erratas)
+        Dentro de cada grupo se prefieren los de longitud más cercana.
+        """
+        consulta = nombre_buscado.lower().replace("\x00", "")
+        if not consulta:
+            return []
+        niveles = {}
+        
+        def proponer(posiciones: Iterable[int], nivel: int) -> None:
+            for posicion in posiciones:
+                if niveles.get(posicion, nivel + 1) > nivel:
+                    niveles[posicion] = nivel
+        
+        raiz = consulta.split('.')[0]
+        if raiz:
+            proponer(self._rango_prefijo(raiz), 0)
+        proponer(self._con_subcadena(consulta), 1)
+        proponer(self._contenidos_en(consulta), 2)
+        similitudes = dict(self._parecidos(consulta, limite))
+        proponer(similitudes, 3)
+        
+        def orden(posicion: int) -> tuple:
+            nivel = niveles[posicion]
+            distancia = -similitudes[posicion] if nivel == 3 else abs(len(self._minusculas[posicion]) - len(consulta))
+            return nivel, distancia, self.nombres[posicion]
+        
+        return [self.nombres[posicion] for posicion in heapq.nsmallest(limite, niveles, key=orden)]
+
+
+# Índices de los directorios consultados, del menos al más reciente
+_indices_directorio = {}
+_cerrojo_indices = threading.Lock()
+MAXIMO_INDICES_DIRECTORIO = 8
+
+
+def obtener_indice_directorio(ruta_directorio: str) -> IndiceDirectorio:
+    """
+    Devuelve el índice de un directorio, reutilizando el anterior si el
+    directorio no ha cambiado. Solo se conservan los más recientes.
+    """
+    clave = os.path.abspath(ruta_directorio)
+    mtime_ns = os.stat(clave).st_mtime_ns
+    with _cerrojo_indices:
+        indice = _indices_directorio.pop(clave, None)
+    if indice is None or not indice.vigente(mtime_ns):
+        indice = IndiceDirectorio(clave)
+    
+    with _cerrojo_indices:
+        _indices_directorio[clave] = indice
+        while len(_indices_directorio) > MAXIMO_INDICES_DIRECTORIO:
+            del _indices_directorio[next(iter(_indices_directorio))]
+    return indice
 
 
 class ValidadorArchivo:
     """Clase responsable de validar archivos y rutas"""
     
+    # Número máximo de nombres que se sugieren en cada lista del mensaje de error
+    LIMITE_SUGERENCIAS = 10
+    
+    # A partir de cuántas rutas pedidas de un mismo directorio compensa leerlo
+    # entero con os.scandir en lugar de consultar cada ruta por separado
+    UMBRAL_SCANDIR = 32
+    
+    @staticmethod
+    def buscar_archivos_similares(nombre_buscado: str, ruta_padre: str,
+                                  limite: int = LIMITE_SUGERENCIAS) -> List[str]:
+        """Busca archivos con nombres similares al buscado, los más parecidos primero"""
+        try:
+            return obtener_indice_directorio(ruta_padre).buscar(nombre_buscado, limite)
+        except OSError:
+            return []
+    
+    @staticmethod
+    def validar_ruta_archivo(ruta_archivo: str) -> Tuple[bool, str]:
+        """
+        Valida si la ruta del archivo es válida
+        Retorna: (es_valida, mensaje_error)
+        """
+        registro = ValidadorArchivo.describir_ruta(ruta_archivo)
+        return registro['valida'], registro['mensaje_error']
+    
+    @staticmethod
+    def describir_ruta(ruta_archivo: str, sugerencias: bool = True,
+                       info: Union[os.stat_result, OSError, None] = None) -> dict:
+        """
+        Valida una ruta con una sola consulta de metadatos (stat)
+        sugerencias: si no existe, incluir en el mensaje los archivos parecidos de su carpeta
+        info: resultado de stat ya obtenido (por ejemplo, de os.scandir) o el error que produjo
+        Retorna un diccionario con ruta, valida, mensaje_error, tipo ('archivo',
+        'flujo', 'carpeta', 'otro' o None si no existe), tamano y mtime_ns
+        """
+        registro = {'ruta': ruta_archivo, 'valida': False, 'mensaje_error': "",
+                    'tipo': None, 'tamano': None, 'mtime_ns': None}
+        if not ruta_archivo.strip():
+            registro['mensaje_error'] = "❌ Error: Debe ingresar una ruta de archivo."
+            return registro
+        
+        try:
+            if info is None:
+                info = os.stat(ruta_archivo)
+            elif isinstance(info, OSError):
+                raise info
+        except OSError as error:
+            if sugerencias:
+                registro['mensaje_error'] = ValidadorArchivo._generar_mensaje_archivo_no_encontrado(ruta_archivo)
+            else:
+                registro['mensaje_error'] = f"❌ Error al procesar el archivo: {error}"
+            return registro
+        
+        registro['tamano'] = info.st_size
+        registro['mtime_ns'] = info.st_mtime_ns
+        if stat.S_ISDIR(info.st_mode):
+            registro['tipo'] = 'carpeta'
+            registro['mensaje_error'] = f"❌ Error: '{ruta_archivo}' es una carpeta, no un archivo."
+        elif stat.S_ISREG(info.st_mode):
+            registro['tipo'] = 'archivo'
+            registro['valida'] = True
+        elif stat.S_ISFIFO(info.st_mode) or stat.S_ISCHR(info.st_mode):
+            # Se aceptan tuberías con nombre y dispositivos como /dev/stdin, que se leen en streaming
+            registro['tipo'] = 'flujo'
+            registro['valida'] = True
+        else:
+            registro['tipo'] = 'otro'
+            registro['mensaje_error'] = f"❌ Error: '{ruta_archivo}' no es un archivo regular ni una tubería."
+        return registro
+    
+    @staticmethod
+    def consultar_info(ruta_archivo: str) -> Union[os.stat_result, OSError]:
+        """Resultado de stat de una ruta, o el error que produjo"""
+        try:
+            return os.stat(ruta_archivo)
+        except OSError as error:
+            return error
+    
+    @staticmethod
+    def info_entrada(entrada: os.DirEntry) -> Union[os.stat_result, OSError]:
+        """Metadatos de una entrada de os.scandir (en Windows ya vienen del listado), o el error que produjo"""
+        try:
+            return entrada.stat()
+        except OSError as error:
+            return error
+    
+    @staticmethod
+    def validar_rutas(rutas: Iterable[str], sugerencias: bool = False) -> List[dict]:
+        """
+        Valida muchas rutas de una vez, con una sola consulta de metadatos por
+        ruta: las carpetas de las que se piden al menos UMBRAL_SCANDIR rutas se
+        leen con un único os.scandir, y las rutas que no aparecen en ellas no
+        necesitan ninguna consulta más. La entrada estándar ('-') es un flujo válido.
+        Retorna un registro de describir_ruta por ruta, en el mismo orden
+        """
+        rutas = list(rutas)
+        por_carpeta = {}
+        for ruta in rutas:
+            if ruta != ENTRADA_ESTANDAR and ruta.strip():
+                por_carpeta.setdefault(os.path.dirname(ruta), []).append(ruta)
+        
+        infos = {}
+        for carpeta, grupo in por_carpeta.items():
+            if len(grupo) < ValidadorArchivo.UMBRAL_SCANDIR:
+                continue
+            try:
+                with os.scandir(carpeta or os.curdir) as entradas:
+                    presentes = {entrada.name: entrada for entrada in entradas}
+            except OSError:
+                # Cada ruta se consultará por separado y tendrá su propio error
+                continue
+            for ruta in grupo:
+                entrada = presentes.get(os.path.basename(ruta))
+                if entrada is not None:
+                    infos[ruta] = ValidadorArchivo.info_entrada(entrada)
+                else:
+                    infos[ruta] = FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), ruta)
+        
+        registros = []
+        for ruta in rutas:
+            if ruta == ENTRADA_ESTANDAR:
+                registros.append({'ruta': ruta, 'valida': True, 'mensaje_error': "",
+                                  'tipo': 'flujo', 'tamano': None, 'mtime_ns': None})
+            else:
+                registros.append(ValidadorArchivo.describir_ruta(ruta, sugerencias, infos.get(ruta)))
+        return registros
+    
+    @staticmethod
+    def _generar_mensaje_archivo_no_encontrado(ruta_archivo: str) -> str:
+        """Genera un mensaje detallado cuando no se encuentra un archivo"""
+        mensaje = f"❌ Error: No se encontró '{ruta_archivo}'\n"
+        
+        ruta_padre = os.path.dirname(ruta_archivo)
+        nombre_archivo = os.path.basename(ruta_archivo)
+        
+        if ruta_padre and os.path.exists(ruta_padre):
+            mensaje += f"   📁 La carpeta '{ruta_padre}' SÍ existe\n"
+            mensaje += f"   📄 Pero el archivo '{nombre_archivo}' NO se encuentra en esa carpeta\n"
+            
+            try:
+                # Un solo recorrido del directorio para las dos listas
+                indice = obtener_indice_directorio(ruta_padre)
+                archivos_en_carpeta = indice.nombres
+                archivos_txt = indice.archivos_txt
+                limite = ValidadorArchivo.LIMITE_SUGERENCIAS
+                
+                # Buscar archivos con nombres similares
+                archivos_similares = indice.buscar(nombre_archivo, limite)
+                
+                if archivos_similares:
+                    mensaje += f"   🔍 Archivos con nombres similares a '{nombre_archivo}':\n"
+                    for archivo in archivos_similares:
+                        mensaje += f"      - {archivo}\n"
+                
+                if archivos_txt:
+                    mensaje += f"   📋 Archivos .txt disponibles en '{ruta_padre}':\n"
+                    for archivo in archivos_txt[:limite]:
+                        mensaje += f"      - {archivo}\n"
+                    if len(archivos_txt) > limite:
+                        mensaje += f"      ... y {len(archivos_txt) - limite} archivos .txt más\n"
+                else:
+                    mensaje += f"   📋 No hay archivos .txt en '{ruta_padre}'\n"
+                    mensaje += f"   📋 Archivos disponibles: {', '.join(archivos_en_carpeta[:5])}\n"
+                    if len(archivos_en_carpeta) > 5:
+                        mensaje += f"      ... y {len(archivos_en_carpeta) - 5} archivos más\n"
+            except PermissionError:
+                mensaje += f"   ⚠️  No se puede acceder al contenido de '{ruta_padre}'\n"
+        else:
+            mensaje += f"   📁 La carpeta '{ruta_padre}' NO existe\n"
+            mensaje += "   💡 Sugerencias:\n"
+            mensaje += "      - Verifique que escribió la ruta correctamente\n"
+            mensaje += "      - Use rutas absolutas como: /ruta/completa/al/archivo.txt\n"
+            mensaje += "      - O rutas relativas como: ./archivo.txt\n"
+        
+        return mensaje
+
+
+class Tokenizador:
+    """
+    Normaliza el texto antes de contar, para que 'Hola', 'hola' y 'hola,'
+    cuenten como la misma palabra. Opciones:
+    - minusculas: pliegue de mayúsculas (str.casefold, 'Straße' -> 'strasse')
+    - quitar_puntuacion: elimina los signos al principio y al final de cada
+      palabra; los de dentro se conservan ('e-mail', 'l'agua')
+    - normalizar_nfc: forma canónica NFC de Unicode
+    - quitar_acentos: elimina tildes y diacríticos ('camión' -> 'camion')
+    
+    Todas las operaciones se aplican a un texto completo de una vez (una
+    expresión regular compilada o un método de str por bloque), nunca palabra a palabra.
+    """
+    
+    def __init__(self, minusculas: bool = False, quitar_puntuacion: bool = False,
+                 normalizar_nfc: bool = False, quitar_acentos: bool = False):
+        self.minusculas = minusculas
+        self.quitar_puntuacion = quitar_puntuacion
+        self.normalizar_nfc = normalizar_nfc
+        self.quitar_acentos = quitar_acentos
+    
+    def firma(self) -> str:
+        """Identifica las opciones activas (para la caché y el estado incremental)"""
+        opciones = [nombre for nombre in ('minusculas', 'quitar_puntuacion', 'normalizar_nfc', 'quitar_acentos')
+                    if getattr(self, nombre)]
+        return "+".join(opciones) or "ninguna"
+    
+    def normalizar(self, texto: str) -> str:
+        """Aplica las opciones activas a un bloque de texto"""
+        if self.quitar_acentos:
+            texto = _RE_MARCAS_COMBINABLES.sub('', unicodedata.normalize('NFD', texto))
+        if self.minusculas:
+            texto = texto.casefold()
+        if (self.normalizar_nfc or self.quitar_acentos) and not unicodedata.is_normalized('NFC', texto):
+            texto = unicodedata.normalize('NFC', texto)
+        if self.quitar_puntuacion:
+            texto = _RE_PUNTUACION_BORDES.sub('', texto)
+        return texto
+    
+    def normalizar_conteo(self, contador: Mapping) -> Counter:
+        """
+        Normaliza una tabla de frecuencias ya contada, fusionando las palabras
+        que quedan iguales y descartando las que quedan vacías. Como solo se
+        procesa el vocabulario distinto, es mucho más barato que normalizar el texto.
+        """
+        elementos = list(contador.items())
+        # Las palabras no contienen espacios: se normalizan todas en una sola llamada
+        normalizadas = self.normalizar("\n".join(palabra for palabra, _ in elementos)).split("\n")
+        resultado = Counter()
+        for (_, frecuencia), normalizada in zip(elementos, normalizadas):
+            if normalizada:
+                resultado[normalizada] += frecuencia
+        return resultado
+
+
+class ContadorAproximado(Mapping):
+    """
+    Conteo aproximado de las palabras más frecuentes con memoria fija
+    (algoritmo Space-Saving de Metwally et al.).
+    
+    Nunca guarda más de 'capacidad' palabras. Cada frecuencia estimada f
+    cumple f - error <= frecuencia_real <= f, y cualquier palabra que no esté
+    monitorizada aparece como mucho error_maximo() veces. Cualquier palabra con
+    frecuencia real mayor que total / capacidad está garantizada en la tabla.
+    
+    Ofrece la misma interfaz de lectura que Counter (most_common, [], len, iteración).
+    """
+    
+    def __init__(self, capacidad: int):
+        if capacidad <= 0:
+            raise ValueError("La capacidad debe ser mayor que cero")
+        self.capacidad = capacidad
+        self.total = 0
+        self.desplazamientos = 0
+        self.conteos = {}
+        self.errores = {}
+        # Montículo de (frecuencia, palabra) con una entrada por palabra monitorizada.
+        # Las frecuencias pueden estar desfasadas a la baja y se corrigen al extraer.
+        self._monticulo = []
+    
+    def __getitem__(self, palabra: str) -> int:
+        return self.conteos.get(palabra, 0)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.conteos)
+    
+    def __len__(self) -> int:
+        return len(self.conteos)
+    
+    def update(self, palabras=(), **kwargs) -> None:
+        """Añade palabras (iterable) o frecuencias (mapping), igual que Counter.update"""
+        # Agregar primero cada lote reduce las operaciones sobre el montículo
+        frecuencias = palabras if isinstance(palabras, Mapping) else Counter(palabras)
+        for palabra, peso in frecuencias.items():
+            self._anadir(palabra, peso)
+        for palabra, peso in kwargs.items():
+            self._anadir(palabra, peso)
+    
+    def _anadir(self, palabra: str, peso: int) -> None:
+        """Suma 'peso' apariciones de una palabra"""
+        self.total += peso
+        
+        if palabra in self.conteos:
+            self.conteos[palabra] += peso
+            return
+        
+        if len(self.conteos) < self.capacidad:
+            self.conteos[palabra] = peso
+            self.errores[palabra] = 0
+        else:
+            minimo, desplazada = self._extraer_minimo()
+            self.desplazamientos += 1
+            del self.conteos[desplazada]
+            del self.errores[desplazada]
+            self.conteos[palabra] = minimo + peso
+            self.errores[palabra] = minimo
+        
+        heapq.heappush(self._monticulo, (self.conteos[palabra], palabra))
+    
+    def _extraer_minimo(self) -> Tuple[int, str]:
+        """Saca del montículo la palabra monitorizada con menor frecuencia"""
+        while True:
+            frecuencia, palabra = heapq.heappop(self._monticulo)
+            actual = self.conteos[palabra]
+            if actual == frecuencia:
+                return frecuencia, palabra
+            # Entrada desfasada: se reinserta con su frecuencia actual
+            heapq.heappush(self._monticulo, (actual, palabra))
+    
+    def error_maximo(self) -> int:
+        """Cota superior de la frecuencia de cualquier palabra no monitorizada"""
+        if self.desplazamientos == 0:
+            return 0
+        return min(self.conteos.values())
+    
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Lista las n palabras con mayor frecuencia estimada"""
+        if n is None:
+            return sorted(self.conteos.items(), key=lambda item: item[1], reverse=True)
+        return heapq.nlargest(n, self.conteos.items(), key=lambda item: item[1])
+    
+    def cotas(self, n: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """Lista (palabra, frecuencia_estimada, error) de las n palabras más frecuentes"""
+        return [(palabra, frecuencia, self.errores[palabra])
+                for palabra, frecuencia in self.most_common(n)]
+
+
+class _ElementosVocabulario(ItemsView):
+    """Vista (palabra, frecuencia) de un VocabularioCompacto que recorre sus arrays sin buscar cada palabra"""
+    
+    def __iter__(self) -> Iterator[Tuple[str, int]]:
+        return self._mapping._elementos()
+
+
+class _FrecuenciasVocabulario(ValuesView):
+    """Vista de las frecuencias de un VocabularioCompacto"""
+    
+    def __iter__(self) -> Iterator[int]:
+        return (frecuencia for frecuencia in self._mapping._frecuencias if frecuencia)
+
+
+class VocabularioCompacto(Mapping):
+    """
+    Conteo exacto de palabras con poca memoria por palabra distinta.
+    
+    Un Counter guarda por cada palabra un objeto str, un int y una entrada de
+    diccionario: más de 100 bytes. Aquí cada palabra recibe un identificador
+    entero (su orden de aparición) y todo vive en bloques contiguos:
+    
+    - una arena (bytearray) con las palabras en UTF-8, una tras otra
+    - array('Q') con el desplazamiento de cada palabra en la arena y otro con su frecuencia
+    - array('I') con el CRC-32 de cada palabra y una tabla hash de direccionamiento
+      abierto (array('i') de identificadores, -1 en las posiciones libres)
+    
+    Cada palabra distinta ocupa unos 30-40 bytes más su longitud en UTF-8. A
+    cambio, cada palabra distinta de un lote se busca en Python y no en C, así
+    que contar es más lento que con Counter.
+    
+    Ofrece la misma interfaz de lectura que Counter (most_common, [], len,
+    iteración en orden de aparición), update y pop. Solo admite frecuencias positivas.
+    """
+    
+    # Ocupación máxima de la tabla hash antes de duplicar su tamaño
+    CARGA_MAXIMA = 2 / 3
+    
+    def __init__(self, frecuencias=()):
+        self._arena = bytearray()
+        self._inicios = array.array('Q', [0])
+        self._frecuencias = array.array('Q')
+        self._huellas = array.array('I')
+        self._tabla = array.array('i', [-1]) * 8
+        # Palabras con frecuencia mayor que cero (las quitadas con pop conservan su identificador)
+        self._presentes = 0
+        self.update(frecuencias)
+    
+    def __getitem__(self, palabra: str) -> int:
+        identificador = self._identificador(palabra)
+        return self._frecuencias[identificador] if identificador >= 0 else 0
+    
+    def __contains__(self, palabra) -> bool:
+        identificador = self._identificador(palabra)
+        return identificador >= 0 and self._frecuencias[identificador] > 0
+    
+    def __iter__(self) -> Iterator[str]:
+        return (palabra for palabra, _ in self._elementos())
+    
+    def __len__(self) -> int:
+        return self._presentes
+    
+    def get(self, palabra: str, defecto=None):
+        """Frecuencia de la palabra, o defecto si no está"""
+        return self[palabra] if palabra in self else defecto
+    
+    def items(self) -> ItemsView:
+        return _ElementosVocabulario(self)
+    
+    def values(self) -> ValuesView:
+        return _FrecuenciasVocabulario(self)
+    
+    def update(self, palabras=(), **kwargs) -> None:
+        """Añade palabras (iterable) o frecuencias (mapping), igual que Counter.update"""
+        # Agregar primero cada lote hace una sola búsqueda por palabra distinta
+        frecuencias = palabras if isinstance(palabras, Mapping) else Counter(palabras)
+        for palabra, peso in frecuencias.items():
+            self._anadir(palabra, peso)
+        for palabra, peso in kwargs.items():
+            self._anadir(palabra, peso)
+    
+    def pop(self, palabra: str, *defecto) -> int:
+        """Quita una palabra y devuelve su frecuencia, como dict.pop"""
+        identificador = self._identificador(palabra)
+        if identificador < 0 or not self._frecuencias[identificador]:
+            if defecto:
+                return defecto[0]
+            raise KeyError(palabra)
+        frecuencia = self._frecuencias[identificador]
+        self._frecuencias[identificador] = 0
+        self._presentes -= 1
+        return frecuencia
+    
+    def total(self) -> int:
+        """Suma de todas las frecuencias"""
+        return sum(self._frecuencias)
+    
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Lista las n palabras más frecuentes. Solo se decodifican las elegidas y,
+        como en Counter, los empates quedan en orden de aparición.
+        """
+        frecuencias = self._frecuencias
+        if n is None:
+            identificadores = sorted(range(len(frecuencias)), key=frecuencias.__getitem__, reverse=True)
+        else:
+            identificadores = heapq.nlargest(n, range(len(frecuencias)), key=frecuencias.__getitem__)
+        return [(self._palabra(identificador), frecuencias[identificador])
+                for identificador in identificadores if frecuencias[identificador]]
+    
+    def memoria_bytes(self) -> int:
+        """Bytes que ocupan la arena y los arrays"""
+        return sum(sys.getsizeof(bloque) for bloque in
+                   (self._arena, self._inicios, self._frecuencias, self._huellas, self._tabla))
+    
+    def _palabra(self, identificador: int) -> str:
+        """Palabra de un identificador, leída de la arena"""
+        inicio, fin = self._inicios[identificador], self._inicios[identificador + 1]
+        return self._arena[inicio:fin].decode('utf-8', 'surrogatepass')
+    
+    def _elementos(self) -> Iterator[Tuple[str, int]]:
+        """Recorre (palabra, frecuencia) en orden de aparición, saltando las quitadas"""
+        arena, inicios = self._arena, self._inicios
+        for identificador, frecuencia in enumerate(self._frecuencias):
+            if frecuencia:
+                palabra = arena[inicios[identificador]:inicios[identificador + 1]].decode('utf-8', 'surrogatepass')
+                yield palabra, frecuencia
+    
+    def _buscar(self, clave: bytes, huella: int) -> Tuple[int, int]:
+        """
+        Busca una palabra ya codificada en la tabla hash
+        Retorna: (identificador o -1 si no está, posición donde está o donde iría)
+        """
+        tabla, huellas, inicios = self._tabla, self._huellas, self._inicios
+        mascara = len(tabla) - 1
+        posicion = huella & mascara
+        while True:
+            identificador = tabla[posicion]
+            if identificador < 0:
+                return -1, posicion
+            # La huella descarta casi todas las colisiones sin comparar los bytes
+            if (huellas[identificador] == huella
+                    and self._arena[inicios[identificador]:inicios[identificador + 1]] == clave):
+                return identificador, posicion
+            posicion = (posicion + 1) & mascara
+    
+    def _identificador(self, palabra) -> int:
+        """Identificador de una palabra, o -1 si no se ha visto nunca"""
+        if not isinstance(palabra, str):
+            return -1
+        clave = palabra.encode('utf-8', 'surrogatepass')
+        return self._buscar(clave, zlib.crc32(clave))[0]
+    
+    def _anadir(self, palabra: str, peso: int) -> None:
+        """Suma 'peso' apariciones de una palabra, asignándole un identificador si es nueva"""
+        if peso < 0:
+            raise ValueError("VocabularioCompacto solo admite frecuencias positivas")
+        if peso == 0:
+            return
+        
+        clave = palabra.encode('utf-8', 'surrogatepass')
+        huella = zlib.crc32(clave)
+        identificador, posicion = self._buscar(clave, huella)
+        if identificador >= 0:
+            if not self._frecuencias[identificador]:
+                self._presentes += 1
+            self._frecuencias[identificador] += peso
+            return
+        
+        self._tabla[posicion] = len(self._frecuencias)
+        self._arena += clave
+        self._inicios.append(len(self._arena))
+        self._frecuencias.append(peso)
+        self._huellas.append(huella)
+        self._presentes += 1
+        if len(self._frecuencias) > len(self._tabla) * self.CARGA_MAXIMA:
+            self._ampliar()
+    
+    def _ampliar(self) -> None:
+        """Duplica la tabla hash y recoloca los identificadores con las huellas guardadas"""
+        tabla = array.array('i', [-1]) * (len(self._tabla) * 2)
+        mascara = len(tabla) - 1
+        for identificador, huella in enumerate(self._huellas):
+            posicion = huella & mascara
+            while tabla[posicion] >= 0:
+                posicion = (posicion + 1) & mascara
+            tabla[posicion] = identificador
+        self._tabla = tabla
+
+
+class CacheResultados:
+    """
+    Caché persistente en disco (SQLite) de los resultados de conteo.
+    
+    Cada entrada se identifica por la ruta absoluta, el tamaño, la fecha de
+    modificación y la configuración del contador. Si verificar_contenido es True
+    también se guarda un hash del contenido: así se detectan cambios que no
+    alteran la fecha y se aprovechan archivos tocados pero sin cambios.
+    Cuando el tamaño total supera tamano_maximo bytes se eliminan las entradas
+    usadas hace más tiempo (LRU). El tamaño total se lleva en la tabla
+    ocupacion, que mantienen unos disparadores, así que guardar no recorre la
+    tabla de entradas. El último uso de los aciertos se anota en memoria y se
+    escribe cada USOS_POR_ESCRITURA aciertos, en cada guardar, en escribir_usos
+    y al cerrar: quien guarde la caché abierta debe llamar a uno de los dos
+    al terminar, o el LRU no verá esos aciertos. Junto al conteo se guarda el informe de codificación del archivo, para que
+    un acierto tenga las mismas estadísticas que el conteo original.
+    """
+    
+    # Aciertos que se acumulan antes de escribir su último uso: una pasada con la
+    # caché caliente no paga una transacción (y su fsync) por archivo
+    USOS_POR_ESCRITURA = 256
+    
+    def __init__(self, ruta_cache: str, tamano_maximo: int = 256 * 1024 * 1024,
+                 verificar_contenido: bool = False):
+        self.ruta_cache = ruta_cache
+        self.tamano_maximo = tamano_maximo
+        self.verificar_contenido = verificar_contenido
+        
+        self.conexion = sqlite3.connect(ruta_cache, timeout=30)
+        with self.conexion:
+            self.conexion.execute("""
+                CREATE TABLE IF NOT EXISTS entradas (
+                    ruta TEXT NOT NULL,
+                    configuracion TEXT NOT NULL,
+                    tamano INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    huella TEXT,
+                    numero_total_palabras INTEGER NOT NULL,
+                    datos BLOB NOT NULL,
+                    ultimo_uso REAL NOT NULL,
+                    PRIMARY KEY (ruta, configuracion)
+                )""")
+            self.conexion.execute(
+                "CREATE INDEX IF NOT EXISTS entradas_ultimo_uso ON entradas (ultimo_uso)")
+            self.conexion.execute("CREATE TABLE IF NOT EXISTS ocupacion (bytes INTEGER NOT NULL)")
+            self.conexion.execute("""
+                CREATE TRIGGER IF NOT EXISTS entradas_insertar AFTER INSERT ON entradas
+                BEGIN UPDATE ocupacion SET bytes = bytes + LENGTH(NEW.datos); END""")
+            self.conexion.execute("""
+                CREATE TRIGGER IF NOT EXISTS entradas_borrar AFTER DELETE ON entradas
+                BEGIN UPDATE ocupacion SET bytes = bytes - LENGTH(OLD.datos); END""")
+            # Una sola vez por base de datos (también las creadas antes de existir ocupacion)
+            self.conexion.execute(
+                "INSERT INTO ocupacion SELECT COALESCE(SUM(LENGTH(datos)), 0) FROM entradas "
+                "WHERE NOT EXISTS (SELECT 1 FROM ocupacion)")
+        # (ruta, configuracion) -> (ultimo_uso, mtime_ns) de los aciertos aún no escritos
+        self._usos_pendientes = {}
+    
+    def cerrar(self) -> None:
+        """Escribe los usos pendientes y cierra la conexión con la base de datos de la caché"""
+        self.escribir_usos()
+        self.conexion.close()
+    
+    def escribir_usos(self) -> None:
+        """Escribe ya el último uso de los aciertos pendientes, en su propia transacción"""
+        try:
+            with self.conexion:
+                self._escribir_usos()
+        except sqlite3.Error:
+            pass
+    
+    def _escribir_usos(self) -> None:
+        """Escribe el último uso de los aciertos acumulados, dentro de la transacción en curso"""
+        if self._usos_pendientes:
+            self.conexion.executemany(
+                "UPDATE entradas SET ultimo_uso = ?, mtime_ns = ? WHERE ruta = ? AND configuracion = ?",
+                [(ultimo_uso, mtime_ns, ruta, configuracion)
+                 for (ruta, configuracion), (ultimo_uso, mtime_ns) in self._usos_pendientes.items()])
+            self._usos_pendientes.clear()
+    
+    @staticmethod
+    def calcular_huella(ruta_archivo: str) -> str:
+        """Calcula un hash del contenido del archivo"""
+        resumen = hashlib.blake2b(digest_size=20)
+        with open(ruta_archivo, 'rb') as archivo:
+            for datos in leer_bloques_binarios(archivo, 1024 * 1024):
+                resumen.update(datos)
+        return resumen.hexdigest()
+    
+    @staticmethod
+    def _metadatos(ruta_archivo: str, info: Optional[dict]) -> Tuple[int, int]:
+        """Tamaño y mtime_ns del archivo, de una validación previa (describir_ruta) o de stat"""
+        if info is not None and info.get('tamano') is not None:
+            return info['tamano'], info['mtime_ns']
+        estado = os.stat(ruta_archivo)
+        return estado.st_size, estado.st_mtime_ns
+    
+    def buscar(self, ruta_archivo: str, configuracion: str = "",
+               info: Optional[dict] = None) -> Optional[Tuple[int, Counter, Optional[dict]]]:
+        """
+        Busca el resultado de un archivo sin abrirlo (salvo si hay que verificar el contenido)
+        info: registro de ValidadorArchivo.describir_ruta, para no volver a consultar los metadatos
+        Retorna: (numero_total_palabras, contador_palabras, informe_codificacion) o
+        None si no está o ha cambiado
+        """
+        try:
+            tamano_actual, mtime_actual = self._metadatos(ruta_archivo, info)
+            ruta = os.path.abspath(ruta_archivo)
+            fila = self.conexion.execute(
+                "SELECT tamano, mtime_ns, huella, numero_total_palabras, datos FROM entradas "
+                "WHERE ruta = ? AND configuracion = ?", (ruta, configuracion)).fetchone()
+            if fila is None:
+                return None
+            
+            tamano, mtime_ns, huella, numero_total_palabras, datos = fila
+            if tamano != tamano_actual:
+                return None
+            if self.verificar_contenido:
+                if huella is None or huella != self.calcular_huella(ruta_archivo):
+                    return None
+            elif mtime_ns != mtime_actual:
+                return None
+            carga = json.loads(zlib.decompress(datos))
+            # Las entradas antiguas (solo la lista de palabras) no tienen el informe de codificación
+            if not isinstance(carga, dict):
+                return None
+            
+            self._usos_pendientes[(ruta, configuracion)] = (time.time(), mtime_actual)
+            if len(self._usos_pendientes) >= self.USOS_POR_ESCRITURA:
+                with self.conexion:
+                    self._escribir_usos()
+            
+            return numero_total_palabras, Counter(dict(carga['palabras'])), carga['codificacion']
+        except (OSError, sqlite3.Error, ValueError):
+            return None
+    
+    def guardar(self, ruta_archivo: str, numero_total_palabras: int, contador_palabras: Counter,
+                configuracion: str = "", info: Optional[dict] = None,
+                informe_codificacion: Optional[dict] = None) -> None:
+        """
+        Guarda el resultado de un archivo y aplica el límite de tamaño de la caché
+        info: registro de la validación previa. Sus metadatos son los de antes de
+        contar, así que un archivo modificado durante el conteo no se da por vigente.
+        """
+        try:
+            tamano, mtime_ns = self._metadatos(ruta_archivo, info)
+            huella = self.calcular_huella(ruta_archivo) if self.verificar_contenido else None
+            carga = {'palabras': list(contador_palabras.items()), 'codificacion': informe_codificacion}
+            datos = zlib.compress(json.dumps(carga, ensure_ascii=False).encode('utf-8'))
+            
+            ruta = os.path.abspath(ruta_archivo)
+            with self.conexion:
+                self._escribir_usos()
+                # Borrar y no INSERT OR REPLACE: el reemplazo no dispara entradas_borrar
+                self.conexion.execute("DELETE FROM entradas WHERE ruta = ? AND configuracion = ?",
+                                      (ruta, configuracion))
+                self.conexion.execute(
+                    "INSERT INTO entradas VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (ruta, configuracion, tamano, mtime_ns,
+                     huella, numero_total_palabras, datos, time.time()))
+                self._aplicar_limite()
+        except (OSError, sqlite3.Error):
+            pass
+    
+    def _aplicar_limite(self) -> None:
+        """Elimina las entradas usadas hace más tiempo hasta respetar tamano_maximo"""
+        ocupado = self.conexion.execute("SELECT bytes FROM ocupacion").fetchone()[0]
+        if ocupado <= self.tamano_maximo:
+            return
+        
+        # El cursor recorre el índice de ultimo_uso solo hasta liberar lo necesario
+        filas = self.conexion.execute("SELECT rowid, LENGTH(datos) FROM entradas ORDER BY ultimo_uso")
+        a_borrar = []
+        for rowid, longitud in filas:
+            if ocupado <= self.tamano_maximo:
+                break
+            a_borrar.append((rowid,))
+            ocupado -= longitud
+        filas.close()
+        self.conexion.executemany("DELETE FROM entradas WHERE rowid = ?", a_borrar)
+
+
+class AlmacenIncremental:
+    """
+    Guarda, para cada archivo de solo anexado (logs), el desplazamiento leído,
+    la palabra final que puede seguir creciendo y el conteo acumulado, de
+    modo que la siguiente pasada solo lea los bytes añadidos.
+    
+    Si cambian el dispositivo o el inodo, si el archivo es más corto que lo ya
+    leído o si cambia su cabecera (rotación por copia y truncado), el estado se
+    descarta y se vuelve a contar desde el principio.
+    """
+    
+    # Bytes del principio del archivo que se usan para detectar que se ha reescrito
+    TAMANO_CABECERA = 4096
+    
+    def __init__(self, directorio_estado: str):
+        self.directorio_estado = directorio_estado
+        os.makedirs(directorio_estado, exist_ok=True)
+    
+    def _ruta_estado(self, ruta_archivo: str) -> str:
+        """Devuelve la ruta del archivo de estado asociado a un archivo"""
+        clave = hashlib.sha1(os.path.abspath(ruta_archivo).encode('utf-8')).hexdigest()
+        return os.path.join(self.directorio_estado, f"{clave}.json")
+    
+    @classmethod
+    def calcular_cabecera(cls, archivo, desplazamiento: int) -> str:
+        """Hash de los primeros bytes ya leídos del archivo abierto"""
+        archivo.seek(0)
+        return hashlib.blake2b(archivo.read(min(desplazamiento, cls.TAMANO_CABECERA)),
+                               digest_size=16).hexdigest()
+    
+    def cargar(self, ruta_archivo: str) -> Optional[dict]:
+        """Carga el estado guardado de un archivo, o None si no existe o está dañado"""
+        try:
+            with open(self._ruta_estado(ruta_archivo), 'r', encoding='utf-8') as archivo:
+                estado = json.load(archivo)
+            estado['pendiente'] = base64.b64decode(estado['pendiente'])
+            estado['contador_palabras'] = Counter(dict(estado['contador_palabras']))
+            return estado
+        except (OSError, ValueError, KeyError):
+            return None
+    
+    def guardar(self, ruta_archivo: str, estado: dict) -> None:
+        """Guarda el estado de un archivo de forma atómica"""
+        datos = dict(estado)
+        datos['ruta'] = os.path.abspath(ruta_archivo)
+        datos['pendiente'] = base64.b64encode(estado['pendiente']).decode('ascii')
+        datos['contador_palabras'] = list(estado['contador_palabras'].items())
+        
+        ruta_estado = self._ruta_estado(ruta_archivo)
+        ruta_temporal = f"{ruta_estado}.{os.getpid()}.tmp"
+        with open(ruta_temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo, ensure_ascii=False)
+        os.replace(ruta_temporal, ruta_estado)
+    
+    @staticmethod
+    def es_continuacion(estado: dict, info: os.stat_result, configuracion: str) -> bool:
+        """Indica si el archivo actual es el mismo que se leyó antes, solo que más largo"""
+        return (estado.get('configuracion') == configuracion and
+                estado.get('dispositivo') == info.st_dev and
+                estado.get('inodo') == info.st_ino and
+                estado.get('desplazamiento', 0) <= info.st_size)
+
+
+class EscritorTablaFrecuencias:
+    """
+    Escribe una tabla de frecuencias en el formato binario compacto:
+    
+    - cabecera fija: firma b'CPTF', versión (1 byte), número total de palabras
+      y número de entradas (dos enteros de 8 bytes, little endian)
+    - entradas ordenadas por los bytes UTF-8 de la palabra (el mismo orden que
+      el de los str de Python), cada una como varint de bytes compartidos con la
+      palabra anterior, varint de longitud del resto, el resto y varint de frecuencia
+    
+    Las palabras deben llegar en orden estrictamente creciente. El archivo se
+    escribe en uno temporal y se renombra al cerrar, así nunca queda a medias.
+    """
+    
+    def __init__(self, ruta: str, numero_total_palabras: int = 0):
+        self.ruta = ruta
+        self.numero_total_palabras = numero_total_palabras
+        self.num_entradas = 0
+        self._anterior = None
+        self._ruta_temporal = f"{ruta}.{os.getpid()}.tmp"
+        self._archivo = open(self._ruta_temporal, 'wb')
+        self._archivo.write(bytes(TAMANO_CABECERA_TABLA))
+    
+    def __enter__(self) -> 'EscritorTablaFrecuencias':
+        return self
+    
+    def __exit__(self, tipo, valor, traza) -> None:
+        if tipo is None:
+            self.cerrar()
+        else:
+            self._archivo.close()
+            os.remove(self._ruta_temporal)
+    
+    def anadir(self, palabra: bytes, frecuencia: int) -> None:
+        """Añade una entrada; palabra son los bytes UTF-8 de la palabra"""
+        anterior = self._anterior
+        comun = 0
+        if anterior is not None:
+            if palabra <= anterior:
+                raise ValueError("Las palabras de una tabla de frecuencias deben estar ordenadas y sin repetir")
+            limite = min(len(anterior), len(palabra))
+            while comun < limite and anterior[comun] == palabra[comun]:
+                comun += 1
+        resto = palabra[comun:]
+        self._archivo.write(_codificar_varint(comun) + _codificar_varint(len(resto)) + resto +
+                            _codificar_varint(frecuencia))
+        self._anterior = palabra
+        self.num_entradas += 1
+    
+    def cerrar(self) -> None:
+        """Completa la cabecera y deja el archivo en su ruta definitiva"""
+        self._archivo.seek(0)
+        self._archivo.write(FIRMA_TABLA + struct.pack('<BQQ', VERSION_TABLA, self.numero_total_palabras,
+                                                      self.num_entradas))
+        self._archivo.close()
+        os.replace(self._ruta_temporal, self.ruta)
+
+
+class LectorTablaFrecuencias:
+    """
+    Lee una tabla de frecuencias binaria proyectándola en memoria (mmap): al
+    recorrerla solo se decodifica la entrada actual, sin cargar un diccionario.
+    Se itera como pares (palabra_en_bytes, frecuencia) en orden creciente.
+    """
+    
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        with open(ruta, 'rb') as archivo:
+            cabecera = archivo.read(TAMANO_CABECERA_TABLA)
+            if len(cabecera) != TAMANO_CABECERA_TABLA or not cabecera.startswith(FIRMA_TABLA):
+                raise ValueError(f"'{ruta}' no es una tabla de frecuencias")
+            version, self.numero_total_palabras, self.num_entradas = struct.unpack(
+                '<BQQ', cabecera[len(FIRMA_TABLA):])
+            if version != VERSION_TABLA:
+                raise ValueError(f"Versión de tabla de frecuencias no soportada: {version}")
+            self._mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    def __enter__(self) -> 'LectorTablaFrecuencias':
+        return self
+    
+    def __exit__(self, *excepcion) -> None:
+        self.cerrar()
+    
+    def cerrar(self) -> None:
+        """Libera la proyección del archivo"""
+        self._mapa.close()
+    
+    def __iter__(self) -> Iterator[Tuple[bytes, int]]:
+        datos = self._mapa
+        posicion = TAMANO_CABECERA_TABLA
+        anterior = b""
+        for _ in range(self.num_entradas):
+            comun, posicion = _leer_varint(datos, posicion)
+            longitud, posicion = _leer_varint(datos, posicion)
+            palabra = anterior[:comun] + datos[posicion:posicion + longitud]
+            frecuencia, posicion = _leer_varint(datos, posicion + longitud)
+            yield palabra, frecuencia
+            anterior = palabra
+    
+    def mas_frecuentes(self, n: Optional[int] = TOP_POR_DEFECTO) -> List[Tuple[str, int]]:
+        """Las n palabras más frecuentes (empates en orden alfabético) en una sola pasada"""
+        entradas = ((palabra.decode('utf-8'), frecuencia) for palabra, frecuencia in self)
+        if n is None:
+            return sorted(entradas, key=lambda elemento: (-elemento[1], elemento[0]))
+        return heapq.nsmallest(n, entradas, key=lambda elemento: (-elemento[1], elemento[0]))
+    
+    def cargar(self) -> Counter:
+        """Carga la tabla completa en un Counter de str"""
+        return Counter({palabra.decode('utf-8'): frecuencia for palabra, frecuencia in self})
+
+
+def _codificar_varint(valor: int) -> bytes:
+    """Codifica un entero no negativo en 7 bits por byte (LEB128)"""
+    resultado = bytearray()
+    while valor >= 0x80:
+        resultado.append((valor & 0x7f) | 0x80)
+        valor >>= 7
+    resultado.append(valor)
+    return bytes(resultado)
+
+
+def _leer_varint(datos, posicion: int) -> Tuple[int, int]:
+    """Decodifica un varint de datos a partir de posicion. Retorna (valor, nueva_posicion)"""
+    resultado = 0
+    desplazamiento = 0
+    while True:
+        byte = datos[posicion]
+        posicion += 1
+        resultado |= (byte & 0x7f) << desplazamiento
+        if byte < 0x80:
+            return resultado, posicion
+        desplazamiento += 7
+
+
+def guardar_tabla_frecuencias(ruta: str, contador: Mapping, numero_total_palabras: int) -> None:
+    """Guarda un conteo en el formato binario compacto"""
+    entradas = sorted((palabra.encode('utf-8'), frecuencia) for palabra, frecuencia in contador.items())
+    with EscritorTablaFrecuencias(ruta, numero_total_palabras) as escritor:
+        for palabra, frecuencia in entradas:
+            escritor.anadir(palabra, frecuencia)
+
+
+def cargar_tabla_frecuencias(ruta: str) -> Tuple[int, Counter]:
+    """Carga una tabla binaria. Retorna (numero_total_palabras, contador)"""
+    with LectorTablaFrecuencias(ruta) as lector:
+        return lector.numero_total_palabras, lector.cargar()
+
+
+def combinar_tablas_frecuencias(rutas: List[str], ruta_salida: str) -> Tuple[int, int]:
+    """
+    Suma varias tablas binarias en una nueva con una mezcla de k vías: como
+    todas están ordenadas, se recorren a la vez sin cargar ninguna en memoria.
+    Retorna (numero_total_palabras, numero_de_entradas) de la tabla combinada.
+    """
+    lectores = [LectorTablaFrecuencias(ruta) for ruta in rutas]
+    try:
+        total = sum(lector.numero_total_palabras for lector in lectores)
+        with EscritorTablaFrecuencias(ruta_salida, total) as escritor:
+            actual, acumulado = None, 0
+            for palabra, frecuencia in heapq.merge(*lectores, key=lambda entrada: entrada[0]):
+                if palabra != actual:
+                    if actual is not None:
+                        escritor.anadir(actual, acumulado)
+                    actual, acumulado = palabra, 0
+                acumulado += frecuencia
+            if actual is not None:
+                escritor.anadir(actual, acumulado)
+        return total, escritor.num_entradas
+    finally:
+        for lector in lectores:
+            lector.cerrar()
+
+
+class Instrumentacion:
+    """
+    Registra, para cada archivo, el tiempo, los bytes leídos, las palabras
+    producidas y la memoria máxima de cada fase del conteo (lectura,
+    decodificacion, separacion, conteo...). Los tiempos son exclusivos: una
+    fase anidada dentro de otra no se suma a la de fuera.
+    
+    Con medir_memoria=True se usa tracemalloc para el pico de memoria de cada
+    fase (más preciso, pero ralentiza el conteo); siempre se informa del RSS
+    máximo del proceso, salvo donde no existe el módulo resource (Windows).
+    Cada resumen se envía a los sumideros configurados.
+    """
+    
+    def __init__(self, medir_memoria: bool = False, sumideros: Optional[List] = None):
+        self.medir_memoria = medir_memoria
+        self.sumideros = list(sumideros or [])
+        self.ultimo_resumen = None
+        self._pila = []
+        self._fases = {}
+    
+    def iniciar(self, ruta_archivo: str) -> None:
+        """Empieza a medir un archivo nuevo"""
+        self.ruta_archivo = ruta_archivo
+        self._fases = {}
+        self._pila = []
+        self._inicio = time.perf_counter()
+        if self.medir_memoria:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+    
+    def _datos_fase(self, nombre: str) -> dict:
+        """Devuelve (creándolos si hace falta) los acumuladores de una fase"""
+        if nombre not in self._fases:
+            self._fases[nombre] = {'segundos': 0.0, 'bytes': 0, 'palabras': 0}
+        return self._fases[nombre]
+    
+    @contextlib.contextmanager
+    def fase(self, nombre: str) -> Iterator[None]:
+        """Mide el tiempo exclusivo (y la memoria) del bloque de código como la fase 'nombre'"""
+        inicio = time.perf_counter()
+        self._pila.append(0.0)
+        try:
+            yield
+        finally:
+            tiempo_hijas = self._pila.pop()
+            transcurrido = time.perf_counter() - inicio
+            if self._pila:
+                self._pila[-1] += transcurrido
+            datos = self._datos_fase(nombre)
+            datos['segundos'] += transcurrido - tiempo_hijas
+            if self.medir_memoria:
+                pico = tracemalloc.get_traced_memory()[1]
+                datos['memoria_pico_bytes'] = max(datos.get('memoria_pico_bytes', 0), pico)
+                tracemalloc.reset_peak()
+    
+    def sumar(self, nombre: str, bytes_leidos: int = 0, palabras: int = 0) -> None:
+        """Suma bytes o palabras a los contadores de una fase"""
+        datos = self._datos_fase(nombre)
+        datos['bytes'] += bytes_leidos
+        datos['palabras'] += palabras
+    
+    def envolver(self, nombre: str, iterable: Iterable, contar_bytes: bool = False) -> Iterator:
+        """Mide como fase 'nombre' el tiempo de obtener cada elemento del iterable"""
+        iterador = iter(iterable)
+        while True:
+            with self.fase(nombre):
+                try:
+                    elemento = next(iterador)
+                except StopIteration:
+                    return
+            if contar_bytes:
+                self.sumar(nombre, bytes_leidos=len(elemento))
+            yield elemento
+    
+    def finalizar(self, exito: bool, numero_total_palabras: int) -> dict:
+        """Cierra la medición del archivo actual y la envía a los sumideros"""
+        self.ultimo_resumen = {
+            'ruta': self.ruta_archivo,
+            'exito': exito,
+            'segundos': time.perf_counter() - self._inicio,
+            'numero_total_palabras': numero_total_palabras,
+        }
+        try:
+            # Se importa aquí porque resource solo existe en Unix: en Windows el resumen va sin RSS
+            import resource
+        except ImportError:
+            pass
+        else:
+            factor_rss = 1 if sys.platform == 'darwin' else 1024
+            self.ultimo_resumen['rss_maximo_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * factor_rss
+        self.ultimo_resumen['fases'] = self._fases
+        for sumidero in self.sumideros:
+            sumidero.registrar(self.ultimo_resumen)
+        return self.ultimo_resumen
+
+
+class SumideroJSON:
+    """Añade cada resumen de Instrumentacion como una línea JSON a un archivo de registro"""
+    
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+    
+    def registrar(self, resumen: dict) -> None:
+        """Escribe el resumen en una sola llamada, para que las líneas no se mezclen"""
+        linea = json.dumps(resumen, ensure_ascii=False) + "\n"
+        with open(self.ruta, 'a', encoding='utf-8') as archivo:
+            archivo.write(linea)
+
+
+class SumideroPrometheus:
+    """
+    Acumula los resúmenes de Instrumentacion y reescribe un archivo de texto en
+    el formato de exposición de Prometheus (para el textfile collector de node_exporter)
+    """
+    
+    def __init__(self, ruta: str, prefijo: str = 'contador_palabras'):
+        self.ruta = ruta
+        self.prefijo = prefijo
+        self.archivos = Counter()
+        self.palabras = 0
+        self.segundos_totales = 0.0
+        self.segundos_fase = Counter()
+        self.bytes_fase = Counter()
+        self.rss_maximo = 0
+    
+    def registrar(self, resumen: dict) -> None:
+        """Suma el resumen a los totales y reescribe el archivo de forma atómica"""
+        self.archivos['exito' if resumen['exito'] else 'error'] += 1
+        self.palabras += resumen['numero_total_palabras']
+        self.segundos_totales += resumen['segundos']
+        self.rss_maximo = max(self.rss_maximo, resumen.get('rss_maximo_bytes', 0))
+        for fase, datos in resumen['fases'].items():
+            self.segundos_fase[fase] += datos['segundos']
+            self.bytes_fase[fase] += datos['bytes']
+        
+        ruta_temporal = f"{self.ruta}.{os.getpid()}.tmp"
+        with open(ruta_temporal, 'w', encoding='utf-8') as archivo:
+            archivo.write(self.exposicion())
+        os.replace(ruta_temporal, self.ruta)
+    
+    def exposicion(self) -> str:
+        """Genera el texto con las métricas acumuladas"""
+        p = self.prefijo
+        lineas = [
+            f"# HELP {p}_archivos_total Archivos procesados por resultado",
+            f"# TYPE {p}_archivos_total counter",
+        ]
+        lineas += [f'{p}_archivos_total{{resultado="{resultado}"}} {cantidad}'
+                   for resultado, cantidad in sorted(self.archivos.items())]
+        lineas += [
+            f"# HELP {p}_palabras_total Palabras contadas",
+            f"# TYPE {p}_palabras_total counter",
+            f"{p}_palabras_total {self.palabras}",
+            f"# HELP {p}_segundos_total Tiempo total de procesamiento",
+            f"# TYPE {p}_segundos_total counter",
+            f"{p}_segundos_total {self.segundos_totales:.6f}",
+            f"# HELP {p}_fase_segundos_total Tiempo exclusivo por fase",
+            f"# TYPE {p}_fase_segundos_total counter",
+        ]
+        lineas += [f'{p}_fase_segundos_total{{fase="{fase}"}} {segundos:.6f}'
+                   for fase, segundos in sorted(self.segundos_fase.items())]
+        lineas += [
+            f"# HELP {p}_fase_bytes_total Bytes leídos por fase",
+            f"# TYPE {p}_fase_bytes_total counter",
+        ]
+        lineas += [f'{p}_fase_bytes_total{{fase="{fase}"}} {cantidad}'
+                   for fase, cantidad in sorted(self.bytes_fase.items())]
+        lineas += [
+            f"# HELP {p}_rss_maximo_bytes Memoria residente máxima observada",
+            f"# TYPE {p}_rss_maximo_bytes gauge",
+            f"{p}_rss_maximo_bytes {self.rss_maximo}",
+        ]
+        return "\n".join(lineas) + "\n"
+
+
+class ContadorPalabras:
+    """
+    Clase responsable de contar palabras en archivos
+    
+    Motores disponibles:
+    - 'completo': lee el archivo entero y conserva el texto y la lista de palabras
+    - 'streaming': lee bloques de tamano_bloque bytes y actualiza el conteo
+      de forma incremental, sin guardar el texto ni la lista de palabras
+    - 'paralelo': divide el archivo en rangos de unos tamano_rango bytes y los
+      cuenta en num_procesos procesos; el resultado es idéntico al del modo serie
+    - 'mmap': proyecta el archivo en memoria y cuenta sobre bytes en ventanas de
+      tamano_bloque bytes, decodificando solo el vocabulario distinto al final.
+      Solo compensa si el vocabulario es pequeño frente al texto: con millones
+      de palabras distintas, decodificarlas una a una cuesta más de lo que se
+      ahorra y 'streaming' o 'completo' son más rápidos
+    - 'numpy': como 'mmap', pero cada ventana se separa y se cuenta con
+      operaciones vectoriales de NumPy (ver ConteoVectorizado). Si casi todas las
+      palabras de una ventana son distintas pasa a contar como 'mmap'. Sin NumPy
+      instalado cuenta exactamente como 'mmap'
+    
+    Con una CacheResultados, los archivos sin cambios se responden desde la caché
+    sin abrirlos; en ese caso contenido y palabras quedan vacíos.
+    Con un AlmacenIncremental, los archivos que solo han crecido se cuentan
+    leyendo únicamente los bytes nuevos, sea cual sea el motor.
+    Con capacidad_aproximada (solo con el motor 'streaming') la tabla de
+    frecuencias es un ContadorAproximado de memoria fija; el total sigue siendo exacto.
+    Con vocabulario_compacto la tabla de frecuencias es un VocabularioCompacto,
+    exacto y con una fracción de la memoria de un Counter. Los motores
+    'streaming' y 'paralelo' cuentan directamente en él; el resto lo crean al terminar.
+    
+    La entrada estándar ('-'), las tuberías y cualquier objeto tipo archivo
+    (procesar_flujo) se leen siempre en streaming, con memoria constante.
+    Los archivos comprimidos (gzip, bz2, xz y zstd si está instalado
+    'zstandard') se detectan por sus bytes iniciales y se descomprimen al vuelo.
+    
+    Con una Instrumentacion se mide cada fase del procesamiento y el resumen
+    se incluye en obtener_estadisticas bajo la clave 'instrumentacion'.
+    
+    Con un Tokenizador las palabras se normalizan antes de contarlas. El motor
+    'completo' y el conteo aproximado normalizan el texto por bloques; el resto
+    de motores cuentan las palabras tal cual y normalizan al final solo el
+    vocabulario distinto. Las palabras que quedan vacías (solo puntuación) no cuentan.
+    
+    Las palabras_vacias (ver cargar_palabras_vacias) se comparan ya normalizadas
+    y nunca entran en la tabla de frecuencias; con contar_vacias_en_total=False
+    tampoco suman en numero_total_palabras.
+    
+    Con tamano_ngrama (2 para bigramas, 3 para trigramas...) se cuentan
+    también las secuencias de palabras consecutivas en contador_ngramas, en la
+    misma pasada y con una ventana que continúa entre bloques. Los motores
+    'paralelo', 'mmap' y 'numpy' pasan a leer en streaming. Se descartan los n-gramas que
+    empiezan o terminan en una palabra vacía ('de la'), no los que la tienen
+    dentro ('casa de campo'). Con maximo_ngramas, al superar ese número de
+    n-gramas distintos se conservan solo los más frecuentes de la mitad; los
+    resultados pasan entonces a ser aproximados (ngramas_podados).
+    
+    Los archivos se decodifican con codificacion ('utf-8' por defecto) o, con
+    codificacion='auto', con la que detecta detectar_codificacion en sus
+    primeros bytes. errores_decodificacion elige qué hacer con los bytes no
+    válidos (ver POLITICAS_DECODIFICACION) e informe_codificacion recoge la
+    codificación usada, su origen y cuántos bytes no válidos se encontraron.
+    Los archivos con bytes nulos en cualquier punto se rechazan como binarios
+    (ErrorArchivoBinario) con cualquier codificación y política de errores,
+    también con el UTF-8 estricto por defecto, aunque el byte nulo sea UTF-8
+    válido: no son texto. La excepción son UTF-16 y UTF-32, con las que los
+    motores 'paralelo', 'mmap' y 'numpy' y el modo incremental pasan a leer
+    en streaming.
+    """
+    
+    def __init__(self, motor: str = 'completo', tamano_bloque: int = TAMANO_BLOQUE_POR_DEFECTO,
+                 num_procesos: Optional[int] = None, tamano_rango: int = TAMANO_RANGO_POR_DEFECTO,
+                 cache: Optional[CacheResultados] = None,
+                 incremental: Optional[AlmacenIncremental] = None,
+                 capacidad_aproximada: Optional[int] = None,
+                 instrumentacion: Optional[Instrumentacion] = None,
+                 tokenizador: Optional[Tokenizador] = None,
+                 palabras_vacias: Optional[frozenset] = None,
+                 contar_vacias_en_total: bool = True,
+                 tamano_ngrama: Optional[int] = None,
+                 maximo_ngramas: Optional[int] = None,
+                 codificacion: str = 'utf-8',
+                 errores_decodificacion: str = 'estricto',
+                 vocabulario_compacto: bool = False):
+        if motor not in MOTORES:
+            raise ValueError(f"Motor desconocido: '{motor}'. Opciones: {', '.join(MOTORES)}")
+        if tamano_bloque <= 0:
+            raise ValueError("El tamaño de bloque debe ser mayor que cero")
+        if tamano_rango <= 0:
+            raise ValueError("El tamaño de rango debe ser mayor que cero")
+        if num_procesos is not None and num_procesos <= 0:
+            raise ValueError("El número de procesos debe ser mayor que cero")
+        if capacidad_aproximada is not None:
+            if motor != 'streaming':
+                raise ValueError("El conteo aproximado requiere el motor 'streaming'")
+            if cache is not None or incremental is not None:
+                raise ValueError("El conteo aproximado no admite caché ni modo incremental")
+            if vocabulario_compacto:
+                raise ValueError("El conteo aproximado ya tiene memoria fija: no admite vocabulario compacto")
+        if tamano_ngrama is not None:
+            if tamano_ngrama < 2:
+                raise ValueError("El tamaño de n-grama debe ser al menos 2")
+            if cache is not None or incremental is not None:
+                raise ValueError("El conteo de n-gramas no admite caché ni modo incremental")
+        if maximo_ngramas is not None and maximo_ngramas < 2:
+            raise ValueError("El máximo de n-gramas debe ser al menos 2")
+        if codificacion != 'auto':
+            try:
+                codecs.lookup(codificacion)
+            except LookupError:
+                raise ValueError(f"Codificación desconocida: '{codificacion}'") from None
+        if errores_decodificacion not in POLITICAS_DECODIFICACION:
+            raise ValueError(f"Política de errores desconocida: '{errores_decodificacion}'. "
+                             f"Opciones: {', '.join(POLITICAS_DECODIFICACION)}")
+        
+        self.motor = motor
+        self.tamano_bloque = tamano_bloque
+        self.num_procesos = num_procesos or os.cpu_count() or 1
+        self.tamano_rango = tamano_rango
+        self.cache = cache
+        self.incremental = incremental
+        self.capacidad_aproximada = capacidad_aproximada
+        self.vocabulario_compacto = vocabulario_compacto
+        self.instrumentacion = instrumentacion
+        self.tokenizador = tokenizador
+        self.palabras_vacias = frozenset(palabras_vacias or ())
+        self.contar_vacias_en_total = contar_vacias_en_total
+        self.tamano_ngrama = tamano_ngrama
+        self.maximo_ngramas = maximo_ngramas
+        self.codificacion = codificacion
+        self.errores_decodificacion = errores_decodificacion
+        self._gestor_errores = POLITICAS_DECODIFICACION[errores_decodificacion]
+        self._reiniciar()
+    
+    def _reiniciar(self) -> None:
+        """Deja el contador en su estado inicial"""
+        self.contenido = ""
+        self.palabras = []
+        self.numero_total_palabras = 0
+        if self.capacidad_aproximada is not None:
+            self.contador_palabras = ContadorAproximado(self.capacidad_aproximada)
+        elif self.vocabulario_compacto:
+            self.contador_palabras = VocabularioCompacto()
+        else:
+            self.contador_palabras = Counter()
+        self.contador_ngramas = Counter()
+        self.ngramas_podados = False
+        # Últimas palabras del bloque anterior, para los n-gramas que cruzan bloques
+        self._ventana_ngramas = []
+        self.informe_codificacion = None
+        self._codificacion = None
+        self._no_validos_inicio = 0
+    
+    def procesar_archivo(self, ruta_archivo: str, info: Optional[dict] = None) -> Tuple[bool, str]:
+        """
+        Procesa un archivo y cuenta las palabras
+        info: registro de ValidadorArchivo.describir_ruta o validar_rutas, cuyos
+        metadatos se reutilizan en lugar de volver a consultarlos
+        Retorna: (exito, mensaje_error)
+        """
+        if self.instrumentacion is None:
+            return self._procesar_archivo(ruta_archivo, info)
+        
+        self.instrumentacion.iniciar(ruta_archivo)
+        exito, mensaje_error = self._procesar_archivo(ruta_archivo, info)
+        self.instrumentacion.finalizar(exito, self.numero_total_palabras)
+        return exito, mensaje_error
+    
+    def _procesar_archivo(self, ruta_archivo: str, info: Optional[dict] = None) -> Tuple[bool, str]:
+        """Elige la forma de leer el archivo según su tipo y el motor configurado"""
+        try:
+            self._reiniciar()
+            
+            if ruta_archivo == ENTRADA_ESTANDAR:
+                self._consumir_flujo(sys.stdin.buffer)
+                self._finalizar_vocabulario()
+                return True, ""
+            
+            if info['tipo'] == 'flujo' if info is not None else es_flujo(ruta_archivo):
+                # Las tuberías solo se pueden leer una vez y en orden: ni caché ni rangos
+                with open(ruta_archivo, 'rb') as flujo:
+                    self._consumir_flujo(flujo)
+                self._finalizar_vocabulario()
+                return True, ""
+            
+            if self.cache is not None:
+                with self._fase('cache'):
+                    resultado = self.cache.buscar(ruta_archivo, self._firma_configuracion(), info)
+                if resultado is not None:
+                    self.numero_total_palabras, self.contador_palabras, self.informe_codificacion = resultado
+                    self._compactar()
+                    return True, ""
+            
+            formato_compresion = detectar_compresion(ruta_archivo)
+            corta_en_bytes = self.incremental is not None or self.motor in ('paralelo', 'mmap', 'numpy')
+            if formato_compresion is not None:
+                self._procesar_comprimido(ruta_archivo, formato_compresion)
+            elif corta_en_bytes and not self._admite_cortes_ascii(ruta_archivo):
+                self._procesar_streaming(ruta_archivo)
+            elif self.incremental is not None:
+                self._procesar_incremental(ruta_archivo)
+            elif self.motor == 'streaming' or (self.tamano_ngrama and self.motor in ('paralelo', 'mmap', 'numpy')):
+                self._procesar_streaming(ruta_archivo)
+            elif self.motor == 'paralelo':
+                self._procesar_paralelo(ruta_archivo)
+            elif self.motor == 'mmap' or (self.motor == 'numpy' and numpy is None):
+                self._procesar_mmap(ruta_archivo)
+            elif self.motor == 'numpy':
+                self._procesar_numpy(ruta_archivo)
+            else:
+                self._procesar_completo(ruta_archivo)
+            
+            self._finalizar_vocabulario()
+            
+            if self.cache is not None:
+                with self._fase('cache'):
+                    self.cache.guardar(ruta_archivo, self.numero_total_palabras, self.contador_palabras,
+                                       self._firma_configuracion(), info, self.informe_codificacion)
+            
+            return True, ""
+            
+        except Exception as e:
+            return False, self._mensaje_error(e)
+    
+    def procesar_flujo(self, flujo: Union[BinaryIO, TextIO]) -> Tuple[bool, str]:
+        """
+        Cuenta las palabras de un objeto tipo archivo (binario o de texto) ya abierto,
+        como la entrada estándar o la salida de otro programa, leyéndolo por bloques
+        Retorna: (exito, mensaje_error)
+        """
+        if self.instrumentacion is not None:
+            self.instrumentacion.iniciar(getattr(flujo, 'name', '<flujo>'))
+        
+        try:
+            self._reiniciar()
+            self._consumir_flujo(flujo)
+            self._finalizar_vocabulario()
+            exito, mensaje_error = True, ""
+        except Exception as e:
+            exito, mensaje_error = False, self._mensaje_error(e)
+        
+        if self.instrumentacion is not None:
+            self.instrumentacion.finalizar(exito, self.numero_total_palabras)
+        return exito, mensaje_error
+    
+    def _fase(self, nombre: str):
+        """Contexto que mide una fase si hay instrumentación y no hace nada si no la hay"""
+        if self.instrumentacion is None:
+            return contextlib.nullcontext()
+        return self.instrumentacion.fase(nombre)
+    
+    def _medir(self, nombre: str, iterable: Iterable, contar_bytes: bool = False) -> Iterable:
+        """Mide el tiempo de producir cada elemento del iterable como la fase 'nombre'"""
+        if self.instrumentacion is None:
+            return iterable
+        return self.instrumentacion.envolver(nombre, iterable, contar_bytes)
+    
+    @staticmethod
+    def _mensaje_error(excepcion: Exception) -> str:
+        """Traduce una excepción del procesamiento a un mensaje para el usuario"""
+        if isinstance(excepcion, UnicodeDecodeError):
+            return "❌ Error: No se puede leer el archivo. Puede que no sea un archivo de texto válido."
+        return f"❌ Error al procesar el archivo: {excepcion}"
+    
+    def _firma_configuracion(self) -> str:
+        """
+        Identifica las opciones que afectan al resultado del conteo, para no
+        reutilizar entradas de caché calculadas con otra configuración
+        """
+        firma = "split"
+        if self.tokenizador is not None:
+            firma += f"|{self.tokenizador.firma()}"
+        if self.palabras_vacias:
+            resumen = hashlib.sha1("\n".join(sorted(self.palabras_vacias)).encode('utf-8')).hexdigest()
+            firma += f"|vacias:{resumen[:16]}:{'total' if self.contar_vacias_en_total else 'fuera'}"
+        if self.codificacion != 'utf-8' or self.errores_decodificacion != 'estricto':
+            firma += f"|{self.codificacion}:{self.errores_decodificacion}"
+        return firma
+    
+    def _preparar_decodificacion(self, muestra: bytes) -> None:
+        """Fija la codificación del archivo actual a partir de sus primeros bytes"""
+        if self.codificacion == 'auto':
+            codificacion, origen = detectar_codificacion(muestra)
+        else:
+            codificacion, origen = self.codificacion, 'configurada'
+        # La muestra permite fallar antes de contar; el resto de bloques se comprueba al leerlo
+        if es_compatible_ascii(codificacion):
+            rechazar_bytes_nulos(muestra)
+        
+        self._codificacion = codificacion
+        self._no_validos_inicio = bytes_no_validos_hilo()
+        self.informe_codificacion = {'codificacion': codificacion, 'origen': origen,
+                                     'errores': self.errores_decodificacion, 'bytes_no_validos': 0}
+    
+    def _admite_cortes_ascii(self, ruta_archivo: str) -> bool:
+        """
+        Prepara la decodificación con el principio del archivo e indica si se
+        puede cortar en bytes de espacio ASCII (no en UTF-16 ni UTF-32)
+        """
+        with open(ruta_archivo, 'rb') as archivo:
+            self._preparar_decodificacion(archivo.read(TAMANO_MUESTRA_CODIFICACION))
+        return es_compatible_ascii(self._codificacion)
+    
+    def _decodificar(self, bloques: Iterable[bytes]) -> Iterator[str]:
+        """
+        Decodifica una secuencia de bloques de bytes. Los primeros bloques se
+        leen por adelantado para detectar la codificación y no se pierden.
+        """
+        bloques = iter(bloques)
+        muestra = []
+        tamano_muestra = 0
+        for datos in bloques:
+            muestra.append(datos)
+            tamano_muestra += len(datos)
+            if tamano_muestra >= TAMANO_MUESTRA_CODIFICACION:
+                break
+        self._preparar_decodificacion(b"".join(muestra)[:TAMANO_MUESTRA_CODIFICACION])
+        return decodificar_bloques(itertools.chain(muestra, bloques), self._codificacion, self._gestor_errores)
+    
+    def _normaliza_por_bloques(self) -> bool:
+        """Indica si el texto se normaliza antes de separarlo en lugar de al final"""
+        return self.tokenizador is not None and (
+            self.motor == 'completo' or self.capacidad_aproximada is not None or self.tamano_ngrama is not None)
+    
+    def _finalizar_vocabulario(self) -> None:
+        """Normaliza el vocabulario ya contado y le quita las palabras vacías"""
+        if self.informe_codificacion is not None:
+            self.informe_codificacion['bytes_no_validos'] += bytes_no_validos_hilo() - self._no_validos_inicio
+        
+        if self.tokenizador is not None and not self._normaliza_por_bloques():
+            with self._fase('normalizacion'):
+                self.contador_palabras = self.tokenizador.normalizar_conteo(self.contador_palabras)
+                self.numero_total_palabras = sum(self.contador_palabras.values())
+        
+        # La tabla aproximada ya las descarta al contar, para que no ocupen sus entradas
+        if self.palabras_vacias and self.capacidad_aproximada is None:
+            with self._fase('palabras_vacias'):
+                # Se recorre la lista de palabras vacías, que suele ser mucho menor que el vocabulario
+                excluidas = sum(self.contador_palabras.pop(palabra, 0) for palabra in self.palabras_vacias)
+                if not self.contar_vacias_en_total:
+                    self.numero_total_palabras -= excluidas
+        
+        self._compactar()
+    
+    def _compactar(self) -> None:
+        """Pasa a VocabularioCompacto la tabla que un motor haya dejado como Counter, si se ha pedido"""
+        if self.vocabulario_compacto and not isinstance(self.contador_palabras, VocabularioCompacto):
+            with self._fase('compactacion'):
+                self.contador_palabras = VocabularioCompacto(self.contador_palabras)
+    
+    def _procesar_completo(self, ruta_archivo: str) -> None:
+        """Lee el archivo completo en memoria y cuenta sus palabras"""
+        # Leer el contenido del archivo
+        with self._fase('lectura'), open(ruta_archivo, 'rb') as archivo:
+            datos = archivo.read()
+            if self.instrumentacion is not None:
+                self.instrumentacion.sumar('lectura', bytes_leidos=len(datos))
+        
+        # Decodificarlo con la codificación configurada o detectada
+        with self._fase('decodificacion'):
+            self._preparar_decodificacion(datos[:TAMANO_MUESTRA_CODIFICACION])
+            if es_compatible_ascii(self._codificacion):
+                rechazar_bytes_nulos(datos)
+            self.contenido = datos.decode(self._codificacion, self._gestor_errores)
+            del datos
+        
+        # Separar en palabras
+        with self._fase('separacion'):
+            texto = self.contenido
+            if self._normaliza_por_bloques():
+                texto = self.tokenizador.normalizar(texto)
+            self.palabras = texto.split()
+        
+        # Contar número total de palabras
+        self.numero_total_palabras = len(self.palabras)
+        
+        # Contar frecuencia de palabras
+        with self._fase('conteo'):
+            self.contador_palabras = Counter(self.palabras)
+            if self.tamano_ngrama is not None:
+                self._acumular_ngramas(self.palabras)
+    
+    def _procesar_streaming(self, ruta_archivo: str) -> None:
+        """Lee el archivo por bloques y acumula el conteo sin guardar el texto"""
+        with open(ruta_archivo, 'rb') as archivo:
+            self._consumir_flujo(archivo)
+    
+    def _consumir_flujo(self, flujo: Union[BinaryIO, TextIO]) -> None:
+        """Acumula el conteo de un flujo leído por bloques, sin guardar el texto"""
+        if isinstance(flujo, io.TextIOBase):
+            self._consumir_bloques(self._medir('lectura', iter(lambda: flujo.read(self.tamano_bloque), "")))
+            return
+        
+        # Los flujos con búfer permiten mirar la cabecera sin consumirla
+        formato = None
+        if hasattr(flujo, 'peek'):
+            formato = formato_por_cabecera(flujo.peek(TAMANO_CABECERA_COMPRESION)[:TAMANO_CABECERA_COMPRESION])
+        if formato is not None:
+            flujo = descomprimir_flujo(flujo, formato)
+        datos = self._medir('lectura', leer_bloques_binarios(flujo, self.tamano_bloque), contar_bytes=True)
+        self._consumir_bloques(self._medir('decodificacion', self._decodificar(datos)))
+    
+    def _consumir_bloques(self, bloques: Iterable[str]) -> None:
+        """Acumula el conteo de una secuencia de bloques de texto"""
+        segmentos = segmentar_bloques(bloques)
+        if self._normaliza_por_bloques():
+            segmentos = map(self.tokenizador.normalizar, segmentos)
+        
+        if self.instrumentacion is None:
+            for segmento in segmentos:
+                self._acumular_palabras(segmento.split())
+            return
+        
+        for segmento in self._medir('separacion', segmentos):
+            with self._fase('separacion'):
+                palabras = segmento.split()
+            self.instrumentacion.sumar('separacion', palabras=len(palabras))
+            with self._fase('conteo'):
+                self._acumular_palabras(palabras)
+    
+    def _procesar_comprimido(self, ruta_archivo: str, formato: str) -> None:
+        """
+        Descomprime el archivo al vuelo, sin pasar por disco ni guardarlo entero.
+        Los gzip en bloques (BGZF) se descomprimen con num_procesos hilos; el
+        resto se descomprime en un hilo aparte mientras se cuentan las palabras.
+        """
+        if formato == 'gzip' and self.num_procesos > 1 and es_bgzf(ruta_archivo):
+            datos = self._medir('descompresion', descomprimir_bgzf_paralelo(ruta_archivo, self.num_procesos),
+                                contar_bytes=True)
+            self._consumir_bloques(self._medir('decodificacion', self._decodificar(datos)))
+            return
+        
+        with abrir_descomprimido(ruta_archivo, formato) as flujo:
+            datos = self._medir('descompresion',
+                                leer_con_anticipacion(leer_bloques_binarios(flujo, self.tamano_bloque)),
+                                contar_bytes=True)
+            self._consumir_bloques(self._medir('decodificacion', self._decodificar(datos)))
+    
+    def _procesar_incremental(self, ruta_archivo: str) -> None:
+        """Cuenta solo los bytes añadidos desde la última pasada y guarda el nuevo estado"""
+        configuracion = self._firma_configuracion()
+        
+        with open(ruta_archivo, 'rb') as archivo:
+            info = os.fstat(archivo.fileno())
+            estado = self.incremental.cargar(ruta_archivo)
+            
+            if (estado is None or not self.incremental.es_continuacion(estado, info, configuracion) or
+                    estado.get('cabecera') != self.incremental.calcular_cabecera(archivo, estado['desplazamiento'])):
+                # Archivo nuevo, truncado o rotado: se cuenta desde el principio
+                estado = {'desplazamiento': 0, 'pendiente': b"",
+                          'numero_total_palabras': 0, 'contador_palabras': Counter()}
+            
+            self.numero_total_palabras = estado['numero_total_palabras']
+            self.contador_palabras = estado['contador_palabras']
+            
+            pendiente = estado['pendiente']
+            archivo.seek(estado['desplazamiento'])
+            for datos in self._medir('lectura', leer_bloques_binarios(archivo, self.tamano_bloque),
+                                     contar_bytes=True):
+                rechazar_bytes_nulos(datos)
+                completo, pendiente = cortar_en_ultimo_espacio(pendiente + datos)
+                with self._fase('decodificacion'):
+                    texto = completo.decode(self._codificacion, self._gestor_errores)
+                with self._fase('separacion'):
+                    palabras = texto.split()
+                with self._fase('conteo'):
+                    self._acumular_palabras(palabras)
+            
+            desplazamiento = archivo.tell()
+            cabecera = self.incremental.calcular_cabecera(archivo, desplazamiento)
+        
+        self.incremental.guardar(ruta_archivo, {
+            'configuracion': configuracion,
+            'dispositivo': info.st_dev,
+            'inodo': info.st_ino,
+            'desplazamiento': desplazamiento,
+            'cabecera': cabecera,
+            'pendiente': pendiente,
+            'numero_total_palabras': self.numero_total_palabras,
+            'contador_palabras': self.contador_palabras,
+        })
+        
+        # La palabra final cuenta en el resultado actual, pero no en el estado
+        # guardado, porque puede seguir creciendo en la próxima escritura
+        self._acumular_palabras(pendiente.decode(self._codificacion, self._gestor_errores).split())
+    
+    def _procesar_mmap(self, ruta_archivo: str) -> None:
+        """Cuenta las palabras como bytes sobre una proyección en memoria del archivo"""
+        with open(ruta_archivo, 'rb') as archivo:
+            tamano = os.fstat(archivo.fileno()).st_size
+            if tamano == 0:
+                # mmap no admite proyectar archivos vacíos
+                return
+            
+            contador_bytes = Counter()
+            with mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                ventanas = self._medir('lectura', (mapa[inicio:inicio + self.tamano_bloque]
+                                                   for inicio in range(0, tamano, self.tamano_bloque)),
+                                       contar_bytes=True)
+                for segmento in self._medir('separacion', segmentar_bloques(ventanas)):
+                    rechazar_bytes_nulos(segmento)
+                    with self._fase('separacion'):
+                        palabras = segmento.split()
+                    with self._fase('conteo'):
+                        contador_bytes.update(palabras)
+        
+        with self._fase('decodificacion'):
+            self.numero_total_palabras, self.contador_palabras = decodificar_vocabulario(
+                contador_bytes, self._codificacion, self._gestor_errores)
+    
+    def _procesar_numpy(self, ruta_archivo: str) -> None:
+        """Cuenta las palabras como bytes con NumPy sobre una proyección en memoria del archivo"""
+        with open(ruta_archivo, 'rb') as archivo:
+            tamano = os.fstat(archivo.fileno()).st_size
+            if tamano == 0:
+                return
+            
+            conteo = ConteoVectorizado()
+            with mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                ventanas = self._medir('lectura', (mapa[inicio:inicio + self.tamano_bloque]
+                                                   for inicio in range(0, tamano, self.tamano_bloque)),
+                                       contar_bytes=True)
+                for segmento in self._medir('separacion', segmentar_bloques(ventanas)):
+                    rechazar_bytes_nulos(segmento)
+                    with self._fase('conteo'):
+                        conteo.contar(segmento)
+            unidas, frecuencias, aparte = conteo.claves_unidas()
+        
+        with self._fase('decodificacion'):
+            self.numero_total_palabras, self.contador_palabras = decodificar_claves_unidas(
+                unidas, frecuencias, self._codificacion, self._gestor_errores)
+            if aparte:
+                numero_palabras, contador = decodificar_vocabulario(aparte, self._codificacion,
+                                                                   self._gestor_errores)
+                self.numero_total_palabras += numero_palabras
+                self.contador_palabras = sumar_conteos(self.contador_palabras, contador)
+    
+    def _procesar_paralelo(self, ruta_archivo: str) -> None:
+        """Cuenta los rangos del archivo en paralelo y combina los conteos parciales"""
+        with self._fase('rangos'):
+            rangos = calcular_rangos(ruta_archivo, self.tamano_rango)
+        
+        if len(rangos) <= 1 or self.num_procesos == 1:
+            parciales = (_contar_rango(ruta_archivo, inicio, fin, self.tamano_bloque,
+                                       self._codificacion, self._gestor_errores)
+                         for inicio, fin in rangos)
+            self._combinar_parciales(self._medir('trabajadores', parciales))
+            return
+        
+        with ProcessPoolExecutor(max_workers=min(self.num_procesos, len(rangos))) as ejecutor:
+            parciales = ejecutor.map(_contar_rango,
+                                     [ruta_archivo] * len(rangos),
+                                     [inicio for inicio, _ in rangos],
+                                     [fin for _, fin in rangos],
+                                     [self.tamano_bloque] * len(rangos),
+                                     [self._codificacion] * len(rangos),
+                                     [self._gestor_errores] * len(rangos))
+            self._combinar_parciales(self._medir('trabajadores', parciales))
+    
+    def _combinar_parciales(self, parciales: Iterable[Tuple[int, Counter, int]]) -> None:
+        """
+        Suma los conteos parciales en el orden de los rangos, de modo que el
+        orden del Counter coincide con el del conteo en serie
+        """
+        for numero_palabras, contador, no_validos in parciales:
+            with self._fase('combinacion'):
+                self.numero_total_palabras += numero_palabras
+                self.contador_palabras.update(contador)
+                self.informe_codificacion['bytes_no_validos'] += no_validos
+    
+    def _acumular_palabras(self, palabras: List[str]) -> None:
+        """Suma un lote de palabras al total y a la tabla de frecuencias"""
+        if self.tamano_ngrama is not None:
+            self._acumular_ngramas(palabras)
+        
+        if self.palabras_vacias and self.capacidad_aproximada is not None:
+            filtradas = [palabra for palabra in palabras if palabra not in self.palabras_vacias]
+            self.numero_total_palabras += len(palabras) if self.contar_vacias_en_total else len(filtradas)
+            self.contador_palabras.update(filtradas)
+            return
+        
+        self.numero_total_palabras += len(palabras)
+        self.contador_palabras.update(palabras)
+    
+    def _acumular_ngramas(self, palabras: List[str]) -> None:
+        """Cuenta los n-gramas de un lote de palabras, continuando la ventana del lote anterior"""
+        secuencia = self._ventana_ngramas + palabras
+        n = self.tamano_ngrama
+        ngramas = zip(*(secuencia[i:] for i in range(n)))
+        if self.palabras_vacias:
+            vacias = self.palabras_vacias
+            ngramas = (ngrama for ngrama in ngramas if ngrama[0] not in vacias and ngrama[-1] not in vacias)
+        self.contador_ngramas.update(map(" ".join, ngramas))
+        self._ventana_ngramas = secuencia[-(n - 1):]
+        
+        if self.maximo_ngramas is not None and len(self.contador_ngramas) > self.maximo_ngramas:
+            self._podar_ngramas()
+    
+    def _podar_ngramas(self) -> None:
+        """Conserva la mitad más frecuente de los n-gramas para acotar la memoria"""
+        conservados = heapq.nlargest(self.maximo_ngramas // 2, self.contador_ngramas.items(),
+                                     key=lambda elemento: elemento[1])
+        self.contador_ngramas = Counter(dict(conservados))
+        self.ngramas_podados = True
+    
+    def obtener_estadisticas(self, n: Optional[int] = TOP_POR_DEFECTO) -> dict:
+        """
+        Retorna un diccionario con las estadísticas del archivo
+        n: número de palabras más frecuentes a incluir (None para todo el vocabulario)
+        """
+        mas_frecuentes = palabras_mas_frecuentes(self.contador_palabras, n)
+        
+        estadisticas = {
+            'numero_total_palabras': self.numero_total_palabras,
+            'palabras_mas_frecuentes': mas_frecuentes,
+            'archivo_vacio': self.numero_total_palabras == 0
+        }
+        
+        if isinstance(self.contador_palabras, ContadorAproximado):
+            estadisticas['conteo_aproximado'] = True
+            estadisticas['errores_frecuencia'] = [self.contador_palabras.errores[palabra]
+                                                  for palabra, _ in mas_frecuentes]
+            estadisticas['error_maximo'] = self.contador_palabras.error_maximo()
+        
+        if self.tamano_ngrama is not None:
+            estadisticas['ngramas_mas_frecuentes'] = palabras_mas_frecuentes(self.contador_ngramas, n)
+            estadisticas['ngramas_podados'] = self.ngramas_podados
+        
+        if self.informe_codificacion is not None:
+            estadisticas['codificacion'] = dict(self.informe_codificacion)
+        
+        if self.instrumentacion is not None and self.instrumentacion.ultimo_resumen is not None:
+            estadisticas['instrumentacion'] = self.instrumentacion.ultimo_resumen
+        
+        return estadisticas
+    
+    def guardar_tabla(self, ruta: str) -> None:
+        """Guarda la tabla de frecuencias completa en el formato binario compacto"""
+        guardar_tabla_frecuencias(ruta, self.contador_palabras, self.numero_total_palabras)
+    
+    def mostrar_resultados(self, ruta_archivo: str, n: int = TOP_POR_DEFECTO) -> None:
+        """Muestra los resultados del conteo de palabras"""
+        estadisticas = self.obtener_estadisticas(n)
+        
+        print(f"\n✅ Archivo procesado exitosamente: {ruta_archivo}")
+        print(f"📊 El número total de palabras es: {estadisticas['numero_total_palabras']}")
+        informe = estadisticas.get('codificacion')
+        if informe is not None and (informe['origen'] != 'configurada' or informe['bytes_no_validos']):
+            detalle = f"detectada por {'BOM' if informe['origen'] == 'bom' else 'muestra'}"
+            if informe['bytes_no_validos']:
+                detalle += f"; {informe['bytes_no_validos']} bytes no válidos ({informe['errores']})"
+            print(f"🔤 Codificación: {informe['codificacion']} ({detalle})")
+        
+        if not estadisticas['archivo_vacio']:
+            print(f"\n🔝 Las {n} palabras más frecuentes son:")
+            for i, (palabra, frecuencia) in enumerate(estadisticas['palabras_mas_frecuentes'], 1):
+                print(f"  {i:2d}. '{palabra}' - {frecuencia} veces")
+            if estadisticas.get('conteo_aproximado'):
+                print(f"  ℹ️  Frecuencias aproximadas: cada una puede exceder la real "
+                      f"como mucho en {max(estadisticas['errores_frecuencia'])}")
+            if estadisticas.get('ngramas_mas_frecuentes'):
+                print(f"\n🔗 Los {len(estadisticas['ngramas_mas_frecuentes'])} "
+                      f"{self.tamano_ngrama}-gramas más frecuentes son:")
+                for i, (ngrama, frecuencia) in enumerate(estadisticas['ngramas_mas_frecuentes'], 1):
+                    print(f"  {i:2d}. '{ngrama}' - {frecuencia} veces")
+        else:
+            print("⚠️  El archivo está vacío o no contiene palabras.")
+
+
+# Conexiones a la caché abiertas por cada hilo trabajador, reutilizadas entre archivos
+_caches_trabajador = threading.local()
+
+
+def _obtener_cache_trabajador(ruta_cache: Optional[str], verificar_contenido: bool) -> Optional[CacheResultados]:
+    """Devuelve la caché del hilo actual, abriéndola la primera vez"""
+    if ruta_cache is None:
+        return None
+    caches = _caches_trabajador.__dict__.setdefault('caches', {})
+    clave = (ruta_cache, verificar_contenido)
+    if clave not in caches:
+        caches[clave] = CacheResultados(ruta_cache, verificar_contenido=verificar_contenido)
+    return caches[clave]
+
+
+def _escribir_usos_trabajador() -> None:
+    """
+    Escribe los aciertos pendientes de las cachés del hilo actual. Las cachés
+    de los trabajadores siguen abiertas entre tareas y nadie las cierra, así
+    que sin esto los aciertos de un trabajador con menos de
+    USOS_POR_ESCRITURA se perderían y el LRU sería en realidad FIFO.
+    """
+    for cache in _caches_trabajador.__dict__.get('caches', {}).values():
+        cache.escribir_usos()
+
+
+def _contar_archivo_lote(ruta_archivo: str, motor: str, tamano_bloque: int, n: int,
+                         ruta_cache: Optional[str] = None,
+                         verificar_contenido: bool = False,
+                         directorio_incremental: Optional[str] = None,
+                         instrumentar: bool = False,
+                         medir_memoria: bool = False,
+                         tokenizador: Optional[Tokenizador] = None,
+                         palabras_vacias: Optional[frozenset] = None,
+                         contar_vacias_en_total: bool = True,
+                         tamano_ngrama: Optional[int] = None,
+                         maximo_ngramas: Optional[int] = None,
+                         codificacion: str = 'utf-8',
+                         errores_decodificacion: str = 'estricto',
+                         info: Optional[dict] = None,
+                         vocabulario_compacto: bool = False,
+                         capacidad_aproximada: Optional[int] = None) -> Tuple[dict, Counter, Counter]:
+    """Cuenta un archivo dentro de un lote. Se ejecuta en un hilo o proceso trabajador."""
+    cache = _obtener_cache_trabajador(ruta_cache, verificar_contenido)
+    incremental = AlmacenIncremental(directorio_incremental) if directorio_incremental else None
+    # Las métricas se devuelven con el resultado: los sumideros viven en el proceso principal
+    instrumentacion = Instrumentacion(medir_memoria=medir_memoria) if instrumentar else None
+    contador = ContadorPalabras(motor=motor, tamano_bloque=tamano_bloque, cache=cache,
+                                incremental=incremental, instrumentacion=instrumentacion,
+                                tokenizador=tokenizador, palabras_vacias=palabras_vacias,
+                                contar_vacias_en_total=contar_vacias_en_total,
+                                tamano_ngrama=tamano_ngrama, maximo_ngramas=maximo_ngramas,
+                                codificacion=codificacion, errores_decodificacion=errores_decodificacion,
+                                vocabulario_compacto=vocabulario_compacto,
+                                capacidad_aproximada=capacidad_aproximada)
+    exito, mensaje_error = contador.procesar_archivo(ruta_archivo, info)
+    
+    resultado = {'ruta': ruta_archivo, 'exito': exito, 'mensaje_error': mensaje_error}
+    if exito:
+        resultado.update(contador.obtener_estadisticas(n))
+    elif instrumentacion is not None:
+        resultado['instrumentacion'] = instrumentacion.ultimo_resumen
+    return resultado, contador.contador_palabras, contador.contador_ngramas
+
+
+def _contar_tarea_lote(tarea: dict, contar_archivo: Callable) -> List[tuple]:
+    """
+    Cuenta una tarea de PlanificadorTareas en un hilo o proceso trabajador:
+    un grupo de archivos completos o un rango de bytes de un archivo grande
+    Retorna los parciales de contar_archivo de cada archivo del grupo, o el de _contar_rango
+    """
+    if 'inicio' in tarea:
+        return [_contar_rango(tarea['ruta'], tarea['inicio'], tarea['fin'], tarea['tamano_bloque'],
+                              tarea['codificacion'], tarea['errores'])]
+    try:
+        return [contar_archivo(registro['ruta'], info=registro) for registro in tarea['registros']]
+    finally:
+        # Una transacción por tarea (hasta maximo_archivos_tarea aciertos), no por archivo
+        _escribir_usos_trabajador()
+
+
+class PlanificadorTareas:
+    """
+    Reparte los archivos de un lote en tareas de tamaño parecido a partir del
+    tamaño que da su stat:
+    
+    - los archivos pequeños se agrupan hasta reunir el tamaño de una tarea,
+      para no pagar el envío a un trabajador por cada archivo
+    - los grandes que se pueden leer por rangos se dividen en rangos de bytes,
+      para que varios trabajadores cuenten el mismo archivo a la vez
+    
+    Las tareas se entregan de mayor a menor: si el archivo más grande empezara
+    el último, el lote no terminaría hasta que un solo trabajador lo acabase.
+    """
+    
+    # Por debajo de este tamaño no compensa repartir más el trabajo
+    TAMANO_MINIMO_TAREA = 1024 * 1024
+    
+    def __init__(self, tamano_tarea: int = TAMANO_RANGO_POR_DEFECTO, num_trabajadores: int = 1,
+                 maximo_archivos_tarea: int = 64):
+        if tamano_tarea <= 0:
+            raise ValueError("El tamaño de las tareas debe ser mayor que cero")
+        if num_trabajadores <= 0:
+            raise ValueError("El número de trabajadores debe ser mayor que cero")
+        self.tamano_tarea = tamano_tarea
+        self.num_trabajadores = num_trabajadores
+        self.maximo_archivos_tarea = maximo_archivos_tarea
+    
+    def tamano_objetivo(self, total_bytes: int) -> int:
+        """
+        Bytes de cada tarea: tamano_tarea, o menos en un lote pequeño, para que
+        haya unas cuatro tareas por trabajador con las que equilibrar la carga
+        """
+        por_trabajador = total_bytes // (self.num_trabajadores * 4)
+        return min(self.tamano_tarea, max(self.TAMANO_MINIMO_TAREA, por_trabajador))
+    
+    def planificar(self, archivos: List[dict],
+                   admite_rangos: Optional[Callable[[dict], bool]] = None) -> List[dict]:
+        """
+        archivos: un diccionario por archivo con 'posicion', 'ruta' y 'tamano'
+        admite_rangos: función opcional que indica si un archivo mayor que una
+        tarea se puede contar por rangos. Sin ella no se divide ningún archivo.
+        Retorna las tareas de mayor a menor tamaño: {'posiciones', 'bytes'} para
+        un grupo de archivos y {'posicion', 'parte', 'partes', 'inicio', 'fin',
+        'bytes'} para un rango de bytes
+        """
+        objetivo = self.tamano_objetivo(sum(archivo['tamano'] for archivo in archivos))
+        tareas = []
+        grupo, tamano_grupo = [], 0
+        
+        def cerrar_grupo():
+            nonlocal grupo, tamano_grupo
+            if grupo:
+                tareas.append({'posiciones': grupo, 'bytes': tamano_grupo})
+            grupo, tamano_grupo = [], 0
+        
+        for archivo in archivos:
+            tamano = archivo['tamano']
+            if tamano > objetivo and admite_rangos is not None and admite_rangos(archivo):
+                rangos = calcular_rangos(archivo['ruta'], objetivo)
+                tareas.extend({'posicion': archivo['posicion'], 'parte': parte, 'partes': len(rangos),
+                               'inicio': inicio, 'fin': fin, 'bytes': fin - inicio}
+                              for parte, (inicio, fin) in enumerate(rangos))
+                continue
+            if grupo and (tamano_grupo + tamano > objetivo or len(grupo) == self.maximo_archivos_tarea):
+                cerrar_grupo()
+            grupo.append(archivo['posicion'])
+            tamano_grupo += tamano
+        cerrar_grupo()
+        
+        # sort es estable: a igual tamaño se conserva el orden de entrada
+        tareas.sort(key=lambda tarea: tarea['bytes'], reverse=True)
+        return tareas
+
+
+class ProcesadorLotes:
+    """
+    Clase responsable de contar muchos archivos de forma concurrente y sin interacción.
+    
+    Con capacidad_aproximada cada archivo se cuenta en un ContadorAproximado y
+    el corpus combina sus frecuencias en otro de la misma capacidad. El
+    error_maximo del resumen acota el error de cualquier frecuencia del corpus:
+    suma el de la combinación y el de cada archivo.
+    """
+    
+    # Motores que se pueden usar dentro de un trabajador del lote
+    MOTORES_LOTE = ('completo', 'streaming', 'mmap', 'numpy')
+    
+    def __init__(self, num_trabajadores: Optional[int] = None, usar_hilos: bool = False,
+                 motor: str = 'streaming', tamano_bloque: int = TAMANO_BLOQUE_POR_DEFECTO,
+                 ruta_cache: Optional[str] = None, verificar_contenido: bool = False,
+                 directorio_incremental: Optional[str] = None, n: int = TOP_POR_DEFECTO,
+                 sumideros_metricas: Optional[List] = None, medir_memoria: bool = False,
+                 tokenizador: Optional[Tokenizador] = None,
+                 palabras_vacias: Optional[frozenset] = None, contar_vacias_en_total: bool = True,
+                 tamano_ngrama: Optional[int] = None, maximo_ngramas: Optional[int] = None,
+                 codificacion: str = 'utf-8', errores_decodificacion: str = 'estricto',
+                 tamano_tarea: int = TAMANO_RANGO_POR_DEFECTO, vocabulario_compacto: bool = False,
+                 capacidad_aproximada: Optional[int] = None):
+        if motor not in self.MOTORES_LOTE:
+            raise ValueError(f"Motor no válido para lotes: '{motor}'. Opciones: {', '.join(self.MOTORES_LOTE)}")
+        if num_trabajadores is not None and num_trabajadores <= 0:
+            raise ValueError("El número de trabajadores debe ser mayor que cero")
+        if tamano_ngrama is not None and (ruta_cache is not None or directorio_incremental is not None):
+            raise ValueError("El conteo de n-gramas no admite caché ni modo incremental")
+        # Comprobado aquí, un valor no válido no falla después en cada archivo del lote
+        if maximo_ngramas is not None and maximo_ngramas < 2:
+            raise ValueError("El máximo de n-gramas debe ser al menos 2")
+        if capacidad_aproximada is not None:
+            if capacidad_aproximada <= 0:
+                raise ValueError("La capacidad debe ser mayor que cero")
+            if motor != 'streaming':
+                raise ValueError("El conteo aproximado requiere el motor 'streaming'")
+            if ruta_cache is not None or directorio_incremental is not None:
+                raise ValueError("El conteo aproximado no admite caché ni modo incremental")
+            if vocabulario_compacto:
+                raise ValueError("El conteo aproximado ya tiene memoria fija: no admite vocabulario compacto")
+        
+        self.num_trabajadores = num_trabajadores or os.cpu_count() or 1
+        self.usar_hilos = usar_hilos
+        self.motor = motor
+        self.tamano_bloque = tamano_bloque
+        self.ruta_cache = ruta_cache
+        self.verificar_contenido = verificar_contenido
+        self.directorio_incremental = directorio_incremental
+        self.n = n
+        self.sumideros_metricas = list(sumideros_metricas or [])
+        self.medir_memoria = medir_memoria
+        self.tokenizador = tokenizador
+        self.palabras_vacias = palabras_vacias
+        self.contar_vacias_en_total = contar_vacias_en_total
+        self.tamano_ngrama = tamano_ngrama
+        self.maximo_ngramas = maximo_ngramas
+        self.codificacion = codificacion
+        self.errores_decodificacion = errores_decodificacion
+        self.vocabulario_compacto = vocabulario_compacto
+        self.capacidad_aproximada = capacidad_aproximada
+        self.planificador = PlanificadorTareas(tamano_tarea, self.num_trabajadores)
+    
     @staticmethod
-    def buscar_archivos_similares(nombre_buscado: str, ruta_padre: str) -> List[str]:
-        """Busca archivos con nombres similares al buscado"""
-        archivos_similares = []
+    def _recorrer_directorio(directorio: str) -> Iterator[Tuple[str, Union[os.DirEntry, OSError]]]:
+        """
+        Recorre un directorio de forma recursiva con un os.scandir por carpeta
+        y produce (ruta, entrada) por cada archivo. Como el patrón '**/*' de
+        glob, omite los nombres que empiezan por punto y no entra en los enlaces
+        simbólicos a carpetas, así que un enlace que apunta a un antecesor no
+        crea un ciclo. Una carpeta o entrada que no se puede leer produce
+        (ruta, error) y el recorrido continúa.
+        """
         try:
-            archivos_en_carpeta = os.listdir(ruta_padre)
-            nombre_buscado_lower = nombre_buscado.lower()
+            with os.scandir(directorio) as entradas:
+                entradas = [entrada for entrada in entradas if not entrada.name.startswith('.')]
+        except OSError as error:
+            yield directorio, error
+            return
+        for entrada in entradas:
+            try:
+                if entrada.is_dir(follow_symlinks=False):
+                    yield from ProcesadorLotes._recorrer_directorio(entrada.path)
+                elif entrada.is_file():
+                    yield entrada.path, entrada
+            except OSError as error:
+                yield entrada.path, error
+    
+    @staticmethod
+    def _expandir(entradas: Iterable[str]) -> Tuple[List[str], dict]:
+        """
+        Expande las entradas en rutas sin duplicados, consultando los metadatos
+        de cada una como mucho una vez
+        Retorna: (rutas, conocidas), donde conocidas guarda lo que ya se sabe de
+        cada ruta: su registro de validación, su entrada de os.scandir, su stat o
+        el error que produjo al leerla
+        """
+        entradas = list(entradas)
+        registros_entradas = dict(zip(entradas, ValidadorArchivo.validar_rutas(entradas)))
+        rutas = []
+        conocidas = {}
+        
+        for entrada in entradas:
+            registro = registros_entradas[entrada]
+            if registro['tipo'] == 'carpeta':
+                encontradas = dict(ProcesadorLotes._recorrer_directorio(entrada))
+            elif registro['tipo'] is None and glob.has_magic(entrada):
+                encontradas = {}
+                for ruta in glob.iglob(entrada, recursive=True):
+                    info = ValidadorArchivo.consultar_info(ruta)
+                    if isinstance(info, os.stat_result) and stat.S_ISREG(info.st_mode):
+                        encontradas[ruta] = info
+            else:
+                # Las rutas inexistentes se conservan para informar del error
+                encontradas = {entrada: registro}
             
-            for archivo in archivos_en_carpeta:
-                archivo_lower = archivo.lower()
-                # Buscar archivos que contengan parte del nombre buscado
-                if (nombre_buscado_lower in archivo_lower or 
-                    archivo_lower in nombre_buscado_lower or
-                    archivo_lower.startswith(nombre_buscado_lower.split('.')[0])):
-                    archivos_similares.append(archivo)
-        except:
-            pass
+            for ruta in sorted(encontradas):
+                if ruta not in conocidas:
+                    conocidas[ruta] = encontradas[ruta]
+                    rutas.append(ruta)
         
-        return archivos_similares
+        return rutas, conocidas
     
     @staticmethod
-    def validar_ruta_archivo(ruta_archivo: str) -> Tuple[bool, str]:
+    def expandir_entradas(entradas: Iterable[str]) -> List[str]:
         """
-        Valida si la ruta del archivo es válida
-        Retorna: (es_valida, mensaje_error)
+        Convierte directorios (recorridos de forma recursiva), patrones glob y
+        rutas sueltas en una lista de archivos sin duplicados
         """
-        if not ruta_archivo.strip():
-            return False, "❌ Error: Debe ingresar una ruta de archivo."
+        return ProcesadorLotes._expandir(entradas)[0]
+    
+    @staticmethod
+    def validar_entradas(entradas: Iterable[str]) -> List[dict]:
+        """
+        Expande las entradas como expandir_entradas y valida cada ruta con una
+        sola consulta de metadatos: las rutas sueltas con ValidadorArchivo.validar_rutas,
+        los archivos de un directorio con su entrada de os.scandir y los de un
+        patrón glob con el stat que los seleccionó
+        Retorna un registro de ValidadorArchivo.describir_ruta por ruta
+        """
+        rutas, conocidas = ProcesadorLotes._expandir(entradas)
+        registros = []
+        for ruta in rutas:
+            info = conocidas[ruta]
+            if isinstance(info, dict):
+                registros.append(info)
+                continue
+            if isinstance(info, os.DirEntry):
+                info = ValidadorArchivo.info_entrada(info)
+            registros.append(ValidadorArchivo.describir_ruta(ruta, False, info))
+        return registros
+    
+    def procesar(self, entradas: Iterable[str],
+                 al_terminar_archivo: Optional[Callable[[dict], None]] = None) -> dict:
+        """
+        Cuenta todos los archivos de las entradas
+        al_terminar_archivo: función opcional que recibe el resultado de cada
+        archivo en cuanto está disponible (para emitir resultados en streaming)
+        Retorna un diccionario con las estadísticas de cada archivo y del corpus completo
+        """
+        registros = self.validar_entradas(entradas)
+        resultados = []
+        if self.capacidad_aproximada is not None:
+            contador_corpus = ContadorAproximado(self.capacidad_aproximada)
+        elif self.vocabulario_compacto:
+            contador_corpus = VocabularioCompacto()
+        else:
+            contador_corpus = Counter()
+        ngramas_corpus = Counter()
+        
+        instrumentar = bool(self.sumideros_metricas)
+        contar_archivo = functools.partial(
+            _contar_archivo_lote, motor=self.motor, tamano_bloque=self.tamano_bloque, n=self.n,
+            ruta_cache=self.ruta_cache, verificar_contenido=self.verificar_contenido,
+            directorio_incremental=self.directorio_incremental, instrumentar=instrumentar,
+            medir_memoria=self.medir_memoria, tokenizador=self.tokenizador,
+            palabras_vacias=self.palabras_vacias, contar_vacias_en_total=self.contar_vacias_en_total,
+            tamano_ngrama=self.tamano_ngrama, maximo_ngramas=self.maximo_ngramas,
+            codificacion=self.codificacion, errores_decodificacion=self.errores_decodificacion,
+            vocabulario_compacto=self.vocabulario_compacto, capacidad_aproximada=self.capacidad_aproximada)
+        
+        # Resultado de cada registro, en el orden de entrada, a la espera de emitirse
+        parciales = [None] * len(registros)
+        
+        def recibir(posicion, parcial):
+            # Los conteos se suman al corpus en cuanto llegan, para no retener el Counter de
+            # cada archivo terminado hasta que acaben los anteriores: solo espera su resultado
+            resultado, contador, ngramas = parcial
+            contador_corpus.update(contador)
+            ngramas_corpus.update(ngramas)
+            parciales[posicion] = resultado
+        
+        archivos = []
+        for posicion, registro in enumerate(registros):
+            if registro['ruta'] == ENTRADA_ESTANDAR:
+                # La entrada estándar no llega a los procesos trabajadores: se cuenta aquí
+                recibir(posicion, contar_archivo(ENTRADA_ESTANDAR, ruta_cache=None, directorio_incremental=None))
+            elif not registro['valida']:
+                # Las rutas que no han pasado la validación tampoco
+                recibir(posicion, self._resultado_no_valido(registro, instrumentar))
+            else:
+                archivos.append({'posicion': posicion, 'ruta': registro['ruta'],
+                                 'tamano': registro['tamano'] or 0})
+        
+        # Los archivos divididos en rangos se combinan aquí, cada uno con su propio contador
+        divididos = {}
+        
+        def admite_rangos(archivo):
+            contador = self._contador_por_rangos(archivo['ruta'])
+            if contador is not None:
+                divididos[archivo['posicion']] = contador
+            return contador is not None
+        
+        tareas = self.planificador.planificar(archivos,
+                                              admite_rangos if self._admite_rangos(instrumentar) else None)
+        rangos = {posicion: {} for posicion in divididos}
+        siguiente = 0
+        
+        def emitir_listos():
+            # Los resultados se emiten en el orden de entrada aunque las tareas terminen
+            # en otro; los empates del corpus se resuelven por orden alfabético, así que
+            # el orden en que se sumaron los conteos no cambia las más frecuentes
+            nonlocal siguiente
+            while siguiente < len(parciales) and parciales[siguiente] is not None:
+                resultado = parciales[siguiente]
+                siguiente += 1
+                resultados.append(resultado)
+                if 'instrumentacion' in resultado:
+                    for sumidero in self.sumideros_metricas:
+                        sumidero.registrar(resultado['instrumentacion'])
+                if al_terminar_archivo is not None:
+                    al_terminar_archivo(resultado)
+        
+        if self.usar_hilos:
+            ejecutor = ThreadPoolExecutor(max_workers=self.num_trabajadores)
+        else:
+            ejecutor = ProcessPoolExecutor(max_workers=self.num_trabajadores)
+        
+        with ejecutor:
+            emitir_listos()
+            # Se envían en el orden del planificador: de la tarea más grande a la más pequeña
+            futuros = {ejecutor.submit(_contar_tarea_lote, self._preparar_tarea(tarea, registros, divididos),
+                                       contar_archivo): tarea
+                       for tarea in tareas}
+            for futuro in as_completed(futuros):
+                tarea = futuros.pop(futuro)
+                # Un trabajador caído (o un error fuera de contar_archivo) solo
+                # hace fallar los archivos de su tarea, no el lote entero
+                try:
+                    parciales_tarea = futuro.result()
+                except Exception as e:
+                    parciales_tarea = e
+                if 'posiciones' in tarea:
+                    for indice, posicion in enumerate(tarea['posiciones']):
+                        if isinstance(parciales_tarea, Exception):
+                            registro = {'ruta': registros[posicion]['ruta'],
+                                        'mensaje_error': ContadorPalabras._mensaje_error(parciales_tarea)}
+                            recibir(posicion, self._resultado_no_valido(registro, instrumentar))
+                        else:
+                            recibir(posicion, parciales_tarea[indice])
+                else:
+                    posicion = tarea['posicion']
+                    rangos[posicion][tarea['parte']] = (parciales_tarea if isinstance(parciales_tarea, Exception)
+                                                        else parciales_tarea[0])
+                    if len(rangos[posicion]) == tarea['partes']:
+                        recibir(posicion, self._combinar_rangos(registros[posicion]['ruta'],
+                                                                divididos.pop(posicion), rangos.pop(posicion)))
+                emitir_listos()
         
-        if not os.path.exists(ruta_archivo):
-            return False, ValidadorArchivo._generar_mensaje_archivo_no_encontrado(ruta_archivo)
+        numero_total_palabras = sum(r['numero_total_palabras'] for r in resultados if r['exito'])
         
-        if not os.path.isfile(ruta_archivo):
-            return False, f"❌ Error: '{ruta_archivo}' es una carpeta, no un archivo."
+        resumen = {
+            'archivos': resultados,
+            'archivos_procesados': sum(1 for r in resultados if r['exito']),
+            'archivos_con_error': sum(1 for r in resultados if not r['exito']),
+            'numero_total_palabras': numero_total_palabras,
+            'contador_palabras': contador_corpus,
+            'palabras_mas_frecuentes': palabras_mas_frecuentes(contador_corpus, self.n),
+        }
+        if self.tamano_ngrama is not None:
+            resumen['contador_ngramas'] = ngramas_corpus
+            resumen['ngramas_mas_frecuentes'] = palabras_mas_frecuentes(ngramas_corpus, self.n)
+        if self.capacidad_aproximada is not None:
+            resumen['conteo_aproximado'] = True
+            resumen['error_maximo'] = contador_corpus.error_maximo() + sum(
+                r['error_maximo'] for r in resultados if r['exito'])
+        return resumen
+    
+    def _admite_rangos(self, instrumentar: bool) -> bool:
+        """
+        Indica si los archivos grandes del lote se pueden dividir en rangos: la
+        caché, el modo incremental y las métricas son por archivo completo, los
+        n-gramas que cruzan un corte se perderían y los rangos no saben combinar
+        un conteo aproximado
+        """
+        return (self.ruta_cache is None and self.directorio_incremental is None
+                and self.tamano_ngrama is None and self.capacidad_aproximada is None and not instrumentar)
+    
+    def _contador_por_rangos(self, ruta: str) -> Optional[ContadorPalabras]:
+        """
+        Contador con el que combinar los rangos de un archivo, con la codificación
+        ya fijada, o None si el archivo no se puede leer por rangos (comprimido,
+        UTF-16/32, binario o ilegible: se cuenta entero y el trabajador informa del error)
+        """
+        contador = ContadorPalabras(motor='streaming', tamano_bloque=self.tamano_bloque,
+                                    tokenizador=self.tokenizador, palabras_vacias=self.palabras_vacias,
+                                    contar_vacias_en_total=self.contar_vacias_en_total,
+                                    codificacion=self.codificacion,
+                                    errores_decodificacion=self.errores_decodificacion,
+                                    vocabulario_compacto=self.vocabulario_compacto)
+        try:
+            if detectar_compresion(ruta) is None and contador._admite_cortes_ascii(ruta):
+                return contador
+        except (OSError, ValueError):
+            pass
+        return None
+    
+    def _preparar_tarea(self, tarea: dict, registros: List[dict], divididos: dict) -> dict:
+        """Lo que necesita el trabajador para contar una tarea del planificador"""
+        if 'posiciones' in tarea:
+            return {'registros': [registros[posicion] for posicion in tarea['posiciones']]}
+        contador = divididos[tarea['posicion']]
+        return {'ruta': registros[tarea['posicion']]['ruta'], 'inicio': tarea['inicio'], 'fin': tarea['fin'],
+                'tamano_bloque': self.tamano_bloque, 'codificacion': contador._codificacion,
+                'errores': contador._gestor_errores}
+    
+    def _combinar_rangos(self, ruta: str, contador: ContadorPalabras,
+                         partes: dict) -> Tuple[dict, Counter, Counter]:
+        """
+        Combina los rangos de un archivo en el orden del archivo y termina su
+        vocabulario, con la misma forma que el resultado de un trabajador
+        """
+        errores = [parte for parte in partes.values() if isinstance(parte, Exception)]
+        if errores:
+            resultado = {'ruta': ruta, 'exito': False, 'mensaje_error': ContadorPalabras._mensaje_error(errores[0])}
+            return resultado, Counter(), Counter()
         
-        return True, ""
+        contador._combinar_parciales(partes[parte] for parte in range(len(partes)))
+        contador._finalizar_vocabulario()
+        resultado = {'ruta': ruta, 'exito': True, 'mensaje_error': ""}
+        resultado.update(contador.obtener_estadisticas(self.n))
+        return resultado, contador.contador_palabras, contador.contador_ngramas
     
     @staticmethod
-    def _generar_mensaje_archivo_no_encontrado(ruta_archivo: str) -> str:
-        """Genera un mensaje detallado cuando no se encuentra un archivo"""
-        mensaje = f"❌ Error: No se encontró '{ruta_archivo}'\n"
+    def _resultado_no_valido(registro: dict, instrumentar: bool) -> Tuple[dict, Counter, Counter]:
+        """Resultado de una ruta que no ha pasado la validación, con la misma forma que el de un trabajador"""
+        resultado = {'ruta': registro['ruta'], 'exito': False, 'mensaje_error': registro['mensaje_error']}
+        if instrumentar:
+            instrumentacion = Instrumentacion()
+            instrumentacion.iniciar(registro['ruta'])
+            resultado['instrumentacion'] = instrumentacion.finalizar(False, 0)
+        return resultado, Counter(), Counter()
+    
+    @staticmethod
+    def mostrar_resultados(resumen: dict) -> None:
+        """Muestra las estadísticas por archivo y las del corpus completo"""
+        for resultado in resumen['archivos']:
+            if resultado['exito']:
+                print(f"✅ {resultado['ruta']}: {resultado['numero_total_palabras']} palabras")
+            else:
+                print(f"{resultado['mensaje_error']} ({resultado['ruta']})")
         
-        ruta_padre = os.path.dirname(ruta_archivo)
-        nombre_archivo = os.path.basename(ruta_archivo)
+        print(f"\n📁 Archivos procesados: {resumen['archivos_procesados']}"
+              f" (con error: {resumen['archivos_con_error']})")
+        print(f"📊 El número total de palabras del corpus es: {resumen['numero_total_palabras']}")
         
-        if ruta_padre and os.path.exists(ruta_padre):
-            mensaje += f"   📁 La carpeta '{ruta_padre}' SÍ existe\n"
-            mensaje += f"   📄 Pero el archivo '{nombre_archivo}' NO se encuentra en esa carpeta\n"
-            
-            try:
-                archivos_en_carpeta = os.listdir(ruta_padre)
-                archivos_txt = [f for f in archivos_en_carpeta if f.lower().endswith('.txt')]
-                
-                # Buscar archivos con nombres similares
-                archivos_similares = ValidadorArchivo.buscar_archivos_similares(nombre_archivo, ruta_padre)
-                
-                if archivos_similares:
-                    mensaje += f"   🔍 Archivos con nombres similares a '{nombre_archivo}':\n"
-                    for archivo in archivos_similares:
-                        mensaje += f"      - {archivo}\n"
-                
-                if archivos_txt:
-                    mensaje += f"   📋 Archivos .txt disponibles en '{ruta_padre}':\n"
-                    for archivo in archivos_txt:
-                        mensaje += f"      - {archivo}\n"
-                else:
-                    mensaje += f"   📋 No hay archivos .txt en '{ruta_padre}'\n"
-                    mensaje += f"   📋 Archivos disponibles: {', '.join(archivos_en_carpeta[:5])}\n"
-                    if len(archivos_en_carpeta) > 5:
-                        mensaje += f"      ... y {len(archivos_en_carpeta) - 5} archivos más\n"
-            except PermissionError:
-                mensaje += f"   ⚠️  No se puede acceder al contenido de '{ruta_padre}'\n"
-        else:
-            mensaje += f"   📁 La carpeta '{ruta_padre}' NO existe\n"
-            mensaje += "   💡 Sugerencias:\n"
-            mensaje += "      - Verifique que escribió la ruta correctamente\n"
-            mensaje += "      - Use rutas absolutas como: /ruta/completa/al/archivo.txt\n"
-            mensaje += "      - O rutas relativas como: ./archivo.txt\n"
+        if resumen['palabras_mas_frecuentes']:
+            print(f"\n🔝 Las {len(resumen['palabras_mas_frecuentes'])} palabras más frecuentes del corpus son:")
+            for i, (palabra, frecuencia) in enumerate(resumen['palabras_mas_frecuentes'], 1):
+                print(f"  {i:2d}. '{palabra}' - {frecuencia} veces")
+            if resumen.get('conteo_aproximado'):
+                print(f"  ℹ️  Frecuencias aproximadas: cada una puede diferir de la real "
+                      f"como mucho en {resumen['error_maximo']}")
         
-        return mensaje
+        if resumen.get('ngramas_mas_frecuentes'):
+            print(f"\n🔗 Los {len(resumen['ngramas_mas_frecuentes'])} n-gramas más frecuentes del corpus son:")
+            for i, (ngrama, frecuencia) in enumerate(resumen['ngramas_mas_frecuentes'], 1):
+                print(f"  {i:2d}. '{ngrama}' - {frecuencia} veces")
 
 
-class ContadorPalabras:
-    """Clase responsable de contar palabras en archivos"""
+class CoordinadorDistribuido:
+    """
+    Reparte el conteo de un corpus entre varios nodos mediante una cola en un
+    sistema de archivos compartido (map/reduce):
     
-    def __init__(self):
-        self.contenido = ""
-        self.palabras = []
-        self.numero_total_palabras = 0
-        self.contador_palabras = Counter()
+    - repartir: divide las entradas en fragmentos (grupos de archivos pequeños o
+      rangos de bytes de los grandes) y deja uno por archivo en 'pendientes/'
+    - cada trabajador (ejecutar_trabajador_cola, o 'contador.py --trabajador-cola DIR'
+      en cualquier nodo que vea el directorio) reclama un fragmento renombrándolo
+      a 'en_curso/' (operación atómica), lo cuenta y deja su tabla de
+      frecuencias binaria en 'resultados/'
+    - un archivo que no se puede leer (no existe, es binario, no se puede
+      decodificar) no hace fallar su fragmento: se anota junto a su tabla y el
+      resto del fragmento se cuenta, como en ProcesadorLotes
+    - los fragmentos que fallan (por un error del nodo o del sistema de
+      archivos) se reintentan hasta max_intentos veces y luego pasan a
+      'fallidos/'; los que llevan en curso más de tiempo_maximo segundos
+      (nodo caído) se devuelven a la cola
+    - esperar combina las tablas con una mezcla de k vías y devuelve un
+      resultado compatible con ContadorPalabras.obtener_estadisticas, con los
+      archivos que no se han podido contar en archivos_con_error. Los rangos
+      de un archivo con algún rango erróneo o fallido no se suman.
+    
+    Un fragmento contado dos veces (por ejemplo, por un nodo lento al que se le
+    retiró) no altera el resultado: su tabla se reemplaza de forma atómica.
+    """
+    
+    SUBDIRECTORIOS = ('pendientes', 'en_curso', 'resultados', 'fallidos')
+    
+    def __init__(self, directorio_cola: str, tamano_fragmento: int = TAMANO_RANGO_POR_DEFECTO,
+                 max_intentos: int = 3, tiempo_maximo: float = 600.0,
+                 tamano_bloque: int = TAMANO_BLOQUE_POR_DEFECTO,
+                 tokenizador: Optional[Tokenizador] = None,
+                 palabras_vacias: Optional[frozenset] = None, contar_vacias_en_total: bool = True,
+                 codificacion: str = 'utf-8', errores_decodificacion: str = 'estricto'):
+        if tamano_fragmento <= 0:
+            raise ValueError("El tamaño de fragmento debe ser mayor que cero")
+        if max_intentos <= 0:
+            raise ValueError("El número de intentos debe ser mayor que cero")
+        
+        self.directorio_cola = directorio_cola
+        self.tamano_fragmento = tamano_fragmento
+        self.max_intentos = max_intentos
+        self.tiempo_maximo = tiempo_maximo
+        self.configuracion = {
+            'tamano_bloque': tamano_bloque,
+            'tokenizador': vars(tokenizador) if tokenizador is not None else None,
+            'palabras_vacias': sorted(palabras_vacias or ()),
+            'contar_vacias_en_total': contar_vacias_en_total,
+            'codificacion': codificacion,
+            'errores_decodificacion': errores_decodificacion,
+            'max_intentos': max_intentos,
+        }
+        self.fragmentos = []
+        self.numero_archivos = 0
     
-    def procesar_archivo(self, ruta_archivo: str) -> Tuple[bool, str]:
+    def _ruta(self, *partes: str) -> str:
+        """Ruta dentro del directorio de la cola"""
+        return os.path.join(self.directorio_cola, *partes)
+    
+    def planificar(self, rutas: List[str]) -> List[dict]:
         """
-        Procesa un archivo y cuenta las palabras
-        Retorna: (exito, mensaje_error)
+        Divide los archivos en fragmentos de unos tamano_fragmento bytes: los
+        archivos grandes en rangos de bytes y los pequeños agrupados en listas
         """
-        try:
-            # Leer el contenido del archivo
-            with open(ruta_archivo, 'r', encoding='utf-8') as archivo:
-                self.contenido = archivo.read()
-            
-            # Separar en palabras
-            self.palabras = self.contenido.split()
-            
-            # Contar número total de palabras
-            self.numero_total_palabras = len(self.palabras)
-            
-            # Contar frecuencia de palabras
-            self.contador_palabras = Counter(self.palabras)
-            
-            return True, ""
-            
-        except UnicodeDecodeError:
-            return False, "❌ Error: No se puede leer el archivo. Puede que no sea un archivo de texto válido."
-        except Exception as e:
-            return False, f"❌ Error al procesar el archivo: {e}"
+        fragmentos = []
+        grupo, tamano_grupo = [], 0
+        
+        def cerrar_grupo():
+            nonlocal grupo, tamano_grupo
+            if grupo:
+                fragmentos.append({'rutas': grupo})
+            grupo, tamano_grupo = [], 0
+        
+        for registro in ValidadorArchivo.validar_rutas(os.path.abspath(ruta) for ruta in rutas):
+            ruta = registro['ruta']
+            tamano = registro['tamano'] if registro['tipo'] == 'archivo' else 0
+            # Los comprimidos no se pueden leer por rangos, ni los UTF-16/32: van
+            # enteros, como los pequeños. Los rangos llevan la codificación del archivo.
+            codificacion = self._codificacion_por_rangos(ruta) if tamano > self.tamano_fragmento else None
+            if codificacion is not None:
+                cerrar_grupo()
+                fragmentos.extend({'ruta': ruta, 'inicio': inicio, 'fin': fin, 'codificacion': codificacion}
+                                  for inicio, fin in calcular_rangos(ruta, self.tamano_fragmento))
+                continue
+            if tamano_grupo + tamano > self.tamano_fragmento:
+                cerrar_grupo()
+            grupo.append(ruta)
+            tamano_grupo += tamano
+        cerrar_grupo()
+        
+        for numero, fragmento in enumerate(fragmentos):
+            fragmento['id'] = f"{numero:06d}"
+            fragmento['intentos'] = 0
+        return fragmentos
+    
+    def _codificacion_por_rangos(self, ruta: str) -> Optional[str]:
+        """Codificación con la que se pueden contar los rangos de un archivo, o None si no se puede dividir"""
+        if detectar_compresion(ruta) is not None:
+            return None
+        codificacion = self.configuracion['codificacion']
+        if codificacion == 'auto':
+            with open(ruta, 'rb') as archivo:
+                codificacion, _ = detectar_codificacion(archivo.read(TAMANO_MUESTRA_CODIFICACION))
+        return codificacion if es_compatible_ascii(codificacion) else None
+    
+    def repartir(self, entradas: Iterable[str]) -> List[dict]:
+        """Crea la cola con la configuración y un archivo por fragmento pendiente"""
+        rutas = ProcesadorLotes.expandir_entradas(entradas)
+        if ENTRADA_ESTANDAR in rutas:
+            raise ValueError("La entrada estándar no se puede repartir entre nodos")
+        
+        # Se descarta lo que quede de una ejecución anterior en la misma cola
+        for subdirectorio in self.SUBDIRECTORIOS:
+            shutil.rmtree(self._ruta(subdirectorio), ignore_errors=True)
+            os.makedirs(self._ruta(subdirectorio))
+        for nombre in ('terminado', 'corpus.cptf'):
+            if os.path.exists(self._ruta(nombre)):
+                os.remove(self._ruta(nombre))
+        _escribir_json_atomico(self._ruta('configuracion.json'), self.configuracion)
+        
+        self.numero_archivos = len(rutas)
+        self.fragmentos = self.planificar(rutas)
+        for fragmento in self.fragmentos:
+            _escribir_json_atomico(self._ruta('pendientes', f"{fragmento['id']}.json"), fragmento)
+        return self.fragmentos
+    
+    def _recuperar_caducados(self) -> None:
+        """Devuelve a la cola los fragmentos que llevan demasiado tiempo en curso"""
+        ahora = time.time()
+        for nombre in os.listdir(self._ruta('en_curso')):
+            ruta = self._ruta('en_curso', nombre)
+            try:
+                if ahora - os.path.getmtime(ruta) < self.tiempo_maximo:
+                    continue
+                # Renombrar primero garantiza que el trabajador ya no lo puede dar por terminado
+                ruta_retirada = ruta + '.retirado'
+                os.rename(ruta, ruta_retirada)
+            except FileNotFoundError:
+                continue
+            with open(ruta_retirada, 'r', encoding='utf-8') as archivo:
+                fragmento = json.load(archivo)
+            _devolver_fragmento(self.directorio_cola, fragmento, "tiempo máximo superado", self.max_intentos)
+            os.remove(ruta_retirada)
+    
+    def _estado(self) -> Tuple[List[str], List[dict]]:
+        """Retorna (ids terminados, fragmentos fallidos)"""
+        terminados = [fragmento['id'] for fragmento in self.fragmentos
+                      if os.path.exists(self._ruta('resultados', f"{fragmento['id']}.cptf"))]
+        fallidos = []
+        for fragmento in self.fragmentos:
+            ruta_fallido = self._ruta('fallidos', f"{fragmento['id']}.json")
+            if fragmento['id'] not in terminados and os.path.exists(ruta_fallido):
+                with open(ruta_fallido, 'r', encoding='utf-8') as archivo:
+                    fallidos.append(json.load(archivo))
+        return terminados, fallidos
+    
+    def _errores_archivos(self, terminados: List[str], fallidos: List[dict]) -> dict:
+        """
+        Archivos que no se han podido contar, con su mensaje de error: los
+        anotados por los trabajadores y los de los fragmentos fallidos
+        """
+        errores = {}
+        for id_fragmento in terminados:
+            ruta_errores = self._ruta('resultados', f"{id_fragmento}.errores.json")
+            if os.path.exists(ruta_errores):
+                with open(ruta_errores, 'r', encoding='utf-8') as archivo:
+                    for error in json.load(archivo)['errores']:
+                        errores.setdefault(error['ruta'], error['mensaje_error'])
+        for fragmento in fallidos:
+            mensaje = f"❌ Error al procesar el archivo: {fragmento.get('ultimo_error', '')}"
+            for ruta in fragmento.get('rutas', [fragmento.get('ruta')]):
+                errores.setdefault(ruta, mensaje)
+        return errores
+    
+    def lanzar_trabajadores_locales(self, cantidad: int) -> List[subprocess.Popen]:
+        """Arranca procesos trabajadores en esta máquina, como si fueran nodos"""
+        return [subprocess.Popen([sys.executable, os.path.abspath(__file__), '--trabajador-cola', self.directorio_cola],
+                                 stdout=subprocess.DEVNULL)
+                for _ in range(cantidad)]
     
-    def obtener_estadisticas(self) -> dict:
-        """Retorna un diccionario con las estadísticas del archivo"""
-        palabras_mas_frecuentes = self.contador_palabras.most_common(10)
+    def esperar(self, n: Optional[int] = TOP_POR_DEFECTO, trabajadores: Optional[List] = None,
+                intervalo: float = 0.1) -> dict:
+        """
+        Espera a que todos los fragmentos terminen o fallen, reintenta los de
+        nodos caídos y combina las tablas parciales
+        trabajadores: procesos locales lanzados por el coordinador; si mueren
+        antes de tiempo se vuelven a lanzar
+        """
+        trabajadores = list(trabajadores or [])
+        relanzamientos = len(trabajadores) * self.max_intentos
+        
+        try:
+            while True:
+                self._recuperar_caducados()
+                terminados, fallidos = self._estado()
+                if len(terminados) + len(fallidos) == len(self.fragmentos):
+                    break
+                
+                for i, proceso in enumerate(trabajadores):
+                    if proceso.poll() is not None:
+                        if relanzamientos == 0:
+                            raise RuntimeError("Los trabajadores locales han fallado demasiadas veces")
+                        relanzamientos -= 1
+                        trabajadores[i] = self.lanzar_trabajadores_locales(1)[0]
+                time.sleep(intervalo)
+        finally:
+            # La marca de fin avisa a todos los nodos de que no habrá más trabajo
+            with open(self._ruta('terminado'), 'w', encoding='utf-8'):
+                pass
+            for proceso in trabajadores:
+                proceso.wait()
+        
+        errores = self._errores_archivos(terminados, fallidos)
+        # Un archivo se cuenta entero o no se cuenta: sin los rangos buenos de uno con errores
+        rutas_tablas = [self._ruta('resultados', f"{fragmento['id']}.cptf") for fragmento in self.fragmentos
+                        if fragmento['id'] in terminados and fragmento.get('ruta') not in errores]
+        ruta_corpus = self._ruta('corpus.cptf')
+        numero_total_palabras, _ = combinar_tablas_frecuencias(rutas_tablas, ruta_corpus)
+        with LectorTablaFrecuencias(ruta_corpus) as lector:
+            mas_frecuentes = lector.mas_frecuentes(n)
         
         return {
-            'numero_total_palabras': self.numero_total_palabras,
-            'palabras_mas_frecuentes': palabras_mas_frecuentes,
-            'archivo_vacio': self.numero_total_palabras == 0
+            'numero_total_palabras': numero_total_palabras,
+            'palabras_mas_frecuentes': mas_frecuentes,
+            'archivo_vacio': numero_total_palabras == 0,
+            'archivos': self.numero_archivos,
+            'fragmentos': len(self.fragmentos),
+            'fragmentos_fallidos': [{'id': fragmento['id'], 'error': fragmento.get('ultimo_error', '')}
+                                    for fragmento in fallidos],
+            'archivos_con_error': [{'ruta': ruta, 'mensaje_error': mensaje} for ruta, mensaje in errores.items()],
+            'tabla_frecuencias': ruta_corpus,
         }
     
-    def mostrar_resultados(self, ruta_archivo: str) -> None:
-        """Muestra los resultados del conteo de palabras"""
-        estadisticas = self.obtener_estadisticas()
+    def ejecutar(self, entradas: Iterable[str], trabajadores_locales: int = 0,
+                 n: Optional[int] = TOP_POR_DEFECTO) -> dict:
+        """Reparte las entradas, lanza los trabajadores locales y espera el resultado combinado"""
+        self.repartir(entradas)
+        return self.esperar(n, self.lanzar_trabajadores_locales(trabajadores_locales))
+
+
+def _escribir_json_atomico(ruta: str, datos: dict) -> None:
+    """Escribe un JSON en un temporal y lo renombra, para que nadie lea un archivo a medias"""
+    ruta_temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(ruta_temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo, ensure_ascii=False)
+    os.replace(ruta_temporal, ruta)
+
+
+def _devolver_fragmento(directorio_cola: str, fragmento: dict, error: str, max_intentos: int) -> None:
+    """Vuelve a poner un fragmento en la cola, o lo da por fallido si agotó los intentos"""
+    fragmento = dict(fragmento, intentos=fragmento['intentos'] + 1, ultimo_error=error)
+    destino = 'fallidos' if fragmento['intentos'] >= max_intentos else 'pendientes'
+    _escribir_json_atomico(os.path.join(directorio_cola, destino, f"{fragmento['id']}.json"), fragmento)
+
+
+def _contar_fragmento(fragmento: dict, configuracion: dict) -> Tuple[ContadorPalabras, List[dict]]:
+    """
+    Cuenta un fragmento de la cola con la configuración del coordinador
+    Retorna (contador, errores): errores tiene un registro {'ruta', 'mensaje_error'}
+    por archivo que no se ha podido contar, que no forma parte del contador
+    """
+    opciones = configuracion['tokenizador']
+    contador = ContadorPalabras(motor='streaming', tamano_bloque=configuracion['tamano_bloque'],
+                                tokenizador=Tokenizador(**opciones) if opciones is not None else None,
+                                palabras_vacias=frozenset(configuracion['palabras_vacias']),
+                                contar_vacias_en_total=configuracion['contar_vacias_en_total'],
+                                codificacion=configuracion['codificacion'],
+                                errores_decodificacion=configuracion['errores_decodificacion'])
+    
+    if 'ruta' in fragmento:
+        try:
+            contador.numero_total_palabras, contador.contador_palabras, _ = _contar_rango(
+                fragmento['ruta'], fragmento['inicio'], fragmento['fin'], configuracion['tamano_bloque'],
+                fragmento['codificacion'], POLITICAS_DECODIFICACION[configuracion['errores_decodificacion']])
+        except (UnicodeDecodeError, ErrorArchivoBinario) as e:
+            # Repetirlo no serviría de nada: el archivo no se puede leer así
+            return contador, [{'ruta': fragmento['ruta'], 'mensaje_error': ContadorPalabras._mensaje_error(e)}]
+        contador._finalizar_vocabulario()
+        return contador, []
+    
+    numero_total_palabras = 0
+    contador_fragmento = Counter()
+    errores = []
+    for ruta in fragmento['rutas']:
+        exito, mensaje_error = contador.procesar_archivo(ruta)
+        if not exito:
+            errores.append({'ruta': ruta, 'mensaje_error': mensaje_error})
+            continue
+        numero_total_palabras += contador.numero_total_palabras
+        contador_fragmento.update(contador.contador_palabras)
+    contador.numero_total_palabras, contador.contador_palabras = numero_total_palabras, contador_fragmento
+    return contador, errores
+
+
+def ejecutar_trabajador_cola(directorio_cola: str, id_trabajador: Optional[str] = None,
+                             espera: float = 0.1) -> int:
+    """
+    Bucle de un nodo trabajador: reclama fragmentos pendientes, los cuenta y
+    deja su tabla de frecuencias en la cola hasta que el coordinador marca el fin.
+    Retorna el número de fragmentos contados.
+    """
+    id_trabajador = id_trabajador or f"{socket.gethostname()}-{os.getpid()}"
+    with open(os.path.join(directorio_cola, 'configuracion.json'), 'r', encoding='utf-8') as archivo:
+        configuracion = json.load(archivo)
+    contados = 0
+    
+    while not os.path.exists(os.path.join(directorio_cola, 'terminado')):
+        reclamado = None
+        for nombre in sorted(os.listdir(os.path.join(directorio_cola, 'pendientes'))):
+            if not nombre.endswith('.json'):
+                continue
+            ruta_en_curso = os.path.join(directorio_cola, 'en_curso', f"{nombre}.{id_trabajador}")
+            try:
+                os.rename(os.path.join(directorio_cola, 'pendientes', nombre), ruta_en_curso)
+            except FileNotFoundError:
+                # Otro nodo lo ha reclamado antes
+                continue
+            # El renombrado conserva la fecha: se actualiza para que cuente el plazo desde ahora
+            os.utime(ruta_en_curso)
+            reclamado = ruta_en_curso
+            break
         
-        print(f"\n✅ Archivo procesado exitosamente: {ruta_archivo}")
-        print(f"📊 El número total de palabras es: {estadisticas['numero_total_palabras']}")
+        if reclamado is None:
+            time.sleep(espera)
+            continue
         
-        if not estadisticas['archivo_vacio']:
-            print(f"\n🔝 Las 10 palabras más frecuentes son:")
-            for i, (palabra, frecuencia) in enumerate(estadisticas['palabras_mas_frecuentes'], 1):
-                print(f"  {i:2d}. '{palabra}' - {frecuencia} veces")
+        with open(reclamado, 'r', encoding='utf-8') as archivo:
+            fragmento = json.load(archivo)
+        ruta_resultado = os.path.join(directorio_cola, 'resultados', f"{fragmento['id']}.cptf")
+        if os.path.exists(ruta_resultado):
+            # Un nodo lento lo terminó después de que se le retirara: no hace falta repetirlo
+            os.remove(reclamado)
+            continue
+        try:
+            contador, errores = _contar_fragmento(fragmento, configuracion)
+            if errores:
+                # Antes que la tabla, que es la que marca el fragmento como terminado
+                ruta_errores = os.path.join(directorio_cola, 'resultados', f"{fragmento['id']}.errores.json")
+                _escribir_json_atomico(ruta_errores, {'errores': errores})
+            contador.guardar_tabla(ruta_resultado)
+            contados += 1
+        except Exception as e:
+            try:
+                os.remove(reclamado)
+            except FileNotFoundError:
+                # El coordinador ya lo ha retirado y devuelto a la cola
+                continue
+            _devolver_fragmento(directorio_cola, fragmento, str(e), configuracion['max_intentos'])
+            continue
+        
+        try:
+            os.remove(reclamado)
+        except FileNotFoundError:
+            pass
+    
+    return contados
+
+
+class ExportadorResultados:
+    """Clase responsable de escribir los resultados en formatos legibles por máquinas"""
+    
+    FORMATOS = ('json', 'csv', 'ndjson')
+    
+    CAMPOS_CSV = ['ruta', 'exito', 'mensaje_error', 'numero_total_palabras',
+                  'archivo_vacio', 'palabras_mas_frecuentes']
+    
+    @staticmethod
+    def registro_archivo(resultado: dict) -> dict:
+        """Convierte el resultado de un archivo en un registro con campos fijos"""
+        registro = {
+            'tipo': 'archivo',
+            'ruta': resultado['ruta'],
+            'exito': resultado['exito'],
+            'mensaje_error': resultado['mensaje_error'],
+            'numero_total_palabras': resultado.get('numero_total_palabras', 0),
+            'archivo_vacio': resultado.get('archivo_vacio', True),
+            'palabras_mas_frecuentes': resultado.get('palabras_mas_frecuentes', []),
+        }
+        if 'ngramas_mas_frecuentes' in resultado:
+            registro['ngramas_mas_frecuentes'] = resultado['ngramas_mas_frecuentes']
+            registro['ngramas_podados'] = resultado['ngramas_podados']
+        if 'conteo_aproximado' in resultado:
+            registro['conteo_aproximado'] = True
+            registro['error_maximo'] = resultado['error_maximo']
+        if 'codificacion' in resultado:
+            registro['codificacion'] = resultado['codificacion']
+        return registro
+    
+    @staticmethod
+    def registro_corpus(resumen: dict) -> dict:
+        """Convierte el resumen del corpus en un registro"""
+        registro = {
+            'tipo': 'corpus',
+            'archivos_procesados': resumen['archivos_procesados'],
+            'archivos_con_error': resumen['archivos_con_error'],
+            'numero_total_palabras': resumen['numero_total_palabras'],
+            'palabras_mas_frecuentes': resumen['palabras_mas_frecuentes'],
+        }
+        if 'ngramas_mas_frecuentes' in resumen:
+            registro['ngramas_mas_frecuentes'] = resumen['ngramas_mas_frecuentes']
+        if 'conteo_aproximado' in resumen:
+            registro['conteo_aproximado'] = True
+            registro['error_maximo'] = resumen['error_maximo']
+        return registro
+    
+    @classmethod
+    def escribir_ndjson(cls, registro: dict, salida: TextIO) -> None:
+        """Escribe un registro en una línea JSON y la envía de inmediato"""
+        salida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        salida.flush()
+    
+    @classmethod
+    def escribir_json(cls, resumen: dict, salida: TextIO) -> None:
+        """Escribe el resumen completo como un único documento JSON"""
+        documento = {
+            'archivos': [cls.registro_archivo(resultado) for resultado in resumen['archivos']],
+            'corpus': cls.registro_corpus(resumen),
+        }
+        json.dump(documento, salida, ensure_ascii=False, indent=2)
+        salida.write("\n")
+    
+    @classmethod
+    def escribir_csv(cls, resumen: dict, salida: TextIO) -> None:
+        """Escribe una fila por archivo; las palabras más frecuentes van como lista JSON"""
+        escritor = csv.DictWriter(salida, fieldnames=cls.CAMPOS_CSV, extrasaction='ignore')
+        escritor.writeheader()
+        for resultado in resumen['archivos']:
+            registro = cls.registro_archivo(resultado)
+            registro['palabras_mas_frecuentes'] = json.dumps(registro['palabras_mas_frecuentes'],
+                                                             ensure_ascii=False)
+            escritor.writerow(registro)
+
+
+class ServidorContador:
+    """
+    Servicio de larga duración que cuenta palabras sin pagar el arranque de
+    Python en cada petición. Habla un HTTP/1.1 mínimo, en localhost o en un
+    socket Unix:
+    
+    - POST /contar con un JSON {"rutas": [...], "n": 10}: responde en NDJSON
+      (codificación chunked) un registro por archivo en cuanto se cuenta, en el
+      orden pedido, y al final el registro del corpus
+    - POST /contar-texto[?n=10] con el texto en el cuerpo: responde un JSON
+      con las estadísticas del texto
+    - GET /salud: estado del servicio y peticiones en curso
+    
+    El conteo se hace en un grupo de num_trabajadores procesos (o hilos). Como
+    mucho se atienden max_concurrentes peticiones a la vez y max_en_espera
+    esperan turno; el resto recibe 503 de inmediato, para que la latencia de
+    las admitidas no crezca con la carga. Cada petición tiene como mucho
+    max_archivos_en_curso archivos enviados al grupo a la vez, así que una
+    petición con muchos archivos no acapara a los trabajadores. Solo se cuentan
+    archivos dentro de raices_permitidas; sin raíces, /contar rechaza todas las
+    rutas. Las entradas se comprueban antes de expandirlas y la expansión (que
+    puede recorrer árboles enteros) se hace fuera del bucle de eventos.
+    """
+    
+    def __init__(self, num_trabajadores: Optional[int] = None, usar_hilos: bool = False,
+                 max_concurrentes: Optional[int] = None, max_en_espera: int = 64,
+                 max_archivos_en_curso: Optional[int] = None,
+                 tamano_maximo_cuerpo: int = 64 * 1024 * 1024,
+                 raices_permitidas: Optional[List[str]] = None,
+                 motor: str = 'streaming', tamano_bloque: int = TAMANO_BLOQUE_POR_DEFECTO,
+                 n: int = TOP_POR_DEFECTO, tokenizador: Optional[Tokenizador] = None,
+                 palabras_vacias: Optional[frozenset] = None, contar_vacias_en_total: bool = True,
+                 codificacion: str = 'utf-8', errores_decodificacion: str = 'estricto'):
+        if motor not in ProcesadorLotes.MOTORES_LOTE:
+            raise ValueError(f"Motor no válido para el servidor: '{motor}'. "
+                             f"Opciones: {', '.join(ProcesadorLotes.MOTORES_LOTE)}")
+        
+        self.num_trabajadores = num_trabajadores or os.cpu_count() or 1
+        self.usar_hilos = usar_hilos
+        self.max_concurrentes = max_concurrentes or self.num_trabajadores * 2
+        self.max_en_espera = max_en_espera
+        self.max_archivos_en_curso = max_archivos_en_curso or self.num_trabajadores * 2
+        self.tamano_maximo_cuerpo = tamano_maximo_cuerpo
+        self.raices_permitidas = [os.path.realpath(raiz) for raiz in raices_permitidas or []]
+        self.motor = motor
+        self.tamano_bloque = tamano_bloque
+        self.n = n
+        self.tokenizador = tokenizador
+        self.palabras_vacias = palabras_vacias
+        self.contar_vacias_en_total = contar_vacias_en_total
+        self.codificacion = codificacion
+        self.errores_decodificacion = errores_decodificacion
+        self.en_curso = 0
+        self.en_espera = 0
+        self._ejecutor = None
+        self._semaforo = None
+    
+    async def iniciar(self, host: str = '127.0.0.1', puerto: int = 8080,
+                      ruta_unix: Optional[str] = None) -> asyncio.AbstractServer:
+        """Arranca el grupo de trabajadores y empieza a escuchar. Retorna el servidor asyncio."""
+        if self.usar_hilos:
+            self._ejecutor = ThreadPoolExecutor(max_workers=self.num_trabajadores)
         else:
-            print("⚠️  El archivo está vacío o no contiene palabras.")
+            self._ejecutor = ProcessPoolExecutor(max_workers=self.num_trabajadores)
+        self._semaforo = asyncio.Semaphore(self.max_concurrentes)
+        
+        if ruta_unix is not None:
+            return await asyncio.start_unix_server(self._atender_conexion, path=ruta_unix)
+        return await asyncio.start_server(self._atender_conexion, host, puerto)
+    
+    def detener(self) -> None:
+        """Libera el grupo de trabajadores"""
+        if self._ejecutor is not None:
+            self._ejecutor.shutdown(wait=True)
+            self._ejecutor = None
+    
+    async def servir(self, host: str = '127.0.0.1', puerto: int = 8080, ruta_unix: Optional[str] = None) -> None:
+        """Atiende peticiones hasta que se cancele la tarea (por ejemplo, con Ctrl+C)"""
+        servidor = await self.iniciar(host, puerto, ruta_unix)
+        direccion = ruta_unix or f"http://{host}:{servidor.sockets[0].getsockname()[1]}"
+        print(f"🚀 Servidor de conteo escuchando en {direccion}", file=sys.stderr)
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            self.detener()
+    
+    async def _atender_conexion(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        """Atiende las peticiones de una conexión (con keep-alive) hasta que el cliente la cierre"""
+        try:
+            while True:
+                peticion = await self._leer_peticion(lector, escritor)
+                if peticion is None:
+                    break
+                metodo, ruta, cabeceras, cuerpo = peticion
+                await self._despachar(metodo, ruta, cuerpo, escritor)
+                if cabeceras.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            # Los manejadores ya responden a sus propios errores: esto solo evita que la tarea muera en silencio
+            print(f"❌ Error inesperado al atender una conexión: {e}", file=sys.stderr)
+        finally:
+            escritor.close()
+    
+    async def _leer_peticion(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+        """Lee línea de petición, cabeceras y cuerpo. Retorna None si la conexión se cerró."""
+        linea = await lector.readline()
+        if not linea.strip():
+            return None
+        try:
+            metodo, ruta, _ = linea.decode('latin-1').split()
+        except ValueError:
+            await self._responder_json(escritor, 400, {'error': "Petición mal formada"})
+            return None
+        
+        cabeceras = {}
+        while True:
+            linea = await lector.readline()
+            if linea in (b'\r\n', b'\n', b''):
+                break
+            nombre, _, valor = linea.decode('latin-1').partition(':')
+            cabeceras[nombre.strip().lower()] = valor.strip()
+        
+        try:
+            longitud = int(cabeceras.get('content-length', 0) or 0)
+        except ValueError:
+            longitud = -1
+        if longitud < 0:
+            await self._responder_json(escritor, 400, {'error': "Content-Length no válido"})
+            return None
+        if longitud > self.tamano_maximo_cuerpo:
+            await self._responder_json(escritor, 413, {'error': "El cuerpo supera el tamaño máximo"})
+            return None
+        cuerpo = await lector.readexactly(longitud) if longitud else b""
+        return metodo, ruta, cabeceras, cuerpo
+    
+    async def _despachar(self, metodo: str, ruta: str, cuerpo: bytes, escritor: asyncio.StreamWriter) -> None:
+        """Envía cada petición a su manejador, aplicando los límites de concurrencia"""
+        partes = urlsplit(ruta)
+        
+        if metodo == 'GET' and partes.path == '/salud':
+            await self._responder_json(escritor, 200, {'estado': 'ok', 'en_curso': self.en_curso,
+                                                       'en_espera': self.en_espera})
+            return
+        if metodo != 'POST' or partes.path not in ('/contar', '/contar-texto'):
+            await self._responder_json(escritor, 404, {'error': f"No existe {metodo} {partes.path}"})
+            return
+        
+        # Rechazar pronto cuando la cola está llena mantiene acotada la latencia de las admitidas
+        if self._semaforo.locked() and self.en_espera >= self.max_en_espera:
+            await self._responder_json(escritor, 503, {'error': "Servidor ocupado, reintente más tarde"},
+                                       {'Retry-After': '1'})
+            return
+        
+        self.en_espera += 1
+        try:
+            await self._semaforo.acquire()
+        finally:
+            self.en_espera -= 1
+        self.en_curso += 1
+        try:
+            if partes.path == '/contar':
+                await self._contar_rutas(cuerpo, escritor)
+            else:
+                await self._contar_texto(parse_qs(partes.query), cuerpo, escritor)
+        finally:
+            self.en_curso -= 1
+            self._semaforo.release()
+    
+    def _ruta_permitida(self, ruta: str) -> bool:
+        """Comprueba que la ruta esté dentro de alguna de las raíces permitidas (sin raíces, de ninguna)"""
+        real = os.path.realpath(ruta)
+        return any(os.path.commonpath([real, raiz]) == raiz for raiz in self.raices_permitidas)
+    
+    def _expandir_permitidas(self, entradas: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Expande las entradas de una petición, que ya se han comprobado sin
+        expandir. Se ejecuta en un hilo: recorrer un directorio grande no debe
+        bloquear el bucle de eventos.
+        Retorna (rutas, prohibidas): prohibidas son las entradas que llevan a
+        archivos fuera de las raíces permitidas (por ejemplo, por un enlace simbólico)
+        """
+        rutas = []
+        vistas = set()
+        prohibidas = []
+        for entrada in entradas:
+            expandidas = ProcesadorLotes.expandir_entradas([entrada])
+            if not all(self._ruta_permitida(ruta) for ruta in expandidas):
+                prohibidas.append(entrada)
+                continue
+            for ruta in expandidas:
+                if ruta not in vistas:
+                    vistas.add(ruta)
+                    rutas.append(ruta)
+        return rutas, prohibidas
+    
+    async def _contar_rutas(self, cuerpo: bytes, escritor: asyncio.StreamWriter) -> None:
+        """Cuenta los archivos pedidos en el grupo de trabajadores y emite cada resultado al terminar"""
+        try:
+            peticion = json.loads(cuerpo or b"{}")
+            entradas = peticion['rutas']
+            if not isinstance(entradas, list) or not all(isinstance(entrada, str) for entrada in entradas):
+                raise TypeError("'rutas' debe ser una lista de cadenas")
+            n = int(peticion.get('n', self.n))
+        except (ValueError, KeyError, TypeError) as e:
+            await self._responder_json(escritor, 400, {'error': f"Cuerpo no válido: {e}"})
+            return
+        # Las entradas se comprueban antes de expandirlas: un directorio prohibido no se llega a recorrer
+        prohibidas = [entrada for entrada in entradas
+                      if entrada == ENTRADA_ESTANDAR or not self._ruta_permitida(entrada)]
+        bucle = asyncio.get_running_loop()
+        if not prohibidas:
+            try:
+                rutas, prohibidas = await bucle.run_in_executor(None, self._expandir_permitidas, entradas)
+            except Exception as e:
+                await self._responder_json(escritor, 500, {'error': f"No se pudieron expandir las rutas: {e}"})
+                return
+        if prohibidas:
+            await self._responder_json(escritor, 403, {'error': "Rutas no permitidas", 'rutas': prohibidas})
+            return
+        
+        contar = functools.partial(
+            _contar_archivo_lote, motor=self.motor, tamano_bloque=self.tamano_bloque, n=n,
+            tokenizador=self.tokenizador, palabras_vacias=self.palabras_vacias,
+            contar_vacias_en_total=self.contar_vacias_en_total,
+            codificacion=self.codificacion, errores_decodificacion=self.errores_decodificacion)
+        pendientes = deque()
+        por_enviar = iter(rutas)
+        
+        def enviar_siguientes():
+            # Solo max_archivos_en_curso archivos de la petición a la vez en el grupo de trabajadores
+            for ruta in itertools.islice(por_enviar, self.max_archivos_en_curso - len(pendientes)):
+                pendientes.append((ruta, bucle.run_in_executor(self._ejecutor, contar, ruta)))
+        
+        escritor.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+                       b"Transfer-Encoding: chunked\r\n\r\n")
+        resultados = []
+        contador_corpus = Counter()
+        # Con la cabecera 200 ya enviada, un error no puede cambiar el estado: se informa en un
+        # registro y la respuesta se cierra siempre con el trozo final
+        try:
+            enviar_siguientes()
+            while pendientes:
+                ruta, tarea = pendientes.popleft()
+                try:
+                    resultado, contador, _ = await tarea
+                except Exception as e:
+                    # Un trabajador caído solo hace fallar su archivo, como en ProcesadorLotes
+                    resultado = {'ruta': ruta, 'exito': False, 'mensaje_error': ContadorPalabras._mensaje_error(e)}
+                    contador = Counter()
+                enviar_siguientes()
+                resultados.append(resultado)
+                contador_corpus.update(contador)
+                await self._escribir_trozo(escritor, ExportadorResultados.registro_archivo(resultado))
+            
+            resumen = {
+                'archivos_procesados': sum(1 for r in resultados if r['exito']),
+                'archivos_con_error': sum(1 for r in resultados if not r['exito']),
+                'numero_total_palabras': sum(r['numero_total_palabras'] for r in resultados if r['exito']),
+                'palabras_mas_frecuentes': palabras_mas_frecuentes(contador_corpus, n),
+            }
+            await self._escribir_trozo(escritor, ExportadorResultados.registro_corpus(resumen))
+        except ConnectionError:
+            raise
+        except Exception as e:
+            await self._escribir_trozo(escritor, {'tipo': 'error', 'error': f"Error al contar las rutas: {e}"})
+        finally:
+            for _, tarea in pendientes:
+                tarea.cancel()
+        escritor.write(b"0\r\n\r\n")
+        await escritor.drain()
+    
+    async def _contar_texto(self, parametros: dict, cuerpo: bytes, escritor: asyncio.StreamWriter) -> None:
+        """Cuenta el texto recibido en el cuerpo de la petición"""
+        try:
+            n = int(parametros.get('n', [self.n])[0])
+        except ValueError:
+            await self._responder_json(escritor, 400, {'error': "El parámetro n debe ser un entero"})
+            return
+        
+        bucle = asyncio.get_running_loop()
+        try:
+            resultado = await bucle.run_in_executor(self._ejecutor, functools.partial(
+                _contar_texto_servidor, cuerpo, self.tamano_bloque, n, self.tokenizador,
+                self.palabras_vacias, self.contar_vacias_en_total, self.codificacion, self.errores_decodificacion))
+        except Exception as e:
+            await self._responder_json(escritor, 500, {'error': f"Error al contar el texto: {e}"})
+            return
+        await self._responder_json(escritor, 200 if resultado['exito'] else 422, resultado)
+    
+    @staticmethod
+    async def _escribir_trozo(escritor: asyncio.StreamWriter, registro: dict) -> None:
+        """Envía un registro como una línea NDJSON en un trozo chunked y espera al cliente"""
+        datos = (json.dumps(registro, ensure_ascii=False) + "\n").encode('utf-8')
+        escritor.write(f"{len(datos):x}\r\n".encode('ascii') + datos + b"\r\n")
+        # drain bloquea si el cliente lee despacio: así no se acumulan respuestas en memoria
+        await escritor.drain()
+    
+    @staticmethod
+    async def _responder_json(escritor: asyncio.StreamWriter, estado: int, datos: dict,
+                              cabeceras: Optional[dict] = None) -> None:
+        """Envía una respuesta JSON completa"""
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode('utf-8')
+        extra = "".join(f"{nombre}: {valor}\r\n" for nombre, valor in (cabeceras or {}).items())
+        escritor.write(f"HTTP/1.1 {estado} {http.HTTPStatus(estado).phrase}\r\n"
+                       f"Content-Type: application/json\r\nContent-Length: {len(cuerpo)}\r\n{extra}\r\n"
+                       .encode('latin-1') + cuerpo)
+        await escritor.drain()
+
+
+def _contar_texto_servidor(datos: bytes, tamano_bloque: int, n: int, tokenizador: Optional[Tokenizador],
+                           palabras_vacias: Optional[frozenset], contar_vacias_en_total: bool,
+                           codificacion: str = 'utf-8', errores_decodificacion: str = 'estricto') -> dict:
+    """Cuenta un texto recibido por el servidor. Se ejecuta en un hilo o proceso trabajador."""
+    contador = ContadorPalabras(motor='streaming', tamano_bloque=tamano_bloque, tokenizador=tokenizador,
+                                palabras_vacias=palabras_vacias, contar_vacias_en_total=contar_vacias_en_total,
+                                codificacion=codificacion, errores_decodificacion=errores_decodificacion)
+    exito, mensaje_error = contador.procesar_flujo(io.BytesIO(datos))
+    resultado = {'exito': exito, 'mensaje_error': mensaje_error}
+    if exito:
+        resultado.update(contador.obtener_estadisticas(n))
+    return resultado
 
 
 class InterfazUsuario:
     """Clase responsable de la interacción con el usuario"""
     
-    def __init__(self):
+    def __init__(self, n: int = TOP_POR_DEFECTO, confirmar_extension: bool = True):
         self.validador = ValidadorArchivo()
         self.contador = ContadorPalabras()
+        self.n = n
+        self.confirmar_extension = confirmar_extension
     
     def mostrar_bienvenida(self) -> None:
         """Muestra el mensaje de bienvenida y ejemplos"""
@@ -175,7 +4157,14 @@ class InterfazUsuario:
     
     def validar_extension_archivo(self, ruta_archivo: str) -> bool:
         """Valida la extensión del archivo y pregunta al usuario si continuar"""
-        if not ruta_archivo.lower().endswith('.txt'):
+        if not self.confirmar_extension:
+            return True
+        ruta_sin_compresion = ruta_archivo.lower()
+        for extension in EXTENSIONES_COMPRESION:
+            if ruta_sin_compresion.endswith(extension):
+                ruta_sin_compresion = ruta_sin_compresion[:-len(extension)]
+                break
+        if not ruta_sin_compresion.endswith('.txt'):
             respuesta = input(f"⚠️  El archivo '{ruta_archivo}' no tiene extensión .txt. ¿Continuar? (s/n): ").lower()
             return respuesta in ['s', 'si', 'sí', 'y', 'yes']
         return True
@@ -185,10 +4174,10 @@ class InterfazUsuario:
         Procesa un archivo completo
         Retorna: True si se procesó exitosamente, False si hubo error
         """
-        # Validar ruta
-        es_valida, mensaje_error = self.validador.validar_ruta_archivo(ruta_archivo)
-        if not es_valida:
-            print(mensaje_error)
+        # Validar ruta (sus metadatos se reutilizan al procesar el archivo)
+        registro = self.validador.describir_ruta(ruta_archivo)
+        if not registro['valida']:
+            print(registro['mensaje_error'])
             return False
         
         # Validar extensión
@@ -196,13 +4185,13 @@ class InterfazUsuario:
             return False
         
         # Procesar archivo
-        exito, mensaje_error = self.contador.procesar_archivo(ruta_archivo)
+        exito, mensaje_error = self.contador.procesar_archivo(ruta_archivo, registro)
         if not exito:
             print(mensaje_error)
             return False
         
         # Mostrar resultados
-        self.contador.mostrar_resultados(ruta_archivo)
+        self.contador.mostrar_resultados(ruta_archivo, self.n)
         return True
     
     def preguntar_continuar(self) -> bool:
@@ -218,8 +4207,8 @@ class InterfazUsuario:
 class Aplicacion:
     """Clase principal que coordina toda la aplicación"""
     
-    def __init__(self):
-        self.interfaz = InterfazUsuario()
+    def __init__(self, n: int = TOP_POR_DEFECTO, confirmar_extension: bool = True):
+        self.interfaz = InterfazUsuario(n, confirmar_extension)
     
     def ejecutar(self) -> None:
         """Método principal que ejecuta la aplicación"""
@@ -242,7 +4231,307 @@ class Aplicacion:
         self.interfaz.mostrar_despedida()
 
 
+def crear_parser() -> argparse.ArgumentParser:
+    """Crea el analizador de argumentos de la línea de comandos"""
+    parser = argparse.ArgumentParser(
+        description="Cuenta palabras en archivos de texto. Sin rutas, inicia el modo interactivo.")
+    parser.add_argument('rutas', nargs='*',
+                        help="archivos, directorios o patrones glob a procesar en modo lote ('-' para la entrada estándar)")
+    parser.add_argument('--lista-rutas', metavar='ARCHIVO', default=None,
+                        help="leer rutas adicionales, una por línea, de un archivo ('-' para la entrada estándar)")
+    parser.add_argument('-f', '--formato', choices=('texto',) + ExportadorResultados.FORMATOS, default='texto',
+                        help="formato de salida del modo lote; ndjson emite cada archivo al terminarlo")
+    parser.add_argument('-y', '--sin-confirmar', action='store_true',
+                        help="en modo interactivo, no preguntar por archivos sin extensión .txt")
+    parser.add_argument('-j', '--trabajadores', type=int, default=None,
+                        help="número de trabajadores concurrentes (por defecto, uno por CPU)")
+    parser.add_argument('--hilos', action='store_true',
+                        help="usar hilos en lugar de procesos (útil si domina la E/S)")
+    parser.add_argument('--motor', choices=ProcesadorLotes.MOTORES_LOTE, default='streaming',
+                        help="motor de conteo de cada archivo; 'mmap' y 'numpy' solo compensan si hay "
+                             "pocas palabras distintas frente al tamaño del texto: con millones de "
+                             "palabras distintas, 'streaming' o 'completo' son más rápidos")
+    parser.add_argument('--tamano-tarea', type=int, metavar='BYTES', default=TAMANO_RANGO_POR_DEFECTO,
+                        help="bytes aproximados de cada tarea del lote: los archivos pequeños se agrupan "
+                             "y los mayores se dividen en rangos")
+    parser.add_argument('--vocabulario-compacto', action='store_true',
+                        help="guardar las frecuencias en arrays compactos: cabe mucho más vocabulario "
+                             "en memoria, a cambio de contar más despacio")
+    parser.add_argument('--aproximado', type=int, metavar='N', default=None,
+                        help="cuenta con memoria fija: solo sigue las N palabras más frecuentes "
+                             "(resultado aproximado, con una cota de error; requiere el motor streaming)")
+    parser.add_argument('--cache', metavar='RUTA', default=None,
+                        help="archivo de caché persistente para no recontar archivos sin cambios")
+    parser.add_argument('--verificar-contenido', action='store_true',
+                        help="comprobar también un hash del contenido al consultar la caché")
+    parser.add_argument('--incremental', metavar='DIRECTORIO', default=None,
+                        help="guardar el estado de cada archivo para leer solo lo añadido en la próxima pasada")
+    parser.add_argument('--minusculas', action='store_true',
+                        help="cuenta igual mayúsculas y minúsculas ('Hola' y 'hola')")
+    parser.add_argument('--sin-puntuacion', action='store_true',
+                        help="quita los signos de puntuación del principio y el final de cada palabra")
+    parser.add_argument('--nfc', action='store_true',
+                        help="normaliza el texto a la forma canónica NFC de Unicode")
+    parser.add_argument('--sin-acentos', action='store_true',
+                        help="quita tildes y diacríticos ('camión' y 'camion' cuentan igual)")
+    parser.add_argument('--palabras-vacias', metavar='IDIOMA_O_RUTA', action='append', default=[],
+                        help="excluye de la tabla de frecuencias las palabras vacías de un idioma "
+                             f"incluido ({', '.join(PALABRAS_VACIAS)}) o de un archivo; se puede repetir")
+    parser.add_argument('--vacias-fuera-del-total', action='store_true',
+                        help="las palabras vacías tampoco cuentan en el número total de palabras")
+    parser.add_argument('--codificacion', default='utf-8',
+                        help="codificación de los archivos (por defecto utf-8); 'auto' la detecta en "
+                             "cada archivo por su BOM o sus primeros bytes (UTF-8, CP1252 o Latin-1)")
+    parser.add_argument('--errores-codificacion', choices=POLITICAS_DECODIFICACION, default='estricto',
+                        help="qué hacer con los bytes no válidos: fallar (estricto), sustituirlos por "
+                             "U+FFFD (reemplazar), descartarlos (omitir) o contarlos como \\xNN (bytes)")
+    parser.add_argument('--ngramas', type=int, metavar='N', default=None,
+                        help="cuenta también las secuencias de N palabras (2 para bigramas, 3 para trigramas)")
+    parser.add_argument('--maximo-ngramas', type=int, metavar='CANTIDAD', default=None,
+                        help="limita la memoria conservando solo los n-gramas más frecuentes (resultado aproximado)")
+    parser.add_argument('--tabla-salida', metavar='RUTA', default=None,
+                        help="guarda la tabla de frecuencias completa del corpus en formato binario compacto")
+    parser.add_argument('--combinar-tablas', action='store_true',
+                        help="las rutas son tablas binarias: se suman en --tabla-salida sin cargarlas en memoria")
+    parser.add_argument('--distribuido', metavar='DIRECTORIO_COLA', default=None,
+                        help="reparte el conteo entre nodos mediante una cola en DIRECTORIO_COLA "
+                             "(un sistema de archivos compartido) y combina sus resultados")
+    parser.add_argument('--nodos-locales', type=int, metavar='N', default=None,
+                        help="con --distribuido, trabajadores que se lanzan en esta máquina "
+                             "(por defecto, uno por CPU; 0 si solo trabajan otros nodos)")
+    parser.add_argument('--tamano-fragmento', type=int, metavar='BYTES', default=TAMANO_RANGO_POR_DEFECTO,
+                        help="con --distribuido, bytes aproximados de cada fragmento de trabajo")
+    parser.add_argument('--trabajador-cola', metavar='DIRECTORIO_COLA', default=None,
+                        help="actúa como nodo trabajador de la cola hasta que el coordinador termine")
+    parser.add_argument('--servidor', action='store_true',
+                        help="arranca el servicio HTTP de conteo (POST /contar, POST /contar-texto, GET /salud)")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="con --servidor, dirección en la que escuchar (por defecto 127.0.0.1)")
+    parser.add_argument('--puerto', type=int, default=8080,
+                        help="con --servidor, puerto TCP en el que escuchar (por defecto 8080)")
+    parser.add_argument('--socket-unix', metavar='RUTA', default=None,
+                        help="con --servidor, escucha en un socket Unix en lugar de TCP")
+    parser.add_argument('--max-concurrentes', type=int, metavar='N', default=None,
+                        help="con --servidor, peticiones atendidas a la vez (por defecto, 2 por trabajador)")
+    parser.add_argument('--raiz-permitida', metavar='DIRECTORIO', action='append', default=[],
+                        help="con --servidor, solo se cuentan archivos dentro de DIRECTORIO; se puede "
+                             "repetir (por defecto, el directorio actual)")
+    parser.add_argument('--metricas-json', metavar='RUTA', default=None,
+                        help="añade a RUTA una línea JSON por archivo con el tiempo, los bytes "
+                             "y la memoria de cada fase del conteo")
+    parser.add_argument('--metricas-prometheus', metavar='RUTA', default=None,
+                        help="mantiene en RUTA las métricas acumuladas en formato de texto de Prometheus")
+    parser.add_argument('--medir-memoria', action='store_true',
+                        help="mide el pico de memoria de cada fase con tracemalloc (más lento)")
+    parser.add_argument('-n', '--top', type=int, default=TOP_POR_DEFECTO,
+                        help=f"número de palabras más frecuentes a mostrar (por defecto {TOP_POR_DEFECTO})")
+    return parser
+
+
+def crear_tokenizador(argumentos: argparse.Namespace) -> Optional[Tokenizador]:
+    """Crea el Tokenizador pedido en la línea de comandos, o None si no se pidió ninguna normalización"""
+    if not (argumentos.minusculas or argumentos.sin_puntuacion or argumentos.nfc or argumentos.sin_acentos):
+        return None
+    return Tokenizador(minusculas=argumentos.minusculas,
+                       quitar_puntuacion=argumentos.sin_puntuacion,
+                       normalizar_nfc=argumentos.nfc,
+                       quitar_acentos=argumentos.sin_acentos)
+
+
+def leer_lista_rutas(origen: str) -> List[str]:
+    """Lee una ruta por línea de un archivo o de la entrada estándar ('-')"""
+    if origen == '-':
+        lineas = sys.stdin.read().splitlines()
+    else:
+        with open(origen, 'r', encoding='utf-8') as archivo:
+            lineas = archivo.read().splitlines()
+    return [linea for linea in lineas if linea.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto de entrada de la línea de comandos. Retorna el código de salida."""
+    parser = crear_parser()
+    argumentos = parser.parse_args(argv)
+    
+    if argumentos.trabajador_cola is not None:
+        ejecutar_trabajador_cola(argumentos.trabajador_cola)
+        return 0
+    
+    if argumentos.codificacion != 'auto':
+        try:
+            codecs.lookup(argumentos.codificacion)
+        except LookupError:
+            parser.error(f"codificación desconocida: '{argumentos.codificacion}'")
+    if argumentos.trabajadores is not None and argumentos.trabajadores <= 0:
+        parser.error("-j/--trabajadores debe ser mayor que cero")
+    if argumentos.top < 0:
+        parser.error("-n/--top no puede ser negativo")
+    try:
+        palabras_vacias = cargar_palabras_vacias(argumentos.palabras_vacias)
+    except (OSError, UnicodeDecodeError) as e:
+        parser.error(f"--palabras-vacias admite un idioma incluido ({', '.join(PALABRAS_VACIAS)}) "
+                     f"o la ruta de un archivo de texto UTF-8: {e}")
+    
+    if argumentos.servidor:
+        servidor = ServidorContador(num_trabajadores=argumentos.trabajadores, usar_hilos=argumentos.hilos,
+                                    max_concurrentes=argumentos.max_concurrentes,
+                                    raices_permitidas=argumentos.raiz_permitida or [os.getcwd()],
+                                    motor=argumentos.motor, n=argumentos.top,
+                                    tokenizador=crear_tokenizador(argumentos),
+                                    palabras_vacias=palabras_vacias,
+                                    contar_vacias_en_total=not argumentos.vacias_fuera_del_total,
+                                    codificacion=argumentos.codificacion,
+                                    errores_decodificacion=argumentos.errores_codificacion)
+        try:
+            asyncio.run(servidor.servir(argumentos.host, argumentos.puerto, argumentos.socket_unix))
+        except KeyboardInterrupt:
+            print("\n👋 Servidor detenido", file=sys.stderr)
+        return 0
+    
+    rutas = list(argumentos.rutas)
+    if argumentos.lista_rutas is not None:
+        rutas.extend(leer_lista_rutas(argumentos.lista_rutas))
+    
+    if not rutas and argumentos.lista_rutas is None:
+        Aplicacion(argumentos.top, confirmar_extension=not argumentos.sin_confirmar).ejecutar()
+        return 0
+    
+    if argumentos.combinar_tablas:
+        if argumentos.tabla_salida is None:
+            parser.error("--combinar-tablas necesita --tabla-salida")
+        return combinar_tablas(rutas, argumentos.tabla_salida, argumentos.formato, argumentos.top)
+    
+    if argumentos.ngramas is not None and argumentos.ngramas < 2:
+        parser.error("--ngramas debe ser al menos 2")
+    if argumentos.ngramas is not None and (argumentos.cache or argumentos.incremental):
+        parser.error("--ngramas no se puede combinar con --cache ni con --incremental")
+    if argumentos.maximo_ngramas is not None:
+        if argumentos.ngramas is None:
+            parser.error("--maximo-ngramas requiere --ngramas")
+        if argumentos.maximo_ngramas < 2:
+            parser.error("--maximo-ngramas debe ser al menos 2")
+    if argumentos.tamano_tarea <= 0:
+        parser.error("--tamano-tarea debe ser mayor que cero")
+    if argumentos.tamano_fragmento <= 0:
+        parser.error("--tamano-fragmento debe ser mayor que cero")
+    if argumentos.aproximado is not None:
+        if argumentos.aproximado <= 0:
+            parser.error("--aproximado debe ser mayor que cero")
+        if argumentos.motor != 'streaming':
+            parser.error("--aproximado requiere el motor streaming")
+        if argumentos.cache or argumentos.incremental:
+            parser.error("--aproximado no se puede combinar con --cache ni con --incremental")
+        if argumentos.vocabulario_compacto:
+            parser.error("--aproximado no se puede combinar con --vocabulario-compacto")
+        if argumentos.distribuido is not None:
+            parser.error("--aproximado no se puede combinar con --distribuido")
+    
+    sumideros = []
+    if argumentos.metricas_json:
+        sumideros.append(SumideroJSON(argumentos.metricas_json))
+    if argumentos.metricas_prometheus:
+        sumideros.append(SumideroPrometheus(argumentos.metricas_prometheus))
+    
+    tokenizador = crear_tokenizador(argumentos)
+    
+    if argumentos.distribuido is not None:
+        if argumentos.ngramas is not None:
+            parser.error("--ngramas no se puede combinar con --distribuido")
+        coordinador = CoordinadorDistribuido(argumentos.distribuido, tamano_fragmento=argumentos.tamano_fragmento,
+                                             tokenizador=tokenizador, palabras_vacias=palabras_vacias,
+                                             contar_vacias_en_total=not argumentos.vacias_fuera_del_total,
+                                             codificacion=argumentos.codificacion,
+                                             errores_decodificacion=argumentos.errores_codificacion)
+        nodos_locales = argumentos.nodos_locales if argumentos.nodos_locales is not None else os.cpu_count() or 1
+        resultado = coordinador.ejecutar(rutas, nodos_locales, argumentos.top)
+        for fallido in resultado['fragmentos_fallidos']:
+            print(f"❌ Fragmento {fallido['id']} fallido: {fallido['error']}", file=sys.stderr)
+        for error in resultado['archivos_con_error']:
+            print(f"{error['mensaje_error']} ({error['ruta']})", file=sys.stderr)
+        if argumentos.tabla_salida is not None:
+            shutil.copyfile(resultado['tabla_frecuencias'], argumentos.tabla_salida)
+        mostrar_resumen_corpus({
+            'archivos': [],
+            'archivos_procesados': resultado['archivos'] - len(resultado['archivos_con_error']),
+            'archivos_con_error': len(resultado['archivos_con_error']),
+            'numero_total_palabras': resultado['numero_total_palabras'],
+            'palabras_mas_frecuentes': resultado['palabras_mas_frecuentes'],
+        }, argumentos.formato)
+        return 0 if not resultado['archivos_con_error'] else 1
+    
+    procesador = ProcesadorLotes(num_trabajadores=argumentos.trabajadores,
+                                 usar_hilos=argumentos.hilos,
+                                 motor=argumentos.motor,
+                                 ruta_cache=argumentos.cache,
+                                 verificar_contenido=argumentos.verificar_contenido,
+                                 directorio_incremental=argumentos.incremental,
+                                 n=argumentos.top,
+                                 sumideros_metricas=sumideros,
+                                 medir_memoria=argumentos.medir_memoria,
+                                 tokenizador=tokenizador,
+                                 palabras_vacias=palabras_vacias,
+                                 contar_vacias_en_total=not argumentos.vacias_fuera_del_total,
+                                 tamano_ngrama=argumentos.ngramas,
+                                 maximo_ngramas=argumentos.maximo_ngramas,
+                                 codificacion=argumentos.codificacion,
+                                 errores_decodificacion=argumentos.errores_codificacion,
+                                 tamano_tarea=argumentos.tamano_tarea,
+                                 vocabulario_compacto=argumentos.vocabulario_compacto,
+                                 capacidad_aproximada=argumentos.aproximado)
+    
+    if argumentos.formato == 'ndjson':
+        emitir = lambda resultado: ExportadorResultados.escribir_ndjson(
+            ExportadorResultados.registro_archivo(resultado), sys.stdout)
+        resumen = procesador.procesar(rutas, al_terminar_archivo=emitir)
+        ExportadorResultados.escribir_ndjson(ExportadorResultados.registro_corpus(resumen), sys.stdout)
+    else:
+        resumen = procesador.procesar(rutas)
+        if argumentos.formato == 'json':
+            ExportadorResultados.escribir_json(resumen, sys.stdout)
+        elif argumentos.formato == 'csv':
+            ExportadorResultados.escribir_csv(resumen, sys.stdout)
+        else:
+            procesador.mostrar_resultados(resumen)
+    
+    if argumentos.tabla_salida is not None:
+        guardar_tabla_frecuencias(argumentos.tabla_salida, resumen['contador_palabras'],
+                                  resumen['numero_total_palabras'])
+    
+    return 0 if resumen['archivos_con_error'] == 0 else 1
+
+
+def combinar_tablas(rutas: List[str], ruta_salida: str, formato: Optional[str], n: int) -> int:
+    """Suma tablas de frecuencias binarias y muestra el resultado del corpus combinado"""
+    try:
+        numero_total_palabras, _ = combinar_tablas_frecuencias(rutas, ruta_salida)
+        with LectorTablaFrecuencias(ruta_salida) as lector:
+            mas_frecuentes = lector.mas_frecuentes(n)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error al combinar las tablas de frecuencias: {e}", file=sys.stderr)
+        return 1
+    
+    mostrar_resumen_corpus({
+        'archivos': [],
+        'archivos_procesados': len(rutas),
+        'archivos_con_error': 0,
+        'numero_total_palabras': numero_total_palabras,
+        'palabras_mas_frecuentes': mas_frecuentes,
+    }, formato)
+    return 0
+
+
+def mostrar_resumen_corpus(resumen: dict, formato: Optional[str]) -> None:
+    """Muestra un resumen de corpus sin resultados por archivo en el formato pedido"""
+    if formato == 'ndjson':
+        ExportadorResultados.escribir_ndjson(ExportadorResultados.registro_corpus(resumen), sys.stdout)
+    elif formato == 'json':
+        ExportadorResultados.escribir_json(resumen, sys.stdout)
+    elif formato == 'csv':
+        ExportadorResultados.escribir_csv(resumen, sys.stdout)
+    else:
+        ProcesadorLotes.mostrar_resultados(resumen)
+
+
 # Punto de entrada principal
 if __name__ == "__main__":
-    app = Aplicacion()
-    app.ejecutar()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""
+Pruebas unitarias para el conteo incremental con AlmacenIncremental
+"""
+import os
+import tempfile
+from unittest.mock import patch
+import pytest
+from contador import AlmacenIncremental, ContadorPalabras, leer_bloques_binarios
+
+
+class TestAlmacenIncremental:
+    """Clase de pruebas para AlmacenIncremental"""
+    
+    def setup_method(self):
+        """Configuración antes de cada prueba"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.almacen = AlmacenIncremental(os.path.join(self.temp_dir, "estado"))
+        self.archivo = os.path.join(self.temp_dir, "registro.log")
+    
+    def teardown_method(self):
+        """Limpieza después de cada prueba"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def _escribir(self, contenido, modo='a'):
+        """Método auxiliar para escribir en el archivo de prueba"""
+        with open(self.archivo, modo, encoding='utf-8') as f:
+            f.write(contenido)
+    
+    def _contar(self):
+        """Método auxiliar que cuenta el archivo de forma incremental"""
+        contador = ContadorPalabras(incremental=self.almacen, tamano_bloque=4)
+        exito, mensaje = contador.procesar_archivo(self.archivo)
+        assert exito is True, mensaje
+        return contador
+    
+    def _contar_completo(self):
+        """Método auxiliar que cuenta el archivo entero"""
+        contador = ContadorPalabras()
+        contador.procesar_archivo(self.archivo)
+        return contador
+    
+    @pytest.mark.unit
+    def test_anexado_igual_que_recuento_completo(self):
+        """Prueba que contar por partes da lo mismo que contar todo, incluso con palabras cortadas"""
+        self._escribir("hola mundo caf", modo='w')
+        self._contar()
+        self._escribir("é hola\ncorazón")
+        self._contar()
+        self._escribir("es adiós ")
+        
+        contador = self._contar()
+        completo = self._contar_completo()
+        
+        assert contador.numero_total_palabras == completo.numero_total_palabras
+        assert contador.contador_palabras == completo.contador_palabras
+    
+    @pytest.mark.unit
+    def test_solo_lee_bytes_nuevos(self):
+        """Prueba que la segunda pasada empieza en el desplazamiento guardado"""
+        self._escribir("uno dos tres ", modo='w')
+        self._contar()
+        self._escribir("cuatro ")
+        
+        leidos = []
+        
+        def leer_registrado(archivo, tamano_bloque, limite=None):
+            for datos in leer_bloques_binarios(archivo, tamano_bloque, limite):
+                leidos.append(datos)
+                yield datos
+        
+        with patch('contador.leer_bloques_binarios', leer_registrado):
+            contador = self._contar()
+        
+        assert b"".join(leidos) == "cuatro ".encode('utf-8')
+        assert contador.numero_total_palabras == 4
+    
+    @pytest.mark.unit
+    def test_truncado_vuelve_a_contar(self):
+        """Prueba que un archivo truncado se cuenta desde el principio"""
+        self._escribir("uno dos tres cuatro ", modo='w')
+        self._contar()
+        self._escribir("cinco ", modo='w')
+        
+        contador = self._contar()
+        
+        assert contador.numero_total_palabras == 1
+        assert contador.contador_palabras['cinco'] == 1
+        assert contador.contador_palabras['uno'] == 0
+    
+    @pytest.mark.unit
+    def test_rotacion_con_contenido_mayor_vuelve_a_contar(self):
+        """Prueba que un archivo reescrito más largo se detecta por su cabecera"""
+        self._escribir("uno dos ", modo='w')
+        self._contar()
+        self._escribir("tres cuatro cinco seis ", modo='w')
+        
+        contador = self._contar()
+        
+        assert contador.numero_total_palabras == 4
+        assert contador.contador_palabras['uno'] == 0
+    
+    @pytest.mark.unit
+    def test_estado_no_incluye_palabra_pendiente(self):
+        """Prueba que la palabra final se cuenta pero se guarda como pendiente"""
+        self._escribir("hola mun", modo='w')
+        
+        contador = self._contar()
+        estado = self.almacen.cargar(self.archivo)
+        
+        assert contador.contador_palabras['mun'] == 1
+        assert estado['pendiente'] == b"mun"
+        assert estado['numero_total_palabras'] == 1
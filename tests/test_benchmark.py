@@ -0,0 +1,57 @@
+"""
+Pruebas para las utilidades del banco de pruebas de rendimiento
+"""
+import os
+import tempfile
+from collections import Counter
+import pytest
+from benchmark import interpretar_tamano, generar_corpus, comparar_con_base
+
+
+class TestBenchmark:
+    """Clase de pruebas para benchmark.py"""
+    
+    def setup_method(self):
+        """Configuración antes de cada prueba"""
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def teardown_method(self):
+        """Limpieza después de cada prueba"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    @pytest.mark.unit
+    def test_interpretar_tamano(self):
+        """Prueba la conversión de tamaños con unidades"""
+        assert interpretar_tamano('1MB') == 1024 ** 2
+        assert interpretar_tamano('1.5kb') == 1536
+        assert interpretar_tamano('2GB') == 2 * 1024 ** 3
+        assert interpretar_tamano('100') == 100
+    
+    @pytest.mark.unit
+    def test_generar_corpus_tamano_y_distribucion(self):
+        """Prueba que el corpus tiene el tamaño pedido y una distribución sesgada"""
+        ruta = os.path.join(self.temp_dir, "corpus.txt")
+        
+        generar_corpus(ruta, 200 * 1024, tamano_vocabulario=1000, exponente_zipf=1.2)
+        
+        assert os.path.getsize(ruta) >= 200 * 1024
+        with open(ruta, 'r', encoding='utf-8') as f:
+            frecuencias = Counter(f.read().split())
+        assert len(frecuencias) <= 1000
+        primera = frecuencias.most_common(1)[0][1]
+        centesima = frecuencias.most_common(100)[-1][1]
+        assert primera > 10 * centesima
+    
+    @pytest.mark.unit
+    def test_comparar_con_base_detecta_regresiones(self):
+        """Prueba la detección de regresiones de velocidad y memoria"""
+        base = [{'corpus': 'c', 'motor': 'streaming', 'mb_s': 100.0, 'rss_maximo_mb': 50.0}]
+        lento = [{'corpus': 'c', 'motor': 'streaming', 'mb_s': 80.0, 'rss_maximo_mb': 50.0}]
+        pesado = [{'corpus': 'c', 'motor': 'streaming', 'mb_s': 100.0, 'rss_maximo_mb': 60.0}]
+        igual = [{'corpus': 'c', 'motor': 'streaming', 'mb_s': 95.0, 'rss_maximo_mb': 52.0}]
+        
+        assert len(comparar_con_base(lento, base, 0.10)) == 1
+        assert len(comparar_con_base(pesado, base, 0.10)) == 1
+        assert comparar_con_base(igual, base, 0.10) == []
+        assert comparar_con_base(lento, [], 0.10) == []
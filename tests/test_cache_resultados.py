@@ -0,0 +1,149 @@
+"""
+Pruebas unitarias para la clase CacheResultados
+"""
+import os
+import sqlite3
+import tempfile
+from collections import Counter
+from unittest.mock import patch
+import pytest
+from contador import CacheResultados, ContadorPalabras, ProcesadorLotes
+
+
+class TestCacheResultados:
+    """Clase de pruebas para CacheResultados"""
+    
+    def setup_method(self):
+        """Configuración antes de cada prueba"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.ruta_cache = os.path.join(self.temp_dir, "cache.sqlite")
+        self.archivo = self._crear_archivo_prueba("texto.txt", "hola mundo hola")
+    
+    def teardown_method(self):
+        """Limpieza después de cada prueba"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def _crear_archivo_prueba(self, nombre, contenido):
+        """Método auxiliar para crear archivos de prueba"""
+        ruta = os.path.join(self.temp_dir, nombre)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(contenido)
+        return ruta
+    
+    @pytest.mark.unit
+    def test_buscar_sin_entrada(self):
+        """Prueba que un archivo nunca guardado no está en la caché"""
+        cache = CacheResultados(self.ruta_cache)
+        
+        assert cache.buscar(self.archivo) is None
+    
+    @pytest.mark.unit
+    def test_guardar_y_buscar(self):
+        """Prueba que se recupera exactamente lo guardado"""
+        cache = CacheResultados(self.ruta_cache)
+        cache.guardar(self.archivo, 3, Counter({'hola': 2, 'mundo': 1}))
+        
+        resultado = CacheResultados(self.ruta_cache).buscar(self.archivo)
+        
+        assert resultado == (3, Counter({'hola': 2, 'mundo': 1}), None)
+    
+    @pytest.mark.unit
+    def test_archivo_modificado_invalida_entrada(self):
+        """Prueba que un cambio de tamaño o fecha invalida la entrada"""
+        cache = CacheResultados(self.ruta_cache)
+        cache.guardar(self.archivo, 3, Counter({'hola': 2, 'mundo': 1}))
+        
+        with open(self.archivo, 'a', encoding='utf-8') as f:
+            f.write(" adiós")
+        
+        assert cache.buscar(self.archivo) is None
+    
+    @pytest.mark.unit
+    def test_verificar_contenido_acepta_archivo_tocado(self):
+        """Prueba que con hash de contenido un cambio de fecha sin cambios no invalida"""
+        cache = CacheResultados(self.ruta_cache, verificar_contenido=True)
+        cache.guardar(self.archivo, 3, Counter({'hola': 2, 'mundo': 1}))
+        info = os.stat(self.archivo)
+        os.utime(self.archivo, ns=(info.st_atime_ns, info.st_mtime_ns + 10 ** 9))
+        
+        assert cache.buscar(self.archivo) == (3, Counter({'hola': 2, 'mundo': 1}), None)
+    
+    @pytest.mark.unit
+    def test_limite_elimina_entradas_menos_usadas(self):
+        """Prueba el desalojo LRU al superar el tamaño máximo"""
+        otro = self._crear_archivo_prueba("otro.txt", "adiós")
+        cache = CacheResultados(self.ruta_cache, tamano_maximo=1)
+        
+        cache.guardar(self.archivo, 3, Counter({'hola': 2, 'mundo': 1}))
+        cache.guardar(otro, 1, Counter({'adiós': 1}))
+        
+        assert cache.buscar(self.archivo) is None
+    
+    @pytest.mark.unit
+    def test_guardar_no_recorre_la_tabla(self):
+        """Prueba que guardar lleva el tamaño total sin sumar todas las entradas"""
+        otro = self._crear_archivo_prueba("otro.txt", "adiós")
+        cache = CacheResultados(self.ruta_cache, tamano_maximo=10 ** 6)
+        sentencias = []
+        cache.conexion.set_trace_callback(sentencias.append)
+        
+        cache.guardar(self.archivo, 3, Counter({'hola': 2, 'mundo': 1}))
+        cache.guardar(self.archivo, 3, Counter({'hola': 2, 'mundo': 1}))
+        cache.guardar(otro, 1, Counter({'adiós': 1}))
+        
+        assert not [sentencia for sentencia in sentencias if 'SUM(' in sentencia]
+        ocupado = cache.conexion.execute("SELECT bytes FROM ocupacion").fetchone()[0]
+        assert ocupado == cache.conexion.execute("SELECT SUM(LENGTH(datos)) FROM entradas").fetchone()[0]
+    
+    @pytest.mark.unit
+    def test_usos_se_escriben_por_lotes(self):
+        """Prueba que los aciertos no escriben en la base de datos uno a uno y que cuentan para el LRU"""
+        otro = self._crear_archivo_prueba("otro.txt", "adiós")
+        cache = CacheResultados(self.ruta_cache)
+        cache.guardar(self.archivo, 3, Counter({'hola': 2, 'mundo': 1}))
+        cache.guardar(otro, 1, Counter({'adiós': 1}))
+        sentencias = []
+        cache.conexion.set_trace_callback(sentencias.append)
+        
+        for _ in range(10):
+            assert cache.buscar(self.archivo) is not None
+        
+        assert not [sentencia for sentencia in sentencias if sentencia.startswith('UPDATE')]
+        # Al guardar se escriben antes de desalojar: el archivo usado no es el que sale
+        cache.tamano_maximo = cache.conexion.execute("SELECT bytes FROM ocupacion").fetchone()[0]
+        tercero = self._crear_archivo_prueba("tercero.txt", "uno")
+        cache.guardar(tercero, 1, Counter({'uno': 1}))
+        assert cache.buscar(self.archivo) is not None
+        assert cache.buscar(otro) is None
+        cache.cerrar()
+    
+    @pytest.mark.unit
+    def test_contador_responde_desde_cache_sin_abrir(self):
+        """Prueba que ContadorPalabras no abre un archivo sin cambios que está en caché"""
+        cache = CacheResultados(self.ruta_cache)
+        ContadorPalabras(cache=cache).procesar_archivo(self.archivo)
+        contador = ContadorPalabras(motor='streaming', cache=cache)
+        
+        with patch('builtins.open', side_effect=AssertionError("no debe abrir el archivo")):
+            exito, mensaje = contador.procesar_archivo(self.archivo)
+        
+        assert exito is True
+        assert contador.numero_total_palabras == 3
+        assert contador.obtener_estadisticas()['palabras_mas_frecuentes'] == [('hola', 2), ('mundo', 1)]
+    
+    @pytest.mark.integration
+    @pytest.mark.parametrize("usar_hilos", [True, False])
+    def test_lote_registra_los_aciertos(self, usar_hilos):
+        """Prueba que una segunda pasada del lote con la caché caliente actualiza el último uso"""
+        procesador = ProcesadorLotes(num_trabajadores=2, usar_hilos=usar_hilos, ruta_cache=self.ruta_cache)
+        procesador.procesar([self.archivo])
+        consulta = "SELECT ultimo_uso FROM entradas"
+        with sqlite3.connect(self.ruta_cache) as conexion:
+            primer_uso = conexion.execute(consulta).fetchone()[0]
+        
+        resumen = procesador.procesar([self.archivo])
+        
+        assert resumen['numero_total_palabras'] == 3
+        with sqlite3.connect(self.ruta_cache) as conexion:
+            assert conexion.execute(consulta).fetchone()[0] > primer_uso
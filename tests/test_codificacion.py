@@ -0,0 +1,222 @@
+"""
+Pruebas para la detección de codificación y las políticas de errores de decodificación
+"""
+import io
+import os
+import json
+import codecs
+import tempfile
+from unittest.mock import patch
+import pytest
+from contador import (AlmacenIncremental, CacheResultados, ContadorPalabras, detectar_codificacion,
+                      es_compatible_ascii, main)
+
+
+class TestCodificacion:
+    """Clase de pruebas para la detección de codificación"""
+    
+    TEXTO = "canción corazón año\npingüino canción\n" * 40
+    
+    def setup_method(self):
+        """Configuración antes de cada prueba"""
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def teardown_method(self):
+        """Limpieza después de cada prueba"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def _crear_archivo_prueba(self, nombre, contenido):
+        """Método auxiliar para crear archivos de prueba a partir de bytes"""
+        ruta = os.path.join(self.temp_dir, nombre)
+        with open(ruta, 'wb') as f:
+            f.write(contenido)
+        return ruta
+    
+    @pytest.mark.parametrize("muestra, esperado", [
+        (codecs.BOM_UTF8 + "año".encode('utf-8'), ('utf-8-sig', 'bom')),
+        ("año".encode('utf-16'), ('utf-16', 'bom')),
+        ("año".encode('utf-32'), ('utf-32', 'bom')),
+        ("año".encode('utf-8'), ('utf-8', 'muestra')),
+        # El carácter final partido no invalida la muestra
+        ("año".encode('utf-8')[:-1] + b"\xc3", ('utf-8', 'muestra')),
+        ("€ año".encode('cp1252'), ('cp1252', 'muestra')),
+        (b"a\x81o", ('latin-1', 'muestra')),
+    ])
+    def test_detectar_codificacion(self, muestra, esperado):
+        """Prueba la detección por BOM y por muestra"""
+        assert detectar_codificacion(muestra) == esperado
+    
+    def test_compatibilidad_ascii(self):
+        """Prueba qué codificaciones admiten cortes en bytes de espacio"""
+        assert es_compatible_ascii('utf-8')
+        assert es_compatible_ascii('utf-8-sig')
+        assert es_compatible_ascii('cp1252')
+        assert not es_compatible_ascii('utf-16')
+        assert not es_compatible_ascii('utf-32')
+    
+    @pytest.mark.parametrize("motor", ['completo', 'streaming', 'paralelo', 'mmap'])
+    def test_latin1_automatico_por_motor(self, motor):
+        """Prueba que un archivo Latin-1 se lee en una sola pasada con cualquier motor"""
+        archivo = self._crear_archivo_prueba("latin1.txt", self.TEXTO.encode('latin-1'))
+        contador = ContadorPalabras(motor=motor, tamano_bloque=16, tamano_rango=128, num_procesos=2,
+                                    codificacion='auto')
+        
+        exito, mensaje = contador.procesar_archivo(archivo)
+        
+        assert exito is True, mensaje
+        assert contador.numero_total_palabras == 200
+        assert contador.contador_palabras['canción'] == 80
+        assert contador.informe_codificacion == {'codificacion': 'cp1252', 'origen': 'muestra',
+                                                 'errores': 'estricto', 'bytes_no_validos': 0}
+    
+    @pytest.mark.parametrize("motor", ['completo', 'streaming', 'paralelo', 'mmap'])
+    def test_utf16_con_bom(self, motor):
+        """Prueba que UTF-16 se detecta por el BOM y los motores por bytes pasan a streaming"""
+        archivo = self._crear_archivo_prueba("utf16.txt", self.TEXTO.encode('utf-16'))
+        contador = ContadorPalabras(motor=motor, tamano_bloque=16, tamano_rango=128, codificacion='auto')
+        
+        exito, mensaje = contador.procesar_archivo(archivo)
+        
+        assert exito is True, mensaje
+        assert contador.numero_total_palabras == 200
+        assert contador.contador_palabras['pingüino'] == 40
+        assert contador.informe_codificacion['origen'] == 'bom'
+    
+    def test_bom_utf8_no_se_cuenta(self):
+        """Prueba que el BOM de UTF-8 no queda pegado a la primera palabra"""
+        archivo = self._crear_archivo_prueba("bom.txt", codecs.BOM_UTF8 + "hola mundo hola".encode('utf-8'))
+        for motor in ('completo', 'streaming', 'mmap'):
+            contador = ContadorPalabras(motor=motor, codificacion='auto')
+            contador.procesar_archivo(archivo)
+            assert contador.contador_palabras['hola'] == 2
+    
+    def test_estricto_falla_por_defecto(self):
+        """Prueba que sin detección un archivo Latin-1 sigue fallando como antes"""
+        archivo = self._crear_archivo_prueba("latin1.txt", self.TEXTO.encode('latin-1'))
+        contador = ContadorPalabras(motor='streaming')
+        
+        exito, mensaje = contador.procesar_archivo(archivo)
+        
+        assert exito is False
+        assert "No se puede leer el archivo" in mensaje
+    
+    @pytest.mark.parametrize("politica, palabra", [
+        ('reemplazar', 'canci�n'),
+        ('omitir', 'cancin'),
+        ('bytes', 'canci\\xf3n'),
+    ])
+    def test_politicas_de_errores(self, politica, palabra):
+        """Prueba cada política con un archivo Latin-1 leído como UTF-8"""
+        archivo = self._crear_archivo_prueba("latin1.txt", "canción hola canción".encode('latin-1'))
+        contador = ContadorPalabras(motor='streaming', errores_decodificacion=politica)
+        
+        exito, _ = contador.procesar_archivo(archivo)
+        
+        assert exito is True
+        assert contador.contador_palabras[palabra] == 2
+        assert contador.informe_codificacion['bytes_no_validos'] == 2
+    
+    @pytest.mark.parametrize("motor", ['completo', 'streaming', 'paralelo', 'mmap'])
+    def test_bytes_no_validos_iguales_en_todos_los_motores(self, motor):
+        """Prueba que el recuento de bytes no válidos no depende del motor"""
+        archivo = self._crear_archivo_prueba("latin1.txt", self.TEXTO.encode('latin-1'))
+        contador = ContadorPalabras(motor=motor, tamano_bloque=16, tamano_rango=128, num_procesos=2,
+                                    errores_decodificacion='reemplazar')
+        
+        contador.procesar_archivo(archivo)
+        
+        # Tres 'ó', una 'ñ' y una 'ü' en cada repetición del texto
+        assert contador.informe_codificacion['bytes_no_validos'] == 5 * 40
+        assert contador.numero_total_palabras == 200
+    
+    def test_archivo_binario(self):
+        """Prueba que un archivo con bytes nulos se rechaza también con detección"""
+        archivo = self._crear_archivo_prueba("binario.bin", b"\x00\x01hola\x00")
+        contador = ContadorPalabras(motor='mmap', codificacion='auto', errores_decodificacion='omitir')
+        
+        exito, mensaje = contador.procesar_archivo(archivo)
+        
+        assert exito is False
+        assert "binario" in mensaje
+    
+    @pytest.mark.parametrize("motor", ['completo', 'streaming', 'paralelo', 'mmap', 'numpy'])
+    def test_byte_nulo_despues_de_la_muestra(self, motor):
+        """Prueba que un byte nulo fuera de la muestra de detección también rechaza el archivo"""
+        contenido = b"hola mundo " * 20000 + b"\x00" + b" adios" * 100
+        archivo = self._crear_archivo_prueba("binario.txt", contenido)
+        contador = ContadorPalabras(motor=motor, tamano_bloque=4096)
+        
+        exito, mensaje = contador.procesar_archivo(archivo)
+        
+        assert exito is False
+        assert "binario" in mensaje
+    
+    def test_byte_nulo_en_flujo(self):
+        """Prueba que un flujo se rechaza aunque el byte nulo llegue en un bloque posterior"""
+        contador = ContadorPalabras(tamano_bloque=7)
+        
+        exito, mensaje = contador.procesar_flujo(io.BytesIO(b"hola " * 20000 + b"\x00"))
+        
+        assert exito is False
+        assert "binario" in mensaje
+    
+    def test_acierto_de_cache_conserva_codificacion(self):
+        """Prueba que un resultado servido por la caché mantiene el informe de codificación"""
+        archivo = self._crear_archivo_prueba("latin1.txt", self.TEXTO.encode('latin-1'))
+        cache = CacheResultados(os.path.join(self.temp_dir, "cache.sqlite"))
+        primero = ContadorPalabras(codificacion='auto', cache=cache)
+        primero.procesar_archivo(archivo)
+        
+        segundo = ContadorPalabras(codificacion='auto', cache=cache)
+        with patch.object(ContadorPalabras, '_procesar_completo', side_effect=AssertionError):
+            exito, _ = segundo.procesar_archivo(archivo)
+        
+        assert exito is True
+        assert segundo.obtener_estadisticas()['codificacion'] == primero.obtener_estadisticas()['codificacion']
+        assert segundo.obtener_estadisticas()['codificacion']['codificacion'] == 'cp1252'
+    
+    def test_flujo_con_deteccion(self):
+        """Prueba la detección en un flujo leído en bloques más pequeños que la muestra"""
+        contador = ContadorPalabras(tamano_bloque=7, codificacion='auto')
+        
+        exito, _ = contador.procesar_flujo(io.BytesIO(self.TEXTO.encode('cp1252')))
+        
+        assert exito is True
+        assert contador.contador_palabras['año'] == 40
+        assert contador.obtener_estadisticas()['codificacion']['codificacion'] == 'cp1252'
+    
+    def test_incremental_con_deteccion(self):
+        """Prueba que el modo incremental decodifica lo añadido con la codificación detectada"""
+        archivo = self._crear_archivo_prueba("registro.log", "canción año ".encode('latin-1'))
+        almacen = AlmacenIncremental(os.path.join(self.temp_dir, "estado"))
+        contador = ContadorPalabras(motor='streaming', incremental=almacen, codificacion='auto')
+        contador.procesar_archivo(archivo)
+        
+        with open(archivo, 'ab') as f:
+            f.write("pingüino canción\n".encode('latin-1'))
+        exito, _ = contador.procesar_archivo(archivo)
+        
+        assert exito is True
+        assert contador.contador_palabras == {'canción': 2, 'año': 1, 'pingüino': 1}
+    
+    def test_codificacion_desconocida(self):
+        """Prueba que una codificación inexistente se rechaza al crear el contador"""
+        with pytest.raises(ValueError):
+            ContadorPalabras(codificacion='no-existe')
+        with pytest.raises(ValueError):
+            ContadorPalabras(errores_decodificacion='ignorar')
+    
+    @pytest.mark.integration
+    def test_cli_informe_por_archivo(self, capsys):
+        """Prueba que la salida JSON del lote incluye la codificación de cada archivo"""
+        latin1 = self._crear_archivo_prueba("latin1.txt", self.TEXTO.encode('latin-1'))
+        utf8 = self._crear_archivo_prueba("utf8.txt", self.TEXTO.encode('utf-8'))
+        
+        codigo = main(['--hilos', '-f', 'json', '--codificacion', 'auto', latin1, utf8])
+        
+        assert codigo == 0
+        resumen = json.loads(capsys.readouterr().out)
+        codificaciones = [archivo['codificacion']['codificacion'] for archivo in resumen['archivos']]
+        assert codificaciones == ['cp1252', 'utf-8']
+        assert resumen['corpus']['numero_total_palabras'] == 400
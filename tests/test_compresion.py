@@ -0,0 +1,132 @@
+"""
+Pruebas de la lectura transparente de archivos comprimidos
+"""
+import bz2
+import gzip
+import io
+import lzma
+import os
+import struct
+import tempfile
+import zlib
+import pytest
+from contador import ContadorPalabras, detectar_compresion, es_bgzf
+
+
+def _comprimir_bgzf(datos, tamano_bloque=50):
+    """Genera un archivo BGZF (gzip en bloques, como bgzip) sin depender de herramientas externas"""
+    resultado = b""
+    for inicio in range(0, len(datos), tamano_bloque):
+        trozo = datos[inicio:inicio + tamano_bloque]
+        compresor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        comprimido = compresor.compress(trozo) + compresor.flush()
+        tamano_total = 18 + len(comprimido) + 8
+        cabecera = (b'\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00' +
+                    struct.pack('<H', tamano_total - 1))
+        resultado += cabecera + comprimido + struct.pack('<II', zlib.crc32(trozo), len(trozo))
+    return resultado
+
+
+class TestCompresion:
+    """Clase de pruebas para la descompresión al vuelo"""
+    
+    CONTENIDO = "canción corazón uno dos\nuno café tres uno\n" * 40
+    
+    def setup_method(self):
+        """Configuración antes de cada prueba"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.referencia = ContadorPalabras()
+        self.referencia.procesar_flujo(io.StringIO(self.CONTENIDO))
+    
+    def teardown_method(self):
+        """Limpieza después de cada prueba"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def _crear_archivo_binario(self, nombre, datos):
+        """Método auxiliar para crear archivos binarios de prueba"""
+        ruta = os.path.join(self.temp_dir, nombre)
+        with open(ruta, 'wb') as f:
+            f.write(datos)
+        return ruta
+    
+    def _comprobar_igual_que_referencia(self, contador):
+        """Método auxiliar que compara un conteo con el del texto sin comprimir"""
+        assert contador.numero_total_palabras == self.referencia.numero_total_palabras
+        assert contador.contador_palabras == self.referencia.contador_palabras
+    
+    @pytest.mark.unit
+    @pytest.mark.parametrize("nombre, comprimir, formato", [
+        ("texto.txt.gz", gzip.compress, 'gzip'),
+        ("texto.txt.bz2", bz2.compress, 'bz2'),
+        ("texto.txt.xz", lzma.compress, 'xz'),
+    ])
+    def test_formatos_comprimidos(self, nombre, comprimir, formato):
+        """Prueba que cada formato se detecta y se cuenta igual que el texto plano"""
+        ruta = self._crear_archivo_binario(nombre, comprimir(self.CONTENIDO.encode('utf-8')))
+        
+        for motor in ['completo', 'streaming', 'mmap', 'paralelo']:
+            contador = ContadorPalabras(motor=motor, tamano_bloque=7)
+            exito, mensaje = contador.procesar_archivo(ruta)
+            
+            assert detectar_compresion(ruta) == formato
+            assert exito is True, mensaje
+            self._comprobar_igual_que_referencia(contador)
+    
+    @pytest.mark.unit
+    def test_gzip_varios_miembros(self):
+        """Prueba un gzip formado por varios miembros concatenados"""
+        datos = self.CONTENIDO.encode('utf-8')
+        mitad = len(datos) // 2
+        ruta = self._crear_archivo_binario("miembros.gz", gzip.compress(datos[:mitad]) + gzip.compress(datos[mitad:]))
+        contador = ContadorPalabras(motor='streaming')
+        
+        exito, mensaje = contador.procesar_archivo(ruta)
+        
+        assert exito is True, mensaje
+        self._comprobar_igual_que_referencia(contador)
+    
+    @pytest.mark.unit
+    def test_bgzf_descompresion_paralela(self):
+        """Prueba que un archivo BGZF se descomprime en paralelo con el mismo resultado"""
+        ruta = self._crear_archivo_binario("bloques.gz", _comprimir_bgzf(self.CONTENIDO.encode("utf-8"), 10))
+        contador = ContadorPalabras(motor='streaming', num_procesos=3)
+        
+        exito, mensaje = contador.procesar_archivo(ruta)
+        
+        assert es_bgzf(ruta) is True
+        assert exito is True, mensaje
+        self._comprobar_igual_que_referencia(contador)
+    
+    @pytest.mark.unit
+    def test_flujo_comprimido(self):
+        """Prueba que un flujo binario comprimido (p. ej. la entrada estándar) se descomprime"""
+        flujo = io.BufferedReader(io.BytesIO(gzip.compress(self.CONTENIDO.encode('utf-8'))))
+        contador = ContadorPalabras(tamano_bloque=5)
+        
+        exito, mensaje = contador.procesar_flujo(flujo)
+        
+        assert exito is True, mensaje
+        self._comprobar_igual_que_referencia(contador)
+    
+    @pytest.mark.unit
+    def test_texto_que_empieza_como_bz2(self):
+        """Prueba que un texto que empieza por 'BZh' no se toma por bz2"""
+        ruta = self._crear_archivo_binario("bzh.txt", "BZh es una palabra".encode('utf-8'))
+        
+        exito, _ = self.referencia.procesar_archivo(ruta)
+        
+        assert detectar_compresion(ruta) is None
+        assert exito is True
+        assert self.referencia.numero_total_palabras == 4
+    
+    @pytest.mark.unit
+    def test_gzip_danado(self):
+        """Prueba que un gzip dañado produce un error y no un resultado parcial silencioso"""
+        datos = gzip.compress(self.CONTENIDO.encode('utf-8'))
+        ruta = self._crear_archivo_binario("danado.gz", datos[:len(datos) // 2])
+        
+        exito, mensaje = ContadorPalabras(motor='streaming').procesar_archivo(ruta)
+        
+        assert exito is False
+        assert "Error al procesar el archivo" in mensaje
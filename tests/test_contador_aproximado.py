@@ -0,0 +1,127 @@
+"""
+Pruebas unitarias para la clase ContadorAproximado
+"""
+import os
+import json
+import random
+import tempfile
+from collections import Counter
+import pytest
+from contador import ContadorAproximado, ContadorPalabras, main
+
+
+class TestContadorAproximado:
+    """Clase de pruebas para ContadorAproximado"""
+    
+    def setup_method(self):
+        """Configuración antes de cada prueba"""
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def teardown_method(self):
+        """Limpieza después de cada prueba"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def _generar_palabras(self, cantidad, vocabulario):
+        """Método auxiliar que genera palabras con una distribución muy sesgada"""
+        aleatorio = random.Random(42)
+        pesos = [1 / (rango + 1) for rango in range(vocabulario)]
+        return aleatorio.choices([f"p{i}" for i in range(vocabulario)], weights=pesos, k=cantidad)
+    
+    @pytest.mark.unit
+    def test_exacto_si_cabe_el_vocabulario(self):
+        """Prueba que con capacidad suficiente el resultado es exacto"""
+        palabras = self._generar_palabras(2000, 20)
+        aproximado = ContadorAproximado(capacidad=20)
+        aproximado.update(palabras)
+        
+        assert dict(aproximado.items()) == dict(Counter(palabras))
+        assert aproximado.error_maximo() == 0
+    
+    @pytest.mark.unit
+    def test_memoria_acotada_y_cotas_de_error(self):
+        """Prueba que la tabla no crece y que las cotas contienen el valor real"""
+        palabras = self._generar_palabras(20000, 3000)
+        exacto = Counter(palabras)
+        aproximado = ContadorAproximado(capacidad=50)
+        for inicio in range(0, len(palabras), 1000):
+            aproximado.update(palabras[inicio:inicio + 1000])
+        
+        assert len(aproximado) == 50
+        assert aproximado.total == len(palabras)
+        for palabra, frecuencia, error in aproximado.cotas():
+            assert frecuencia - error <= exacto[palabra] <= frecuencia
+        for palabra, frecuencia in exacto.items():
+            if palabra not in aproximado:
+                assert frecuencia <= aproximado.error_maximo()
+    
+    @pytest.mark.unit
+    def test_recupera_las_mas_frecuentes(self):
+        """Prueba que las palabras muy frecuentes aparecen en el top"""
+        palabras = self._generar_palabras(20000, 3000)
+        aproximado = ContadorAproximado(capacidad=100)
+        aproximado.update(palabras)
+        
+        top_exacto = [palabra for palabra, _ in Counter(palabras).most_common(3)]
+        top_aproximado = [palabra for palabra, _ in aproximado.most_common(3)]
+        
+        assert top_aproximado == top_exacto
+    
+    @pytest.mark.unit
+    def test_contador_palabras_modo_aproximado(self):
+        """Prueba el modo aproximado de ContadorPalabras"""
+        ruta = os.path.join(self.temp_dir, "texto.txt")
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(" ".join(self._generar_palabras(5000, 500)))
+        contador = ContadorPalabras(motor='streaming', tamano_bloque=100, capacidad_aproximada=30)
+        
+        exito, mensaje = contador.procesar_archivo(ruta)
+        estadisticas = contador.obtener_estadisticas()
+        
+        assert exito is True
+        assert estadisticas['numero_total_palabras'] == 5000
+        assert estadisticas['conteo_aproximado'] is True
+        assert len(estadisticas['errores_frecuencia']) == 10
+        assert len(contador.contador_palabras) <= 30
+    
+    @pytest.mark.unit
+    def test_modo_aproximado_requiere_streaming(self):
+        """Prueba que el modo aproximado solo se admite con el motor streaming"""
+        with pytest.raises(ValueError):
+            ContadorPalabras(motor='completo', capacidad_aproximada=10)
+    
+    @pytest.mark.integration
+    def test_cli_aproximado(self, capsys):
+        """Prueba la opción --aproximado del modo lote y la cota de error del corpus"""
+        palabras = self._generar_palabras(6000, 400)
+        rutas = []
+        for i in range(3):
+            ruta = os.path.join(self.temp_dir, f"texto{i}.txt")
+            with open(ruta, 'w', encoding='utf-8') as f:
+                f.write(" ".join(palabras[i * 2000:(i + 1) * 2000]))
+            rutas.append(ruta)
+        
+        codigo = main(rutas + ['--hilos', '--aproximado', '20', '-f', 'json', '-n', '3'])
+        
+        documento = json.loads(capsys.readouterr().out)
+        corpus = documento['corpus']
+        assert codigo == 0
+        assert corpus['numero_total_palabras'] == 6000
+        assert corpus['conteo_aproximado'] is True
+        assert all(registro['conteo_aproximado'] for registro in documento['archivos'])
+        exactas = Counter(palabras)
+        for palabra, frecuencia in corpus['palabras_mas_frecuentes']:
+            assert abs(frecuencia - exactas[palabra]) <= corpus['error_maximo']
+    
+    @pytest.mark.integration
+    @pytest.mark.parametrize("opciones", [['--aproximado', '10', '--motor', 'mmap'],
+                                          ['--aproximado', '0'],
+                                          ['--aproximado', '10', '--vocabulario-compacto']])
+    def test_cli_aproximado_no_valido(self, opciones):
+        """Prueba que --aproximado se valida como el constructor: solo con el motor streaming"""
+        ruta = os.path.join(self.temp_dir, "texto.txt")
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write("hola mundo")
+        
+        with pytest.raises(SystemExit):
+            main([ruta] + opciones)
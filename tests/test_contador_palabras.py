@@ -210,3 +210,234 @@ class TestContadorPalabras:
         assert "primera" in self.contador.palabras
         assert "línea" in self.contador.palabras
         assert self.contador.palabras.count("línea") == 3
+    
+    @pytest.mark.unit
+    def test_motor_desconocido(self):
+        """Prueba que un motor desconocido se rechaza al crear el contador"""
+        with pytest.raises(ValueError):
+            ContadorPalabras(motor='inexistente')
+    
+    @pytest.mark.unit
+    def test_streaming_igual_que_completo(self):
+        """Prueba que el modo streaming da el mismo resultado que el modo completo"""
+        contenido = "uno  dos\ttres\ncuatro\xa0cinco café\u3000uno\r\ndos uno corazón  \n"
+        archivo = self._crear_archivo_prueba("streaming.txt", contenido * 7)
+        self.contador.procesar_archivo(archivo)
+        
+        for tamano_bloque in [1, 2, 3, 5, 8, 1024]:
+            contador_streaming = ContadorPalabras(motor='streaming', tamano_bloque=tamano_bloque)
+            exito, mensaje = contador_streaming.procesar_archivo(archivo)
+            
+            assert exito is True
+            assert mensaje == ""
+            assert contador_streaming.numero_total_palabras == self.contador.numero_total_palabras
+            assert contador_streaming.contador_palabras == self.contador.contador_palabras
+            assert (contador_streaming.obtener_estadisticas() ==
+                    self.contador.obtener_estadisticas())
+    
+    @pytest.mark.unit
+    def test_streaming_no_guarda_texto(self):
+        """Prueba que el modo streaming no conserva el texto ni la lista de palabras"""
+        archivo = self._crear_archivo_prueba("sin_copia.txt", "hola mundo hola")
+        contador = ContadorPalabras(motor='streaming', tamano_bloque=4)
+        
+        exito, _ = contador.procesar_archivo(archivo)
+        
+        assert exito is True
+        assert contador.contenido == ""
+        assert contador.palabras == []
+        assert contador.numero_total_palabras == 3
+        assert contador.contador_palabras['hola'] == 2
+    
+    @pytest.mark.unit
+    def test_streaming_archivo_inexistente(self):
+        """Prueba el modo streaming con un archivo que no existe"""
+        contador = ContadorPalabras(motor='streaming')
+        
+        exito, mensaje = contador.procesar_archivo(os.path.join(self.temp_dir, "no_existe.txt"))
+        
+        assert exito is False
+        assert "Error al procesar el archivo" in mensaje
+    
+    @pytest.mark.unit
+    def test_paralelo_igual_que_completo(self):
+        """Prueba que el modo paralelo da el mismo resultado que el modo completo"""
+        contenido = "uno dos\ttres\ncuatro\x1ccinco café\u3000uno\r\ndos uno corazón  \n"
+        archivo = self._crear_archivo_prueba("paralelo.txt", contenido * 50)
+        self.contador.procesar_archivo(archivo)
+        
+        contador_paralelo = ContadorPalabras(motor='paralelo', num_procesos=3, tamano_rango=37)
+        exito, mensaje = contador_paralelo.procesar_archivo(archivo)
+        
+        assert exito is True
+        assert mensaje == ""
+        assert contador_paralelo.numero_total_palabras == self.contador.numero_total_palabras
+        assert contador_paralelo.contador_palabras == self.contador.contador_palabras
+        assert contador_paralelo.obtener_estadisticas() == self.contador.obtener_estadisticas()
+    
+    @pytest.mark.unit
+    def test_calcular_rangos_alineados_en_espacios(self):
+        """Prueba que los rangos cubren el archivo y no parten palabras"""
+        from contador import calcular_rangos
+        contenido = "palabralarga corta otra_palabra_mas_larga fin"
+        archivo = self._crear_archivo_prueba("rangos.txt", contenido)
+        
+        rangos = calcular_rangos(archivo, 5)
+        
+        assert rangos[0][0] == 0
+        assert rangos[-1][1] == len(contenido)
+        for (_, fin), (inicio, _) in zip(rangos, rangos[1:]):
+            assert fin == inicio
+            assert contenido[fin] == " "
+    
+    @pytest.mark.unit
+    def test_paralelo_archivo_no_utf8(self):
+        """Prueba el modo paralelo con un archivo que no es UTF-8 válido"""
+        archivo = os.path.join(self.temp_dir, "latin1.txt")
+        with open(archivo, 'wb') as f:
+            f.write("canción corazón ".encode('latin-1') * 20)
+        
+        contador = ContadorPalabras(motor='paralelo', num_procesos=2, tamano_rango=16)
+        exito, mensaje = contador.procesar_archivo(archivo)
+        
+        assert exito is False
+        assert "No se puede leer el archivo" in mensaje
+    
+    @pytest.mark.unit
+    def test_mmap_igual_que_completo(self):
+        """Prueba que el modo mmap da el mismo resultado que el modo completo"""
+        contenido = "uno dos\ttres\ncuatro\x1ccinco café\u3000uno\r\ndos\xa0uno corazón  \n"
+        archivo = self._crear_archivo_prueba("mmap.txt", contenido * 20)
+        self.contador.procesar_archivo(archivo)
+        
+        for tamano_bloque in [1, 7, 4096]:
+            contador_mmap = ContadorPalabras(motor='mmap', tamano_bloque=tamano_bloque)
+            exito, mensaje = contador_mmap.procesar_archivo(archivo)
+            
+            assert exito is True
+            assert mensaje == ""
+            assert contador_mmap.numero_total_palabras == self.contador.numero_total_palabras
+            assert contador_mmap.contador_palabras == self.contador.contador_palabras
+    
+    @pytest.mark.unit
+    def test_mmap_archivo_vacio(self):
+        """Prueba el modo mmap con un archivo vacío"""
+        archivo = self._crear_archivo_prueba("vacio.txt", "")
+        contador = ContadorPalabras(motor='mmap')
+        
+        exito, mensaje = contador.procesar_archivo(archivo)
+        
+        assert exito is True
+        assert contador.obtener_estadisticas()['archivo_vacio'] is True
+    
+    @pytest.mark.unit
+    def test_mmap_archivo_no_utf8(self):
+        """Prueba el modo mmap con un archivo que no es UTF-8 válido"""
+        archivo = os.path.join(self.temp_dir, "latin1.txt")
+        with open(archivo, 'wb') as f:
+            f.write("canción corazón".encode('latin-1'))
+        
+        exito, mensaje = ContadorPalabras(motor='mmap').procesar_archivo(archivo)
+        
+        assert exito is False
+        assert "No se puede leer el archivo" in mensaje
+    
+    @pytest.mark.unit
+    def test_obtener_estadisticas_top_configurable(self):
+        """Prueba que el número de palabras más frecuentes es configurable"""
+        contenido = " ".join(f"palabra{i} " * (i + 1) for i in range(30))
+        archivo = self._crear_archivo_prueba("top.txt", contenido)
+        self.contador.procesar_archivo(archivo)
+        
+        top_3 = self.contador.obtener_estadisticas(3)['palabras_mas_frecuentes']
+        todas = self.contador.obtener_estadisticas(None)['palabras_mas_frecuentes']
+        
+        assert top_3 == [('palabra29', 30), ('palabra28', 29), ('palabra27', 28)]
+        assert len(todas) == 30
+        assert todas[:3] == top_3
+    
+    @pytest.mark.unit
+    def test_empates_resueltos_alfabeticamente(self):
+        """Prueba que los empates no dependen del orden de aparición"""
+        archivo1 = self._crear_archivo_prueba("a.txt", "zeta alfa beta zeta alfa beta")
+        archivo2 = self._crear_archivo_prueba("b.txt", "beta alfa zeta beta zeta alfa")
+        
+        self.contador.procesar_archivo(archivo1)
+        estadisticas1 = self.contador.obtener_estadisticas(2)
+        self.contador.procesar_archivo(archivo2)
+        estadisticas2 = self.contador.obtener_estadisticas(2)
+        
+        assert estadisticas1 == estadisticas2
+        assert estadisticas1['palabras_mas_frecuentes'] == [('alfa', 2), ('beta', 2)]
+    
+    @pytest.mark.unit
+    def test_mostrar_resultados_top_configurable(self, capsys):
+        """Prueba mostrar resultados con un número distinto de palabras"""
+        archivo = self._crear_archivo_prueba("mostrar_n.txt", "uno dos dos tres tres tres")
+        self.contador.procesar_archivo(archivo)
+        
+        self.contador.mostrar_resultados(archivo, 2)
+        output = capsys.readouterr().out
+        
+        assert "Las 2 palabras más frecuentes son:" in output
+        assert "'tres' - 3 veces" in output
+        assert "'uno'" not in output
+    
+    @pytest.mark.unit
+    def test_procesar_flujo_binario(self):
+        """Prueba el conteo de un flujo binario con caracteres partidos entre bloques"""
+        import io
+        contador = ContadorPalabras(tamano_bloque=3)
+        
+        exito, mensaje = contador.procesar_flujo(io.BytesIO("café corazón café\n".encode('utf-8')))
+        
+        assert exito is True
+        assert contador.numero_total_palabras == 3
+        assert contador.contador_palabras['café'] == 2
+    
+    @pytest.mark.unit
+    def test_procesar_flujo_texto(self):
+        """Prueba el conteo de un flujo de texto"""
+        import io
+        contador = ContadorPalabras(tamano_bloque=2)
+        
+        exito, mensaje = contador.procesar_flujo(io.StringIO("uno dos uno"))
+        
+        assert exito is True
+        assert contador.numero_total_palabras == 3
+        assert contador.contador_palabras['uno'] == 2
+    
+    @pytest.mark.unit
+    def test_procesar_entrada_estandar(self):
+        """Prueba que la ruta '-' lee la entrada estándar"""
+        import io
+        from unittest.mock import patch
+        entrada = io.TextIOWrapper(io.BytesIO("hola hola mundo".encode('utf-8')), encoding='utf-8')
+        
+        with patch('sys.stdin', entrada):
+            exito, mensaje = self.contador.procesar_archivo('-')
+        
+        assert exito is True
+        assert self.contador.numero_total_palabras == 3
+        assert self.contador.contador_palabras['hola'] == 2
+    
+    @pytest.mark.unit
+    def test_procesar_tuberia_con_nombre(self):
+        """Prueba que una tubería con nombre se lee en streaming con cualquier motor"""
+        import threading
+        tuberia = os.path.join(self.temp_dir, "tuberia")
+        os.mkfifo(tuberia)
+        
+        def escribir():
+            with open(tuberia, 'w', encoding='utf-8') as f:
+                f.write("uno dos tres")
+        
+        escritor = threading.Thread(target=escribir)
+        escritor.start()
+        contador = ContadorPalabras(motor='mmap')
+        exito, mensaje = contador.procesar_archivo(tuberia)
+        escritor.join()
+        
+        assert exito is True
+        assert mensaje == ""
+        assert contador.numero_total_palabras == 3
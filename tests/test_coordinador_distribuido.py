@@ -0,0 +1,206 @@
+"""
+Pruebas para CoordinadorDistribuido y los trabajadores de la cola de archivos
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+import pytest
+from contador import (PALABRAS_VACIAS, ContadorPalabras, CoordinadorDistribuido, Tokenizador,
+                      cargar_tabla_frecuencias, ejecutar_trabajador_cola, main)
+
+
+class TestCoordinadorDistribuido:
+    """Clase de pruebas para CoordinadorDistribuido"""
+    
+    def setup_method(self):
+        """Configuración antes de cada prueba"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cola = os.path.join(self.temp_dir, "cola")
+        self.grande = self._crear_archivo_prueba("grande.txt", "uno dos tres cuatro cinco seis\n" * 200)
+        self.pequenos = [self._crear_archivo_prueba(f"pequeno{i}.txt", f"uno dos palabra{i}\n")
+                         for i in range(5)]
+    
+    def teardown_method(self):
+        """Limpieza después de cada prueba"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def _crear_archivo_prueba(self, nombre, contenido):
+        """Método auxiliar para crear archivos de prueba"""
+        ruta = os.path.join(self.temp_dir, nombre)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(contenido)
+        return ruta
+    
+    def _conteo_esperado(self, rutas):
+        """Método auxiliar: conteo de referencia de varios archivos"""
+        total, contador_total = 0, Counter()
+        for ruta in rutas:
+            contador = ContadorPalabras()
+            contador.procesar_archivo(ruta)
+            total += contador.numero_total_palabras
+            contador_total.update(contador.contador_palabras)
+        return total, contador_total
+    
+    def _trabajadores_en_hilos(self, cantidad):
+        """Método auxiliar: arranca trabajadores de la cola en hilos de este proceso"""
+        hilos = [threading.Thread(target=ejecutar_trabajador_cola, args=(self.cola, f"hilo{i}", 0.01))
+                 for i in range(cantidad)]
+        for hilo in hilos:
+            hilo.start()
+        return hilos
+    
+    def test_planificar_rangos_y_grupos(self):
+        """Prueba que los archivos grandes se parten en rangos y los pequeños se agrupan"""
+        coordinador = CoordinadorDistribuido(self.cola, tamano_fragmento=1000)
+        fragmentos = coordinador.planificar([self.grande] + self.pequenos)
+        
+        rangos = [f for f in fragmentos if 'ruta' in f]
+        grupos = [f for f in fragmentos if 'rutas' in f]
+        assert len(rangos) > 1
+        assert rangos[0]['inicio'] == 0 and rangos[-1]['fin'] == os.path.getsize(self.grande)
+        assert len(grupos) == 1 and len(grupos[0]['rutas']) == 5
+        assert len({f['id'] for f in fragmentos}) == len(fragmentos)
+    
+    def test_resultado_igual_al_conteo_local(self):
+        """Prueba que el resultado combinado coincide con contar todo en un proceso"""
+        coordinador = CoordinadorDistribuido(self.cola, tamano_fragmento=500)
+        coordinador.repartir([self.grande] + self.pequenos)
+        hilos = self._trabajadores_en_hilos(3)
+        resultado = coordinador.esperar(n=3, intervalo=0.01)
+        for hilo in hilos:
+            hilo.join()
+        
+        total, contador = self._conteo_esperado([self.grande] + self.pequenos)
+        assert resultado['numero_total_palabras'] == total
+        assert resultado['fragmentos_fallidos'] == []
+        assert cargar_tabla_frecuencias(resultado['tabla_frecuencias']) == (total, contador)
+        assert resultado['palabras_mas_frecuentes'][0] == ('dos', 205)
+    
+    def test_reintentos_y_fragmentos_fallidos(self):
+        """Prueba que un fragmento que falla siempre se reintenta y acaba en fallidos"""
+        coordinador = CoordinadorDistribuido(self.cola, tamano_fragmento=1000, max_intentos=2)
+        coordinador.repartir([self.pequenos[0], self.grande])
+        # Los rangos de un archivo que desaparece fallan al leerse en el nodo
+        os.remove(self.grande)
+        hilos = self._trabajadores_en_hilos(2)
+        resultado = coordinador.esperar(intervalo=0.01)
+        for hilo in hilos:
+            hilo.join()
+        
+        assert resultado['numero_total_palabras'] == 3
+        assert len(resultado['fragmentos_fallidos']) > 1
+        assert [error['ruta'] for error in resultado['archivos_con_error']] == [self.grande]
+        with open(os.path.join(self.cola, 'fallidos', f"{resultado['fragmentos_fallidos'][0]['id']}.json")) as f:
+            assert json.load(f)['intentos'] == 2
+    
+    def test_archivo_erroneo_no_hace_fallar_su_fragmento(self):
+        """Prueba que un archivo binario o inexistente se anota y el resto de su grupo se cuenta"""
+        binario = os.path.join(self.temp_dir, "binario.txt")
+        with open(binario, 'wb') as f:
+            f.write(b"\x00\x01hola\x00")
+        inexistente = os.path.join(self.temp_dir, "no_existe.txt")
+        coordinador = CoordinadorDistribuido(self.cola, max_intentos=2)
+        fragmentos = coordinador.repartir([self.pequenos[0], binario, inexistente, self.pequenos[1]])
+        hilos = self._trabajadores_en_hilos(1)
+        resultado = coordinador.esperar(intervalo=0.01)
+        for hilo in hilos:
+            hilo.join()
+        
+        assert len(fragmentos) == 1
+        assert resultado['numero_total_palabras'] == 6
+        assert resultado['fragmentos_fallidos'] == []
+        assert [error['ruta'] for error in resultado['archivos_con_error']] == [binario, inexistente]
+        assert "binario" in resultado['archivos_con_error'][0]['mensaje_error']
+    
+    def test_rango_no_decodificable(self):
+        """Prueba que un archivo con un rango que no se puede decodificar no suma ninguno de sus rangos"""
+        with open(self.grande, 'a', encoding='latin-1') as f:
+            f.write("canción\n")
+        coordinador = CoordinadorDistribuido(self.cola, tamano_fragmento=1000)
+        coordinador.repartir([self.grande, self.pequenos[0]])
+        hilos = self._trabajadores_en_hilos(2)
+        resultado = coordinador.esperar(intervalo=0.01)
+        for hilo in hilos:
+            hilo.join()
+        
+        assert resultado['numero_total_palabras'] == 3
+        assert resultado['fragmentos_fallidos'] == []
+        assert [error['ruta'] for error in resultado['archivos_con_error']] == [self.grande]
+    
+    def test_recupera_fragmentos_de_nodos_caidos(self):
+        """Prueba que un fragmento en curso demasiado tiempo vuelve a la cola"""
+        coordinador = CoordinadorDistribuido(self.cola, tamano_fragmento=10, tiempo_maximo=0.05)
+        fragmentos = coordinador.repartir(self.pequenos[:2])
+        # Simula un nodo que reclamó el primer fragmento y se cayó
+        nombre = f"{fragmentos[0]['id']}.json"
+        os.rename(os.path.join(self.cola, 'pendientes', nombre),
+                  os.path.join(self.cola, 'en_curso', f"{nombre}.nodo_caido"))
+        time.sleep(0.1)
+        
+        hilos = self._trabajadores_en_hilos(1)
+        resultado = coordinador.esperar(intervalo=0.01)
+        for hilo in hilos:
+            hilo.join()
+        
+        assert resultado['numero_total_palabras'] == 6
+        assert resultado['fragmentos_fallidos'] == []
+    
+    def test_configuracion_llega_a_los_trabajadores(self):
+        """Prueba que tokenizador y palabras vacías se aplican en los nodos"""
+        ruta = self._crear_archivo_prueba("mayusculas.txt", "El gato y EL perro, el gato.")
+        coordinador = CoordinadorDistribuido(self.cola, tokenizador=Tokenizador(minusculas=True, quitar_puntuacion=True),
+                                             palabras_vacias=PALABRAS_VACIAS['es'])
+        coordinador.repartir([ruta])
+        hilos = self._trabajadores_en_hilos(1)
+        resultado = coordinador.esperar(intervalo=0.01)
+        for hilo in hilos:
+            hilo.join()
+        
+        assert resultado['palabras_mas_frecuentes'] == [('gato', 2), ('perro', 1)]
+    
+    def test_rechaza_entrada_estandar(self):
+        """Prueba que la entrada estándar no se puede repartir"""
+        with pytest.raises(ValueError):
+            CoordinadorDistribuido(self.cola).repartir(['-'])
+    
+    @pytest.mark.integration
+    def test_cli_con_procesos_locales(self, capsys):
+        """Prueba el modo distribuido con varios procesos que hacen de nodos"""
+        codigo = main(['-f', 'json', '--distribuido', self.cola, '--nodos-locales', '2',
+                       '--tamano-fragmento', '1000', self.grande] + self.pequenos)
+        
+        assert codigo == 0
+        salida = json.loads(capsys.readouterr().out)
+        total, _ = self._conteo_esperado([self.grande] + self.pequenos)
+        assert salida['corpus']['numero_total_palabras'] == total
+        assert salida['corpus']['archivos_procesados'] == 6
+    
+    @pytest.mark.integration
+    @pytest.mark.parametrize("tamano", ['0', '-100'])
+    def test_cli_tamano_fragmento_no_valido(self, capsys, tamano):
+        """Prueba que un --tamano-fragmento no positivo es un error de uso, no una traza"""
+        with pytest.raises(SystemExit) as salida:
+            main(['--distribuido', self.cola, '--nodos-locales', '1', '--tamano-fragmento', tamano] + self.pequenos)
+        
+        assert salida.value.code == 2
+        assert "--tamano-fragmento debe ser mayor que cero" in capsys.readouterr().err
+    
+    @pytest.mark.integration
+    def test_cli_con_archivo_binario(self, capsys):
+        """Prueba que el modo distribuido informa de un archivo binario como el modo lote"""
+        binario = os.path.join(self.temp_dir, "binario.txt")
+        with open(binario, 'wb') as f:
+            f.write(b"\x00\x01hola\x00")
+        entradas = [self.pequenos[0], binario, self.pequenos[1]]
+        
+        codigo = main(['-f', 'json', '--distribuido', self.cola, '--nodos-locales', '1'] + entradas)
+        
+        assert codigo == 1
+        corpus = json.loads(capsys.readouterr().out)['corpus']
+        assert corpus['numero_total_palabras'] == 6
+        assert corpus['archivos_procesados'] == 2
+        assert corpus['archivos_con_error'] == 1
@@ -0,0 +1,100 @@
+"""
+Pruebas para ExportadorResultados y los formatos de salida de la línea de comandos
+"""
+import csv
+import io
+import json
+import os
+import tempfile
+from unittest.mock import patch
+import pytest
+from contador import ExportadorResultados, InterfazUsuario, main
+
+
+class TestExportadorResultados:
+    """Clase de pruebas para ExportadorResultados"""
+    
+    def setup_method(self):
+        """Configuración antes de cada prueba"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.archivo1 = self._crear_archivo_prueba("uno.txt", "hola mundo hola")
+        self.archivo2 = self._crear_archivo_prueba("dos.md", "mundo, adiós")
+        self.inexistente = os.path.join(self.temp_dir, "no_existe.txt")
+    
+    def teardown_method(self):
+        """Limpieza después de cada prueba"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def _crear_archivo_prueba(self, nombre, contenido):
+        """Método auxiliar para crear archivos de prueba"""
+        ruta = os.path.join(self.temp_dir, nombre)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(contenido)
+        return ruta
+    
+    @pytest.mark.integration
+    def test_salida_json(self, capsys):
+        """Prueba la salida JSON con un registro por archivo y el corpus"""
+        codigo = main(['--hilos', '-f', 'json', self.archivo1, self.archivo2])
+        
+        documento = json.loads(capsys.readouterr().out)
+        
+        assert codigo == 0
+        assert [registro['ruta'] for registro in documento['archivos']] == [self.archivo1, self.archivo2]
+        assert documento['archivos'][0]['numero_total_palabras'] == 3
+        assert documento['archivos'][0]['palabras_mas_frecuentes'][0] == ['hola', 2]
+        assert documento['corpus']['numero_total_palabras'] == 5
+    
+    @pytest.mark.integration
+    def test_salida_csv(self, capsys):
+        """Prueba la salida CSV con una fila por archivo"""
+        codigo = main(['--hilos', '-f', 'csv', self.archivo1, self.inexistente])
+        
+        filas = list(csv.DictReader(io.StringIO(capsys.readouterr().out)))
+        
+        assert codigo == 1
+        assert len(filas) == 2
+        assert filas[0]['numero_total_palabras'] == '3'
+        assert json.loads(filas[0]['palabras_mas_frecuentes'])[0] == ['hola', 2]
+        assert filas[1]['exito'] == 'False'
+    
+    @pytest.mark.integration
+    def test_salida_ndjson(self, capsys):
+        """Prueba la salida NDJSON, una línea por archivo y una final del corpus"""
+        codigo = main(['--hilos', '-f', 'ndjson', self.archivo1, self.archivo2])
+        
+        registros = [json.loads(linea) for linea in capsys.readouterr().out.splitlines()]
+        
+        assert codigo == 0
+        assert [registro['tipo'] for registro in registros] == ['archivo', 'archivo', 'corpus']
+        assert registros[1]['palabras_mas_frecuentes'] == [['adiós', 1], ['mundo,', 1]]
+    
+    @pytest.mark.integration
+    def test_lista_rutas_desde_stdin(self, capsys):
+        """Prueba la lectura de rutas desde la entrada estándar"""
+        with patch('sys.stdin', io.StringIO(f"{self.archivo1}\n\n{self.archivo2}\n")):
+            codigo = main(['--hilos', '-f', 'json', '--lista-rutas', '-'])
+        
+        documento = json.loads(capsys.readouterr().out)
+        
+        assert codigo == 0
+        assert len(documento['archivos']) == 2
+    
+    @pytest.mark.unit
+    @patch('builtins.input')
+    def test_sin_confirmar_extension(self, mock_input):
+        """Prueba que se puede desactivar la pregunta por la extensión .txt"""
+        interfaz = InterfazUsuario(confirmar_extension=False)
+        
+        assert interfaz.validar_extension_archivo(self.archivo2) is True
+        mock_input.assert_not_called()
+    
+    @pytest.mark.unit
+    def test_registro_archivo_con_error(self):
+        """Prueba que un archivo fallido produce un registro con todos los campos"""
+        registro = ExportadorResultados.registro_archivo(
+            {'ruta': 'x.txt', 'exito': False, 'mensaje_error': 'error'})
+        
+        assert registro['numero_total_palabras'] == 0
+        assert registro['palabras_mas_frecuentes'] == []
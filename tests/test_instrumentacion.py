@@ -0,0 +1,144 @@
+"""
+Pruebas para Instrumentacion y sus sumideros de métricas
+"""
+import json
+import os
+import sys
+import tempfile
+import pytest
+from contador import (ContadorPalabras, Instrumentacion, ProcesadorLotes,
+                      SumideroJSON, SumideroPrometheus, main)
+
+
+class TestInstrumentacion:
+    """Clase de pruebas para Instrumentacion"""
+    
+    def setup_method(self):
+        """Configuración antes de cada prueba"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.archivo = self._crear_archivo_prueba("texto.txt", "hola mundo hola\nadiós mundo\n" * 50)
+    
+    def teardown_method(self):
+        """Limpieza después de cada prueba"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def _crear_archivo_prueba(self, nombre, contenido):
+        """Método auxiliar para crear archivos de prueba"""
+        ruta = os.path.join(self.temp_dir, nombre)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(contenido)
+        return ruta
+    
+    def test_tiempos_exclusivos_en_fases_anidadas(self):
+        """Prueba que el tiempo de una fase anidada no se suma a la exterior"""
+        instrumentacion = Instrumentacion()
+        instrumentacion.iniciar("prueba")
+        with instrumentacion.fase('exterior'):
+            with instrumentacion.fase('interior'):
+                sum(range(100000))
+        resumen = instrumentacion.finalizar(True, 0)
+        
+        fases = resumen['fases']
+        assert fases['interior']['segundos'] > 0
+        assert fases['exterior']['segundos'] < resumen['segundos'] - fases['interior']['segundos'] + 1e-3
+    
+    @pytest.mark.parametrize("motor", ['completo', 'streaming', 'paralelo', 'mmap'])
+    def test_fases_por_motor(self, motor):
+        """Prueba que cada motor informa de lectura, separación y conteo sin alterar el resultado"""
+        instrumentacion = Instrumentacion()
+        contador = ContadorPalabras(motor=motor, tamano_bloque=64, instrumentacion=instrumentacion)
+        exito, _ = contador.procesar_archivo(self.archivo)
+        
+        assert exito is True
+        assert contador.numero_total_palabras == 250
+        estadisticas = contador.obtener_estadisticas()
+        resumen = estadisticas['instrumentacion']
+        assert resumen['ruta'] == self.archivo
+        assert resumen['numero_total_palabras'] == 250
+        assert resumen['rss_maximo_bytes'] > 0
+        if motor == 'paralelo':
+            assert {'rangos', 'trabajadores', 'combinacion'} <= set(resumen['fases'])
+        else:
+            assert {'lectura', 'separacion', 'conteo'} <= set(resumen['fases'])
+            assert resumen['fases']['lectura']['bytes'] == os.path.getsize(self.archivo)
+    
+    def test_palabras_por_fase_en_streaming(self):
+        """Prueba que la fase de separación cuenta las palabras producidas"""
+        instrumentacion = Instrumentacion()
+        contador = ContadorPalabras(motor='streaming', tamano_bloque=16, instrumentacion=instrumentacion)
+        contador.procesar_archivo(self.archivo)
+        
+        assert instrumentacion.ultimo_resumen['fases']['separacion']['palabras'] == 250
+    
+    def test_sin_modulo_resource(self, monkeypatch):
+        """Prueba que donde no existe resource (Windows) el resumen se envía sin el RSS"""
+        monkeypatch.setitem(sys.modules, 'resource', None)
+        instrumentacion = Instrumentacion()
+        contador = ContadorPalabras(motor='streaming', instrumentacion=instrumentacion)
+        exito, _ = contador.procesar_archivo(self.archivo)
+        
+        assert exito is True
+        assert 'rss_maximo_bytes' not in instrumentacion.ultimo_resumen
+        assert instrumentacion.ultimo_resumen['numero_total_palabras'] == 250
+    
+    def test_medir_memoria(self):
+        """Prueba que con medir_memoria se informa del pico de memoria de cada fase"""
+        instrumentacion = Instrumentacion(medir_memoria=True)
+        contador = ContadorPalabras(motor='completo', instrumentacion=instrumentacion)
+        contador.procesar_archivo(self.archivo)
+        
+        for datos in instrumentacion.ultimo_resumen['fases'].values():
+            assert 'memoria_pico_bytes' in datos
+    
+    def test_error_se_registra(self):
+        """Prueba que un archivo con error también se envía a los sumideros"""
+        ruta_metricas = os.path.join(self.temp_dir, "metricas.jsonl")
+        instrumentacion = Instrumentacion(sumideros=[SumideroJSON(ruta_metricas)])
+        contador = ContadorPalabras(instrumentacion=instrumentacion)
+        exito, _ = contador.procesar_archivo(os.path.join(self.temp_dir, "no_existe.txt"))
+        
+        assert exito is False
+        with open(ruta_metricas, encoding='utf-8') as f:
+            registro = json.loads(f.readline())
+        assert registro['exito'] is False
+    
+    def test_sumidero_prometheus(self):
+        """Prueba que el sumidero de Prometheus acumula los totales de varios archivos"""
+        ruta_metricas = os.path.join(self.temp_dir, "contador.prom")
+        instrumentacion = Instrumentacion(sumideros=[SumideroPrometheus(ruta_metricas)])
+        contador = ContadorPalabras(instrumentacion=instrumentacion)
+        contador.procesar_archivo(self.archivo)
+        contador.procesar_archivo(self.archivo)
+        
+        with open(ruta_metricas, encoding='utf-8') as f:
+            texto = f.read()
+        assert 'contador_palabras_archivos_total{resultado="exito"} 2' in texto
+        assert 'contador_palabras_palabras_total 500' in texto
+        assert 'contador_palabras_fase_segundos_total{fase="conteo"}' in texto
+    
+    def test_lote_con_metricas(self):
+        """Prueba que el lote envía a los sumideros las métricas de cada trabajador"""
+        ruta_metricas = os.path.join(self.temp_dir, "metricas.jsonl")
+        otro = self._crear_archivo_prueba("otro.txt", "uno dos tres")
+        procesador = ProcesadorLotes(num_trabajadores=2, usar_hilos=True,
+                                     sumideros_metricas=[SumideroJSON(ruta_metricas)])
+        procesador.procesar([self.archivo, otro])
+        
+        with open(ruta_metricas, encoding='utf-8') as f:
+            registros = [json.loads(linea) for linea in f]
+        assert [r['ruta'] for r in registros] == [self.archivo, otro]
+        assert [r['numero_total_palabras'] for r in registros] == [250, 3]
+    
+    @pytest.mark.integration
+    def test_cli_metricas(self, capsys):
+        """Prueba las opciones de métricas de la línea de comandos"""
+        ruta_json = os.path.join(self.temp_dir, "metricas.jsonl")
+        ruta_prometheus = os.path.join(self.temp_dir, "contador.prom")
+        codigo = main(['--hilos', '-f', 'json', '--metricas-json', ruta_json,
+                       '--metricas-prometheus', ruta_prometheus, self.archivo])
+        
+        assert codigo == 0
+        assert os.path.getsize(ruta_json) > 0
+        with open(ruta_prometheus, encoding='utf-8') as f:
+            assert 'contador_palabras_palabras_total 250' in f.read()
@@ -0,0 +1,187 @@
+"""
+Pruebas para el motor 'numpy' y ConteoVectorizado
+"""
+import os
+import tempfile
+from collections import Counter
+import pytest
+import contador
+from contador import ConteoVectorizado, ContadorPalabras, ProcesadorLotes, Tokenizador
+
+
+class TestMotorNumpy:
+    """Clase de pruebas para el motor 'numpy'"""
+    
+    TEXTO = ("Hola mundo, hola canción\nel año del pingüino\tpalabras_muy_largas_de_verdad "
+             "palabras_muy_largas_de_otra_forma\r\nun\x0bdos\x0ctres \n") * 30
+    
+    def setup_method(self):
+        """Configuración antes de cada prueba"""
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def teardown_method(self):
+        """Limpieza después de cada prueba"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def _crear_archivo_prueba(self, nombre, contenido, codificacion='utf-8'):
+        """Método auxiliar para crear archivos de prueba"""
+        ruta = os.path.join(self.temp_dir, nombre)
+        with open(ruta, 'w', encoding=codificacion, newline='') as f:
+            f.write(contenido)
+        return ruta
+    
+    def _contar(self, archivo, motor, **opciones):
+        """Método auxiliar que cuenta un archivo y comprueba que no hay error"""
+        contador_palabras = ContadorPalabras(motor=motor, **opciones)
+        exito, mensaje = contador_palabras.procesar_archivo(archivo)
+        assert exito is True, mensaje
+        return contador_palabras
+    
+    def test_sin_numpy_cuenta_como_mmap(self, monkeypatch):
+        """Prueba que sin NumPy instalado el motor cuenta igual que 'mmap'"""
+        archivo = self._crear_archivo_prueba("texto.txt", self.TEXTO)
+        monkeypatch.setattr(contador, 'numpy', None)
+        
+        resultado = self._contar(archivo, 'numpy', tamano_bloque=16)
+        
+        referencia = self._contar(archivo, 'mmap', tamano_bloque=16)
+        assert resultado.contador_palabras == referencia.contador_palabras
+        with pytest.raises(RuntimeError):
+            ConteoVectorizado()
+    
+    @pytest.mark.parametrize("tamano_bloque", [1, 7, 16, 1024 * 1024])
+    def test_igual_que_mmap(self, tamano_bloque):
+        """Prueba que el conteo y el orden de las claves coinciden con los del motor 'mmap'"""
+        pytest.importorskip('numpy')
+        archivo = self._crear_archivo_prueba("texto.txt", self.TEXTO)
+        opciones = {'tamano_bloque': tamano_bloque,
+                    'tokenizador': Tokenizador(minusculas=True, quitar_puntuacion=True),
+                    'palabras_vacias': frozenset({'el', 'del'})}
+        
+        resultado = self._contar(archivo, 'numpy', **opciones)
+        
+        referencia = self._contar(archivo, 'mmap', **opciones)
+        assert resultado.contador_palabras == referencia.contador_palabras
+        assert list(resultado.contador_palabras) == list(referencia.contador_palabras)
+        assert resultado.obtener_estadisticas() == referencia.obtener_estadisticas()
+        assert resultado.contador_palabras['palabras_muy_largas_de_verdad'] == 30
+    
+    @pytest.mark.parametrize("hash_forzado", [
+        lambda octetos, inicios, longitudes: longitudes * 0,
+        lambda octetos, inicios, longitudes: (octetos[inicios] & 0xFF).astype('uint64'),
+    ])
+    @pytest.mark.parametrize("tamano_bloque", [12, 1024])
+    def test_colisiones_de_hash(self, monkeypatch, hash_forzado, tamano_bloque):
+        """Prueba que las colisiones dentro de un segmento y entre segmentos no alteran el conteo"""
+        pytest.importorskip('numpy')
+        # Solo una palabra corta: entre dos cortas el hash real no puede colisionar
+        archivo = self._crear_archivo_prueba("texto.txt", "alfabetos betabloqueo azul bocadillos "
+                                                          "alfabetos betabloqueo aeropuertos " * 20)
+        monkeypatch.setattr(ConteoVectorizado, '_hashes_palabras',
+                            lambda self, octetos, inicios, longitudes: hash_forzado(octetos, inicios, longitudes))
+        
+        resultado = self._contar(archivo, 'numpy', tamano_bloque=tamano_bloque)
+        
+        assert resultado.contador_palabras == {'alfabetos': 40, 'betabloqueo': 40, 'azul': 20,
+                                               'bocadillos': 20, 'aeropuertos': 20}
+        assert list(resultado.contador_palabras) == ['alfabetos', 'betabloqueo', 'azul', 'bocadillos',
+                                                     'aeropuertos']
+    
+    @pytest.mark.parametrize("minimo_pendientes", [1, 1 << 20])
+    def test_vocabulario_casi_sin_repeticiones(self, monkeypatch, minimo_pendientes):
+        """Prueba que pasar a contar directamente a mitad de archivo no altera el conteo ni el orden"""
+        pytest.importorskip('numpy')
+        repetidas = "Hola mundo, hola canción " * 40
+        unicas = " ".join(f"palabra_{indice}" for indice in range(2000))
+        archivo = self._crear_archivo_prueba("texto.txt", repetidas + unicas + " " + repetidas)
+        monkeypatch.setattr(ConteoVectorizado, 'PALABRAS_MUESTRA', 100)
+        monkeypatch.setattr(ConteoVectorizado, 'MINIMO_PENDIENTES', minimo_pendientes)
+        
+        resultado = self._contar(archivo, 'numpy', tamano_bloque=4096)
+        
+        referencia = self._contar(archivo, 'mmap', tamano_bloque=4096)
+        assert resultado.contador_palabras == referencia.contador_palabras
+        assert list(resultado.contador_palabras) == list(referencia.contador_palabras)
+        assert resultado.obtener_estadisticas() == referencia.obtener_estadisticas()
+    
+    def test_palabras_cortas_sin_colisiones(self):
+        """Prueba que las palabras de hasta 7 bytes distintas nunca comparten hash"""
+        numpy = pytest.importorskip('numpy')
+        palabras = [b"a", b"a\x00", b"\x00", b"ab", b"ba", b"abcdefg", b"abcdef", b"abcdefh"]
+        datos = numpy.frombuffer(b" ".join(palabras) + b"\x00" * 8, dtype=numpy.uint8)
+        longitudes = numpy.array([len(palabra) for palabra in palabras])
+        inicios = numpy.cumsum(longitudes + 1) - longitudes - 1
+        
+        hashes = ConteoVectorizado()._hashes_palabras(contador._vista_octetos(datos), inicios, longitudes)
+        
+        assert len(set(hashes.tolist())) == len(palabras)
+    
+    @pytest.mark.parametrize("forzar_colision", [False, True])
+    def test_claves_unidas_como_contador_bytes(self, monkeypatch, forzar_colision):
+        """Prueba que el vocabulario sacado de la arena de una vez coincide con contador_bytes"""
+        pytest.importorskip('numpy')
+        if forzar_colision:
+            monkeypatch.setattr(ConteoVectorizado, '_hashes_palabras',
+                                lambda self, octetos, inicios, longitudes: longitudes * 0)
+        conteo = ConteoVectorizado()
+        conteo.contar("hola mundo hola año\n".encode('utf-8'))
+        conteo.contar("pingüino_muy_largo mundo adiós".encode('utf-8'))
+        
+        unidas, frecuencias, aparte = conteo.claves_unidas()
+        
+        combinado = Counter(dict(zip(unidas.split(b" "), frecuencias)))
+        combinado.update(aparte)
+        assert list(combinado.items()) == list(conteo.contador_bytes().items())
+        assert bool(aparte) == forzar_colision
+    
+    @pytest.mark.parametrize("motor", ['mmap', 'numpy'])
+    @pytest.mark.parametrize("codificacion, errores", [('utf-8', 'estricto'), ('utf-8-sig', 'estricto'),
+                                                       ('utf-8', 'reemplazar'), ('utf-8', 'omitir')])
+    def test_vocabulario_que_no_decodifica_palabra_a_palabra(self, motor, codificacion, errores):
+        """Prueba los casos en que una clave no da una sola palabra distinta, igual que el motor 'completo'"""
+        # Espacios Unicode dentro de una clave, dos claves que dan la misma palabra
+        # al reemplazar o quitar bytes no válidos y una clave que queda vacía (el BOM)
+        contenido = "hola\xa0mundo a\u3000b hola ".encode('utf-8')
+        if errores != 'estricto':
+            contenido += b"x\xff x\xfe \xfe x "
+        archivo = os.path.join(self.temp_dir, "texto.txt")
+        with open(archivo, 'wb') as f:
+            f.write("\ufeff ".encode('utf-8') + contenido * 3)
+        opciones = {'codificacion': codificacion, 'errores_decodificacion': errores, 'tamano_bloque': 8}
+        
+        resultado = self._contar(archivo, motor, **opciones)
+        
+        referencia = self._contar(archivo, 'completo', **opciones)
+        assert resultado.contador_palabras == referencia.contador_palabras
+        assert resultado.numero_total_palabras == referencia.numero_total_palabras
+        assert resultado.informe_codificacion == referencia.informe_codificacion
+    
+    def test_latin1_automatico(self):
+        """Prueba que un archivo Latin-1 se cuenta con la codificación detectada"""
+        pytest.importorskip('numpy')
+        archivo = self._crear_archivo_prueba("latin1.txt", self.TEXTO, codificacion='latin-1')
+        
+        resultado = self._contar(archivo, 'numpy', tamano_bloque=16, codificacion='auto')
+        
+        assert resultado.contador_palabras['canción'] == 30
+        assert resultado.informe_codificacion['codificacion'] == 'cp1252'
+    
+    def test_archivo_vacio_y_solo_espacios(self):
+        """Prueba que un archivo sin palabras deja el conteo vacío"""
+        pytest.importorskip('numpy')
+        for nombre, contenido in (("vacio.txt", ""), ("espacios.txt", " \n\t \r\n")):
+            resultado = self._contar(self._crear_archivo_prueba(nombre, contenido), 'numpy', tamano_bloque=4)
+            assert resultado.numero_total_palabras == 0
+            assert not resultado.contador_palabras
+    
+    @pytest.mark.parametrize("usar_hilos", [True, False])
+    def test_lote(self, usar_hilos):
+        """Prueba que el lote admite el motor 'numpy' con el mismo resultado"""
+        archivos = [self._crear_archivo_prueba(f"texto{i}.txt", self.TEXTO * (i + 1)) for i in range(3)]
+        
+        referencia = ProcesadorLotes(num_trabajadores=2, usar_hilos=usar_hilos, motor='mmap').procesar(archivos)
+        resumen = ProcesadorLotes(num_trabajadores=2, usar_hilos=usar_hilos, motor='numpy').procesar(archivos)
+        
+        assert resumen['contador_palabras'] == referencia['contador_palabras']
+        assert resumen['numero_total_palabras'] == referencia['numero_total_palabras']
@@ -0,0 +1,117 @@
+"""
+Pruebas para el conteo de n-gramas en ContadorPalabras
+"""
+import io
+import json
+import os
+import tempfile
+import pytest
+from contador import PALABRAS_VACIAS, ContadorPalabras, ProcesadorLotes, main
+
+
+class TestNgramas:
+    """Clase de pruebas para el conteo de n-gramas"""
+    
+    def setup_method(self):
+        """Configuración antes de cada prueba"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.archivo = self._crear_archivo_prueba("texto.txt", "casa de campo en la casa de campo\n" * 5)
+    
+    def teardown_method(self):
+        """Limpieza después de cada prueba"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def _crear_archivo_prueba(self, nombre, contenido):
+        """Método auxiliar para crear archivos de prueba"""
+        ruta = os.path.join(self.temp_dir, nombre)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(contenido)
+        return ruta
+    
+    @pytest.mark.parametrize("motor", ['completo', 'streaming', 'paralelo', 'mmap'])
+    @pytest.mark.parametrize("tamano_bloque", [1, 5, 1024])
+    def test_bigramas_cruzan_bloques(self, motor, tamano_bloque):
+        """Prueba que los bigramas son los mismos sea cual sea el tamaño de bloque"""
+        contador = ContadorPalabras(motor=motor, tamano_bloque=tamano_bloque, tamano_ngrama=2)
+        contador.procesar_archivo(self.archivo)
+        
+        assert contador.numero_total_palabras == 40
+        assert sum(contador.contador_ngramas.values()) == 39
+        assert contador.contador_ngramas['casa de'] == 10
+        assert contador.contador_ngramas['campo casa'] == 4
+    
+    def test_trigramas(self):
+        """Prueba el conteo de trigramas"""
+        contador = ContadorPalabras(motor='streaming', tamano_bloque=3, tamano_ngrama=3)
+        contador.procesar_flujo(io.BytesIO(b"a b c a b c"))
+        
+        assert contador.contador_ngramas == {'a b c': 2, 'b c a': 1, 'c a b': 1}
+    
+    def test_texto_mas_corto_que_el_ngrama(self):
+        """Prueba que un texto con menos palabras que n no produce n-gramas"""
+        contador = ContadorPalabras(motor='streaming', tamano_ngrama=3)
+        contador.procesar_flujo(io.BytesIO(b"hola mundo"))
+        
+        assert contador.contador_ngramas == {}
+        assert contador.obtener_estadisticas()['ngramas_mas_frecuentes'] == []
+    
+    def test_palabras_vacias_en_los_bordes(self):
+        """Prueba que se descartan los n-gramas que empiezan o acaban en palabra vacía"""
+        contador = ContadorPalabras(motor='streaming', tamano_ngrama=3, palabras_vacias=PALABRAS_VACIAS['es'])
+        contador.procesar_archivo(self.archivo)
+        
+        assert contador.contador_ngramas['casa de campo'] == 10
+        assert 'de campo en' not in contador.contador_ngramas
+    
+    def test_poda_acota_la_memoria(self):
+        """Prueba que maximo_ngramas limita los n-gramas distintos y conserva los frecuentes"""
+        texto = " ".join(["muy frecuente"] * 50 + [f"raro{i}" for i in range(200)])
+        contador = ContadorPalabras(motor='streaming', tamano_bloque=64, tamano_ngrama=2, maximo_ngramas=20)
+        contador.procesar_flujo(io.BytesIO(texto.encode('utf-8')))
+        
+        assert len(contador.contador_ngramas) <= 20
+        assert contador.ngramas_podados is True
+        assert contador.obtener_estadisticas(1)['ngramas_mas_frecuentes'][0][0] == 'muy frecuente'
+    
+    def test_opciones_incompatibles(self):
+        """Prueba que los n-gramas no se combinan con la caché ni con tamaños menores que 2"""
+        with pytest.raises(ValueError):
+            ContadorPalabras(tamano_ngrama=1)
+        with pytest.raises(ValueError):
+            ProcesadorLotes(tamano_ngrama=2, ruta_cache=os.path.join(self.temp_dir, "cache.db"))
+        with pytest.raises(ValueError):
+            ProcesadorLotes(tamano_ngrama=2, maximo_ngramas=1)
+    
+    def test_lote_combina_ngramas_del_corpus(self):
+        """Prueba que el lote suma los n-gramas de todos los archivos"""
+        otro = self._crear_archivo_prueba("otro.txt", "casa de campo")
+        procesador = ProcesadorLotes(num_trabajadores=2, usar_hilos=True, tamano_ngrama=2)
+        resumen = procesador.procesar([self.archivo, otro])
+        
+        assert resumen['contador_ngramas']['casa de'] == 11
+        assert resumen['archivos'][1]['ngramas_mas_frecuentes'][0] == ('casa de', 1)
+    
+    @pytest.mark.integration
+    def test_cli(self, capsys):
+        """Prueba la opción --ngramas de la línea de comandos"""
+        codigo = main(['--hilos', '-f', 'json', '--ngramas', '2', '-n', '1', self.archivo])
+        
+        assert codigo == 0
+        salida = json.loads(capsys.readouterr().out)
+        assert salida['corpus']['ngramas_mas_frecuentes'] == [['casa de', 10]]
+        assert salida['archivos'][0]['ngramas_podados'] is False
+    
+    @pytest.mark.integration
+    @pytest.mark.parametrize("opciones, mensaje", [
+        (['--ngramas', '2', '--maximo-ngramas', '1'], "--maximo-ngramas debe ser al menos 2"),
+        (['--ngramas', '2', '--maximo-ngramas', '-5'], "--maximo-ngramas debe ser al menos 2"),
+        (['--maximo-ngramas', '100'], "--maximo-ngramas requiere --ngramas"),
+    ])
+    def test_cli_maximo_ngramas_no_valido(self, capsys, opciones, mensaje):
+        """Prueba que un --maximo-ngramas no válido o sin --ngramas es un error de uso"""
+        with pytest.raises(SystemExit) as salida:
+            main(['--hilos'] + opciones + [self.archivo])
+        
+        assert salida.value.code == 2
+        assert mensaje in capsys.readouterr().err
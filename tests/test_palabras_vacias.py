@@ -0,0 +1,119 @@
+"""
+Pruebas para el filtrado de palabras vacías en ContadorPalabras
+"""
+import json
+import os
+import tempfile
+import pytest
+from contador import (PALABRAS_VACIAS, ContadorPalabras, ProcesadorLotes, Tokenizador,
+                      cargar_palabras_vacias, main)
+
+
+class TestPalabrasVacias:
+    """Clase de pruebas para las palabras vacías"""
+    
+    def setup_method(self):
+        """Configuración antes de cada prueba"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.archivo = self._crear_archivo_prueba(
+            "texto.txt", "el gato de la casa que come el pescado de la abuela\n" * 10)
+    
+    def teardown_method(self):
+        """Limpieza después de cada prueba"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def _crear_archivo_prueba(self, nombre, contenido):
+        """Método auxiliar para crear archivos de prueba"""
+        ruta = os.path.join(self.temp_dir, nombre)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(contenido)
+        return ruta
+    
+    def test_listas_incluidas(self):
+        """Prueba que las listas de español e inglés están incluidas"""
+        assert {'de', 'la', 'que', 'el'} <= PALABRAS_VACIAS['es']
+        assert {'the', 'of', 'and'} <= PALABRAS_VACIAS['en']
+    
+    def test_cargar_desde_archivo(self):
+        """Prueba que se combinan idiomas incluidos y archivos del usuario"""
+        ruta = self._crear_archivo_prueba("vacias.txt", "# comentario ignorado\ngato perro\nabuela\n")
+        palabras = cargar_palabras_vacias(['en', ruta])
+        
+        assert {'the', 'gato', 'perro', 'abuela'} <= palabras
+        assert 'comentario' not in palabras
+    
+    @pytest.mark.parametrize("motor", ['completo', 'streaming', 'paralelo', 'mmap'])
+    def test_filtrado_por_motor(self, motor):
+        """Prueba que las palabras vacías no entran en la tabla pero sí en el total"""
+        contador = ContadorPalabras(motor=motor, tamano_bloque=8, tamano_rango=64, num_procesos=2,
+                                    palabras_vacias=PALABRAS_VACIAS['es'])
+        contador.procesar_archivo(self.archivo)
+        
+        assert contador.numero_total_palabras == 120
+        assert dict(contador.contador_palabras) == {'gato': 10, 'casa': 10, 'come': 10,
+                                                    'pescado': 10, 'abuela': 10}
+    
+    def test_fuera_del_total(self):
+        """Prueba que con contar_vacias_en_total=False tampoco suman en el total"""
+        contador = ContadorPalabras(motor='streaming', palabras_vacias=PALABRAS_VACIAS['es'],
+                                    contar_vacias_en_total=False)
+        contador.procesar_archivo(self.archivo)
+        
+        assert contador.numero_total_palabras == 50
+    
+    def test_conteo_aproximado(self):
+        """Prueba que en modo aproximado las palabras vacías no ocupan entradas de la tabla"""
+        contador = ContadorPalabras(motor='streaming', capacidad_aproximada=5,
+                                    palabras_vacias=PALABRAS_VACIAS['es'], contar_vacias_en_total=False)
+        contador.procesar_archivo(self.archivo)
+        
+        assert contador.numero_total_palabras == 50
+        assert set(contador.contador_palabras) == {'gato', 'casa', 'come', 'pescado', 'abuela'}
+        assert contador.contador_palabras.error_maximo() == 0
+    
+    def test_se_comparan_normalizadas(self):
+        """Prueba que las palabras vacías se comparan después de normalizar"""
+        ruta = self._crear_archivo_prueba("mayusculas.txt", "El gato, DE la casa.")
+        contador = ContadorPalabras(motor='streaming', palabras_vacias=PALABRAS_VACIAS['es'],
+                                    tokenizador=Tokenizador(minusculas=True, quitar_puntuacion=True))
+        contador.procesar_archivo(ruta)
+        
+        assert dict(contador.contador_palabras) == {'gato': 1, 'casa': 1}
+    
+    def test_firma_cambia_con_la_lista(self):
+        """Prueba que la caché distingue resultados con distintas palabras vacías"""
+        sin_vacias = ContadorPalabras()._firma_configuracion()
+        con_es = ContadorPalabras(palabras_vacias=PALABRAS_VACIAS['es'])._firma_configuracion()
+        con_en = ContadorPalabras(palabras_vacias=PALABRAS_VACIAS['en'])._firma_configuracion()
+        
+        assert len({sin_vacias, con_es, con_en}) == 3
+    
+    def test_lote(self):
+        """Prueba que la lista llega a los trabajadores del lote"""
+        procesador = ProcesadorLotes(num_trabajadores=2, palabras_vacias=PALABRAS_VACIAS['es'])
+        resumen = procesador.procesar([self.archivo])
+        
+        assert resumen['palabras_mas_frecuentes'][0] == ('abuela', 10)
+    
+    @pytest.mark.integration
+    def test_cli(self, capsys):
+        """Prueba las opciones de palabras vacías de la línea de comandos"""
+        codigo = main(['--hilos', '-f', 'json', '--palabras-vacias', 'es', '--vacias-fuera-del-total',
+                       self.archivo])
+        
+        assert codigo == 0
+        salida = json.loads(capsys.readouterr().out)
+        assert salida['corpus']['numero_total_palabras'] == 50
+    
+    @pytest.mark.integration
+    def test_cli_idioma_desconocido(self, capsys):
+        """Prueba que un idioma que no está incluido ni es un archivo da un error de uso con las opciones"""
+        with pytest.raises(SystemExit) as salida:
+            main(['--hilos', '--palabras-vacias', 'fr', self.archivo])
+        
+        assert salida.value.code == 2
+        error = capsys.readouterr().err
+        assert "idioma incluido (es, en)" in error
+        assert "ruta de un archivo" in error
+        assert "'fr'" in error
@@ -0,0 +1,180 @@
+"""
+Pruebas para PlanificadorTareas y su uso en ProcesadorLotes
+"""
+import os
+import tempfile
+import pytest
+import contador
+from contador import PlanificadorTareas, ProcesadorLotes, Tokenizador, main
+
+
+class TestPlanificadorTareas:
+    """Clase de pruebas para PlanificadorTareas"""
+    
+    TEXTO_GRANDE = "Hola mundo, hola canción\nel año del pingüino\n" * 200
+    
+    def setup_method(self):
+        """Configuración antes de cada prueba"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.grande = self._crear_archivo_prueba("grande.txt", self.TEXTO_GRANDE)
+        self.pequenos = [self._crear_archivo_prueba(f"pequeno{i}.txt", "hola el mundo " * (i + 1))
+                         for i in range(5)]
+    
+    def teardown_method(self):
+        """Limpieza después de cada prueba"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def _crear_archivo_prueba(self, nombre, contenido, codificacion='utf-8'):
+        """Método auxiliar para crear archivos de prueba"""
+        ruta = os.path.join(self.temp_dir, nombre)
+        with open(ruta, 'w', encoding=codificacion) as f:
+            f.write(contenido)
+        return ruta
+    
+    def _archivos(self, rutas):
+        """Describe las rutas como las recibe planificar"""
+        return [{'posicion': posicion, 'ruta': ruta, 'tamano': os.path.getsize(ruta)}
+                for posicion, ruta in enumerate(rutas)]
+    
+    @pytest.mark.unit
+    def test_agrupa_pequenos_y_divide_grandes(self):
+        """Prueba que los pequeños se agrupan y el grande se divide en rangos que lo cubren"""
+        planificador = PlanificadorTareas(tamano_tarea=1000)
+        archivos = self._archivos([self.grande] + self.pequenos)
+        
+        tareas = planificador.planificar(archivos, admite_rangos=lambda archivo: True)
+        
+        rangos = [tarea for tarea in tareas if 'inicio' in tarea]
+        grupos = [tarea for tarea in tareas if 'posiciones' in tarea]
+        assert len(rangos) > 1
+        assert sum(tarea['bytes'] for tarea in rangos) == os.path.getsize(self.grande)
+        assert {tarea['partes'] for tarea in rangos} == {len(rangos)}
+        assert len(grupos) == 1
+        assert grupos[0]['posiciones'] == [1, 2, 3, 4, 5]
+    
+    @pytest.mark.unit
+    def test_de_mayor_a_menor(self):
+        """Prueba que las tareas se entregan de la más grande a la más pequeña"""
+        planificador = PlanificadorTareas(tamano_tarea=100)
+        archivos = self._archivos(self.pequenos + [self.grande])
+        
+        tareas = planificador.planificar(archivos)
+        
+        tamanos = [tarea['bytes'] for tarea in tareas]
+        assert tamanos == sorted(tamanos, reverse=True)
+        # Sin admite_rangos el archivo grande va entero, y el primero
+        assert tareas[0] == {'posiciones': [5], 'bytes': os.path.getsize(self.grande)}
+    
+    @pytest.mark.unit
+    def test_maximo_archivos_por_tarea(self):
+        """Prueba que un grupo no supera el máximo de archivos"""
+        planificador = PlanificadorTareas(tamano_tarea=10 ** 6, maximo_archivos_tarea=2)
+        
+        tareas = planificador.planificar(self._archivos(self.pequenos))
+        
+        assert sorted(tarea['posiciones'] for tarea in tareas) == [[0, 1], [2, 3], [4]]
+    
+    @pytest.mark.unit
+    def test_tamano_objetivo(self):
+        """Prueba que en un lote grande se usa tamano_tarea y en uno pequeño un mínimo"""
+        planificador = PlanificadorTareas(tamano_tarea=64 * 1024 ** 2, num_trabajadores=4)
+        
+        assert planificador.tamano_objetivo(10 ** 12) == 64 * 1024 ** 2
+        assert planificador.tamano_objetivo(1000) == PlanificadorTareas.TAMANO_MINIMO_TAREA
+        with pytest.raises(ValueError):
+            PlanificadorTareas(tamano_tarea=0)
+    
+    @pytest.mark.parametrize("usar_hilos", [True, False])
+    def test_lote_dividido_igual_que_entero(self, usar_hilos):
+        """Prueba que dividir los archivos grandes en rangos no cambia el resultado"""
+        opciones = {'num_trabajadores': 2, 'usar_hilos': usar_hilos, 'n': None,
+                    'tokenizador': Tokenizador(minusculas=True, quitar_puntuacion=True),
+                    'palabras_vacias': frozenset({'el', 'del'})}
+        entradas = self.pequenos + [self.grande]
+        
+        entero = ProcesadorLotes(**opciones).procesar(entradas)
+        dividido = ProcesadorLotes(tamano_tarea=100, **opciones).procesar(entradas)
+        
+        assert dividido == entero
+        assert dividido['contador_palabras']['hola'] == 400 + 15
+        assert list(dividido['contador_palabras']) == list(entero['contador_palabras'])
+    
+    def test_resultados_en_orden_de_entrada(self):
+        """Prueba que los resultados se emiten en el orden de entrada aunque el grande empiece antes"""
+        emitidos = []
+        procesador = ProcesadorLotes(num_trabajadores=3, usar_hilos=True, tamano_tarea=100)
+        entradas = self.pequenos + [self.grande]
+        
+        resumen = procesador.procesar(entradas, al_terminar_archivo=lambda r: emitidos.append(r['ruta']))
+        
+        assert emitidos == entradas
+        assert [r['ruta'] for r in resumen['archivos']] == entradas
+    
+    def test_rangos_con_codificacion_detectada(self):
+        """Prueba que los rangos de un archivo Latin-1 se cuentan con la codificación detectada"""
+        latin1 = self._crear_archivo_prueba("latin1.txt", self.TEXTO_GRANDE, codificacion='latin-1')
+        procesador = ProcesadorLotes(num_trabajadores=2, usar_hilos=True, tamano_tarea=100,
+                                     codificacion='auto')
+        
+        resumen = procesador.procesar([latin1])
+        
+        resultado = resumen['archivos'][0]
+        assert resultado['exito'] is True
+        assert resultado['codificacion']['codificacion'] == 'cp1252'
+        assert resumen['contador_palabras']['pingüino'] == 200
+    
+    def test_error_en_un_rango(self):
+        """Prueba que un rango que no se puede decodificar marca el archivo como fallido"""
+        latin1 = self._crear_archivo_prueba("latin1.txt", self.TEXTO_GRANDE, codificacion='latin-1')
+        procesador = ProcesadorLotes(num_trabajadores=2, usar_hilos=True, tamano_tarea=100)
+        
+        resumen = procesador.procesar([latin1, self.pequenos[0]])
+        
+        assert resumen['archivos_con_error'] == 1
+        assert "No se puede leer el archivo" in resumen['archivos'][0]['mensaje_error']
+        assert resumen['numero_total_palabras'] == 3
+    
+    def test_fallo_de_una_tarea(self, monkeypatch):
+        """Prueba que una tarea que falla fuera del conteo solo marca como fallidos sus archivos"""
+        contar_tarea = contador._contar_tarea_lote
+        fallidas = []
+        
+        def contar_tarea_fallando(tarea, contar_archivo):
+            rutas = [registro['ruta'] for registro in tarea.get('registros', [])]
+            if self.pequenos[0] in rutas or tarea.get('inicio') == 0:
+                fallidas.extend(rutas or [tarea['ruta']])
+                raise RuntimeError("trabajador caído")
+            return contar_tarea(tarea, contar_archivo)
+        
+        monkeypatch.setattr(contador, '_contar_tarea_lote', contar_tarea_fallando)
+        procesador = ProcesadorLotes(num_trabajadores=2, usar_hilos=True, tamano_tarea=100)
+        
+        resumen = procesador.procesar(self.pequenos + [self.grande])
+        
+        fallidos = [r['ruta'] for r in resumen['archivos'] if not r['exito']]
+        assert fallidos == [ruta for ruta in self.pequenos + [self.grande] if ruta in fallidas]
+        assert self.grande in fallidos and self.pequenos[0] in fallidos
+        assert len(fallidos) < len(resumen['archivos'])
+        assert all(r['mensaje_error'] == "❌ Error al procesar el archivo: trabajador caído"
+                   for r in resumen['archivos'] if not r['exito'])
+    
+    def test_ngramas_sin_dividir(self):
+        """Prueba que con n-gramas los archivos grandes se cuentan enteros"""
+        procesador = ProcesadorLotes(num_trabajadores=2, usar_hilos=True, tamano_tarea=100, tamano_ngrama=2)
+        
+        resumen = procesador.procesar([self.grande])
+        
+        # Un corte de rango perdería los bigramas que lo cruzan
+        assert resumen['contador_ngramas']['Hola mundo,'] == 200
+        assert resumen['contador_ngramas']['pingüino Hola'] == 199
+    
+    @pytest.mark.integration
+    def test_cli_tamano_tarea(self, capsys):
+        """Prueba la opción --tamano-tarea de la línea de comandos"""
+        codigo = main(['--hilos', '--tamano-tarea', '100', self.grande])
+        
+        assert codigo == 0
+        assert "El número total de palabras del corpus es: 1600" in capsys.readouterr().out
+        with pytest.raises(SystemExit):
+            main(['--tamano-tarea', '0', self.grande])
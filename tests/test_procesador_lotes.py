@@ -0,0 +1,221 @@
+"""
+Pruebas para la clase ProcesadorLotes y el modo lote de la línea de comandos
+"""
+import os
+import tempfile
+import threading
+from collections import Counter
+import pytest
+import contador
+from contador import PlanificadorTareas, ProcesadorLotes, main
+
+
+class TestProcesadorLotes:
+    """Clase de pruebas para ProcesadorLotes"""
+    
+    def setup_method(self):
+        """Configuración antes de cada prueba"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.archivo1 = self._crear_archivo_prueba("uno.txt", "hola mundo hola")
+        self.archivo2 = self._crear_archivo_prueba(os.path.join("sub", "dos.txt"), "mundo adiós")
+        self.archivo3 = self._crear_archivo_prueba(os.path.join("sub", "tres.log"), "hola")
+    
+    def teardown_method(self):
+        """Limpieza después de cada prueba"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def _crear_archivo_prueba(self, nombre, contenido):
+        """Método auxiliar para crear archivos de prueba"""
+        ruta = os.path.join(self.temp_dir, nombre)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(contenido)
+        return ruta
+    
+    @pytest.mark.unit
+    def test_expandir_directorio_recursivo(self):
+        """Prueba que un directorio se expande a todos sus archivos"""
+        rutas = ProcesadorLotes.expandir_entradas([self.temp_dir])
+        
+        assert sorted(rutas) == sorted([self.archivo1, self.archivo2, self.archivo3])
+    
+    @pytest.mark.unit
+    def test_expandir_con_ciclo_de_enlaces(self):
+        """Prueba que un enlace a una carpeta antecesora no hace fallar el recorrido"""
+        os.symlink("..", os.path.join(self.temp_dir, "sub", "arriba"))
+        bucle = os.path.join(self.temp_dir, "bucle.txt")
+        os.symlink("bucle.txt", bucle)
+        
+        registros = ProcesadorLotes.validar_entradas([self.temp_dir])
+        
+        validos = [registro['ruta'] for registro in registros if registro['valida']]
+        assert sorted(validos) == sorted([self.archivo1, self.archivo2, self.archivo3])
+        # El enlace que se apunta a sí mismo queda como un error de esa ruta
+        errores = [registro for registro in registros if not registro['valida']]
+        assert [registro['ruta'] for registro in errores] == [bucle]
+        assert errores[0]['mensaje_error'].startswith("❌")
+        
+        resumen = ProcesadorLotes(num_trabajadores=2, usar_hilos=True).procesar([self.temp_dir])
+        assert resumen['numero_total_palabras'] == 6
+        assert resumen['archivos_con_error'] == 1
+    
+    @pytest.mark.unit
+    def test_expandir_patron_glob_sin_duplicados(self):
+        """Prueba la expansión de patrones glob sin repetir archivos"""
+        patron = os.path.join(self.temp_dir, '**', '*.txt')
+        
+        rutas = ProcesadorLotes.expandir_entradas([patron, self.archivo1])
+        
+        assert sorted(rutas) == sorted([self.archivo1, self.archivo2])
+    
+    @pytest.mark.unit
+    def test_procesar_combina_conteos(self):
+        """Prueba que el conteo del corpus es la suma de los conteos por archivo"""
+        resumen = ProcesadorLotes(num_trabajadores=2).procesar([self.temp_dir])
+        
+        assert resumen['archivos_procesados'] == 3
+        assert resumen['archivos_con_error'] == 0
+        assert resumen['numero_total_palabras'] == 6
+        assert resumen['contador_palabras'] == Counter({'hola': 3, 'mundo': 2, 'adiós': 1})
+        assert resumen['palabras_mas_frecuentes'][0] == ('hola', 3)
+    
+    @pytest.mark.unit
+    def test_procesar_con_hilos_y_errores(self):
+        """Prueba el modo con hilos informando de los archivos que fallan"""
+        inexistente = os.path.join(self.temp_dir, "no_existe.txt")
+        
+        resumen = ProcesadorLotes(num_trabajadores=2, usar_hilos=True).procesar([self.archivo1, inexistente])
+        
+        assert resumen['archivos_procesados'] == 1
+        assert resumen['archivos_con_error'] == 1
+        assert resumen['archivos'][0]['numero_total_palabras'] == 3
+        assert resumen['archivos'][1]['exito'] is False
+        assert "Error al procesar el archivo" in resumen['archivos'][1]['mensaje_error']
+    
+    @pytest.mark.unit
+    def test_conteos_sumados_al_llegar(self, monkeypatch):
+        """Prueba que el conteo de un archivo se suma al corpus sin esperar a los anteriores"""
+        sumado = threading.Event()
+        esperas = []
+        
+        class ConteoMarcado(Counter):
+            pass
+        
+        class CorpusVigilado(Counter):
+            def update(self, *args, **kwargs):
+                super().update(*args, **kwargs)
+                if any(isinstance(argumento, ConteoMarcado) for argumento in args):
+                    sumado.set()
+        
+        original = contador._contar_archivo_lote
+        
+        def contar_vigilado(ruta, **kwargs):
+            resultado, conteo, ngramas = original(ruta, **kwargs)
+            if ruta == self.archivo1:
+                # El primer archivo no termina hasta que el segundo esté en el corpus
+                esperas.append(sumado.wait(5))
+                return resultado, conteo, ngramas
+            return resultado, ConteoMarcado(conteo), ngramas
+        
+        monkeypatch.setattr(contador, '_contar_archivo_lote', contar_vigilado)
+        monkeypatch.setattr(contador, 'Counter', CorpusVigilado)
+        procesador = ProcesadorLotes(num_trabajadores=2, usar_hilos=True)
+        procesador.planificador = PlanificadorTareas(num_trabajadores=2, maximo_archivos_tarea=1)
+        
+        resumen = procesador.procesar([self.archivo1, self.archivo2])
+        
+        assert esperas == [True]
+        assert [r['ruta'] for r in resumen['archivos']] == [self.archivo1, self.archivo2]
+        assert resumen['contador_palabras'] == Counter({'hola': 2, 'mundo': 2, 'adiós': 1})
+    
+    @pytest.mark.unit
+    def test_motor_no_valido_para_lotes(self):
+        """Prueba que el motor paralelo no se admite dentro de un lote"""
+        with pytest.raises(ValueError):
+            ProcesadorLotes(motor='paralelo')
+    
+    @pytest.mark.integration
+    def test_main_modo_lote(self, capsys):
+        """Prueba la línea de comandos en modo lote"""
+        codigo = main(['--hilos', self.temp_dir])
+        
+        output = capsys.readouterr().out
+        
+        assert codigo == 0
+        assert "Archivos procesados: 3" in output
+        assert "El número total de palabras del corpus es: 6" in output
+        assert "'hola' - 3 veces" in output
+    
+    @pytest.mark.integration
+    def test_main_top_configurable(self, capsys):
+        """Prueba la opción --top de la línea de comandos"""
+        codigo = main(['--hilos', '--top', '1', self.temp_dir])
+        
+        output = capsys.readouterr().out
+        
+        assert codigo == 0
+        assert "Las 1 palabras más frecuentes del corpus son:" in output
+        assert "'hola' - 3 veces" in output
+        assert "'mundo'" not in output
+    
+    @pytest.mark.integration
+    def test_main_top_negativo(self, capsys):
+        """Prueba que un -n negativo es un error de uso"""
+        with pytest.raises(SystemExit) as salida:
+            main(['--hilos', '-n', '-1', self.temp_dir])
+        
+        assert salida.value.code == 2
+        assert "-n/--top no puede ser negativo" in capsys.readouterr().err
+    
+    @pytest.mark.integration
+    @pytest.mark.parametrize("trabajadores", ['0', '-2'])
+    def test_main_trabajadores_no_validos(self, capsys, trabajadores):
+        """Prueba que -j sin un número positivo de trabajadores es un error de uso, no una traza"""
+        with pytest.raises(SystemExit) as salida:
+            main(['-j', trabajadores, self.temp_dir])
+        
+        assert salida.value.code == 2
+        assert "-j/--trabajadores debe ser mayor que cero" in capsys.readouterr().err
+    
+    @pytest.mark.integration
+    def test_procesar_entrada_estandar(self):
+        """Prueba el modo lote leyendo también de la entrada estándar"""
+        import io
+        from unittest.mock import patch
+        entrada = io.TextIOWrapper(io.BytesIO("hola hola".encode('utf-8')), encoding='utf-8')
+        
+        with patch('sys.stdin', entrada):
+            resumen = ProcesadorLotes(num_trabajadores=2).procesar([self.archivo1, '-'])
+        
+        assert [resultado['ruta'] for resultado in resumen['archivos']] == [self.archivo1, '-']
+        assert resumen['archivos'][1]['numero_total_palabras'] == 2
+        assert resumen['contador_palabras']['hola'] == 4
+    
+    @pytest.mark.unit
+    def test_validar_entradas(self):
+        """Prueba que la validación en bloque expande las entradas e incluye tamaño y fecha"""
+        inexistente = os.path.join(self.temp_dir, "no_existe.txt")
+        
+        registros = ProcesadorLotes.validar_entradas([self.temp_dir, inexistente])
+        
+        assert [registro['ruta'] for registro in registros] == (
+            ProcesadorLotes.expandir_entradas([self.temp_dir]) + [inexistente])
+        assert [registro['tamano'] for registro in registros[:3]] == [
+            os.path.getsize(ruta) for ruta in sorted([self.archivo1, self.archivo2, self.archivo3])]
+        assert registros[3]['valida'] is False
+    
+    @pytest.mark.unit
+    def test_un_stat_por_archivo_con_cache(self):
+        """Prueba que el lote consulta los metadatos de cada archivo una sola vez, también con caché"""
+        from unittest.mock import patch
+        ruta_cache = os.path.join(self.temp_dir, "cache.sqlite")
+        rutas = [self.archivo1, self.archivo2, self.archivo3]
+        procesador = ProcesadorLotes(num_trabajadores=2, usar_hilos=True, ruta_cache=ruta_cache)
+        procesador.procesar(rutas)
+        
+        with patch('os.stat', wraps=os.stat) as espia:
+            resumen = procesador.procesar(rutas)
+        
+        assert resumen['numero_total_palabras'] == 6
+        assert espia.call_count == len(rutas)
@@ -0,0 +1,358 @@
+"""
+Pruebas para ServidorContador, el modo servicio HTTP del contador
+"""
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import pytest
+import contador
+from contador import PALABRAS_VACIAS, ProcesadorLotes, ServidorContador
+
+
+async def _peticion(lector, escritor, metodo, ruta, cuerpo=b"", cerrar=False):
+    """Envía una petición HTTP y devuelve (estado, cabeceras, cuerpo) decodificando el chunked"""
+    cabeceras = f"{metodo} {ruta} HTTP/1.1\r\nHost: prueba\r\nContent-Length: {len(cuerpo)}\r\n"
+    if cerrar:
+        cabeceras += "Connection: close\r\n"
+    escritor.write(cabeceras.encode('ascii') + b"\r\n" + cuerpo)
+    await escritor.drain()
+    
+    estado = int((await lector.readline()).split()[1])
+    respuesta = {}
+    while True:
+        linea = await lector.readline()
+        if linea == b"\r\n":
+            break
+        nombre, _, valor = linea.decode('latin-1').partition(':')
+        respuesta[nombre.strip().lower()] = valor.strip()
+    
+    if respuesta.get('transfer-encoding') == 'chunked':
+        datos = b""
+        while True:
+            tamano = int((await lector.readline()).strip(), 16)
+            trozo = await lector.readexactly(tamano + 2)
+            if tamano == 0:
+                break
+            datos += trozo[:-2]
+    else:
+        datos = await lector.readexactly(int(respuesta['content-length']))
+    return estado, respuesta, datos
+
+
+class TestServidorContador:
+    """Clase de pruebas para ServidorContador"""
+    
+    def setup_method(self):
+        """Configuración antes de cada prueba"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.archivo1 = self._crear_archivo_prueba("uno.txt", "hola mundo hola")
+        self.archivo2 = self._crear_archivo_prueba("dos.txt", "mundo adiós")
+    
+    def teardown_method(self):
+        """Limpieza después de cada prueba"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def _crear_archivo_prueba(self, nombre, contenido):
+        """Método auxiliar para crear archivos de prueba"""
+        ruta = os.path.join(self.temp_dir, nombre)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(contenido)
+        return ruta
+    
+    def _ejecutar(self, servidor, escenario, ruta_unix=None):
+        """Método auxiliar: arranca el servidor, ejecuta el escenario con una conexión y lo detiene"""
+        async def principal():
+            servidor_asyncio = await servidor.iniciar(puerto=0, ruta_unix=ruta_unix)
+            try:
+                if ruta_unix is not None:
+                    lector, escritor = await asyncio.open_unix_connection(ruta_unix)
+                else:
+                    puerto = servidor_asyncio.sockets[0].getsockname()[1]
+                    lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+                try:
+                    return await escenario(lector, escritor)
+                finally:
+                    escritor.close()
+            finally:
+                servidor_asyncio.close()
+                await servidor_asyncio.wait_closed()
+                servidor.detener()
+        return asyncio.run(principal())
+    
+    def test_contar_rutas_en_ndjson(self):
+        """Prueba que /contar emite un registro por archivo y el del corpus"""
+        cuerpo = json.dumps({'rutas': [self.archivo1, self.archivo2], 'n': 1}).encode('utf-8')
+        estado, cabeceras, datos = self._ejecutar(
+            ServidorContador(num_trabajadores=2, usar_hilos=True, raices_permitidas=[self.temp_dir]),
+            lambda lector, escritor: _peticion(lector, escritor, 'POST', '/contar', cuerpo))
+        
+        assert estado == 200
+        assert cabeceras['content-type'] == 'application/x-ndjson'
+        registros = [json.loads(linea) for linea in datos.decode('utf-8').splitlines()]
+        assert [r['tipo'] for r in registros] == ['archivo', 'archivo', 'corpus']
+        assert registros[0]['numero_total_palabras'] == 3
+        assert registros[2]['numero_total_palabras'] == 5
+        assert registros[2]['palabras_mas_frecuentes'] == [['hola', 2]]
+    
+    def test_contar_con_procesos(self):
+        """Prueba el conteo en un grupo de procesos trabajadores"""
+        cuerpo = json.dumps({'rutas': [self.archivo1]}).encode('utf-8')
+        estado, _, datos = self._ejecutar(
+            ServidorContador(num_trabajadores=1, raices_permitidas=[self.temp_dir]),
+            lambda lector, escritor: _peticion(lector, escritor, 'POST', '/contar', cuerpo))
+        
+        assert estado == 200
+        assert json.loads(datos.decode('utf-8').splitlines()[-1])['numero_total_palabras'] == 3
+    
+    def test_contar_texto_subido(self):
+        """Prueba que /contar-texto cuenta el cuerpo con la configuración del servidor"""
+        servidor = ServidorContador(num_trabajadores=1, usar_hilos=True, palabras_vacias=PALABRAS_VACIAS['es'])
+        estado, _, datos = self._ejecutar(
+            servidor,
+            lambda lector, escritor: _peticion(lector, escritor, 'POST', '/contar-texto?n=2',
+                                               "el gato y el perro y el gato".encode('utf-8')))
+        
+        assert estado == 200
+        resultado = json.loads(datos)
+        assert resultado['numero_total_palabras'] == 8
+        assert resultado['palabras_mas_frecuentes'] == [['gato', 2], ['perro', 1]]
+    
+    def test_keep_alive_y_salud(self):
+        """Prueba varias peticiones por la misma conexión"""
+        async def escenario(lector, escritor):
+            primera = await _peticion(lector, escritor, 'GET', '/salud')
+            segunda = await _peticion(lector, escritor, 'POST', '/contar-texto', b"uno dos", cerrar=True)
+            return primera, segunda
+        
+        (estado1, _, datos1), (estado2, _, datos2) = self._ejecutar(
+            ServidorContador(num_trabajadores=1, usar_hilos=True), escenario)
+        
+        assert estado1 == 200 and json.loads(datos1)['estado'] == 'ok'
+        assert estado2 == 200 and json.loads(datos2)['numero_total_palabras'] == 2
+    
+    def test_errores_de_peticion(self):
+        """Prueba las respuestas a rutas desconocidas, cuerpos no válidos y cuerpos demasiado grandes"""
+        async def escenario(lector, escritor):
+            desconocida = await _peticion(lector, escritor, 'GET', '/nada')
+            no_valido = await _peticion(lector, escritor, 'POST', '/contar', b"no es json")
+            grande = await _peticion(lector, escritor, 'POST', '/contar-texto', b"x" * 100)
+            return desconocida[0], no_valido[0], grande[0]
+        
+        estados = self._ejecutar(ServidorContador(num_trabajadores=1, usar_hilos=True, tamano_maximo_cuerpo=10),
+                                 escenario)
+        
+        assert estados == (404, 400, 413)
+    
+    def test_raices_permitidas(self):
+        """Prueba que no se cuentan archivos fuera de las raíces permitidas"""
+        otro_dir = tempfile.mkdtemp()
+        try:
+            servidor = ServidorContador(num_trabajadores=1, usar_hilos=True, raices_permitidas=[otro_dir])
+            cuerpo = json.dumps({'rutas': [self.archivo1]}).encode('utf-8')
+            estado, _, datos = self._ejecutar(
+                servidor, lambda lector, escritor: _peticion(lector, escritor, 'POST', '/contar', cuerpo))
+        finally:
+            os.rmdir(otro_dir)
+        
+        assert estado == 403
+        assert json.loads(datos)['rutas'] == [self.archivo1]
+    
+    def test_sin_raices_no_se_cuenta_ninguna_ruta(self):
+        """Prueba que sin raíces permitidas se rechazan todas las rutas, pero se sigue contando texto"""
+        async def escenario(lector, escritor):
+            cuerpo = json.dumps({'rutas': [self.archivo1]}).encode('utf-8')
+            rutas = await _peticion(lector, escritor, 'POST', '/contar', cuerpo)
+            texto = await _peticion(lector, escritor, 'POST', '/contar-texto', b"hola mundo")
+            return rutas, texto
+        
+        rutas, texto = self._ejecutar(ServidorContador(num_trabajadores=1, usar_hilos=True), escenario)
+        
+        assert rutas[0] == 403
+        assert json.loads(rutas[2])['rutas'] == [self.archivo1]
+        assert texto[0] == 200
+    
+    def test_rutas_debe_ser_lista_de_cadenas(self):
+        """Prueba que 'rutas' que no es una lista de cadenas se rechaza con 400"""
+        async def escenario(lector, escritor):
+            estados = []
+            for rutas in ("lote", [1, 2], {'a': 1}):
+                cuerpo = json.dumps({'rutas': rutas}).encode('utf-8')
+                estados.append((await _peticion(lector, escritor, 'POST', '/contar', cuerpo))[0])
+            return estados
+        
+        assert self._ejecutar(ServidorContador(num_trabajadores=1, usar_hilos=True), escenario) == [400, 400, 400]
+    
+    def test_content_length_no_valido(self):
+        """Prueba que una cabecera Content-Length no numérica recibe 400"""
+        async def escenario(lector, escritor):
+            escritor.write(b"POST /contar-texto HTTP/1.1\r\nContent-Length: mucho\r\n\r\n")
+            await escritor.drain()
+            return int((await lector.readline()).split()[1])
+        
+        assert self._ejecutar(ServidorContador(num_trabajadores=1, usar_hilos=True), escenario) == 400
+    
+    def test_raices_comprobadas_antes_de_expandir(self, monkeypatch):
+        """Prueba que un directorio prohibido no se recorre y el 403 nombra solo la entrada"""
+        otro_dir = tempfile.mkdtemp()
+        expandidas = []
+        original = ProcesadorLotes.expandir_entradas
+        monkeypatch.setattr(ProcesadorLotes, 'expandir_entradas',
+                            staticmethod(lambda entradas: expandidas.append(entradas) or original(entradas)))
+        try:
+            servidor = ServidorContador(num_trabajadores=1, usar_hilos=True, raices_permitidas=[otro_dir])
+            cuerpo = json.dumps({'rutas': [self.temp_dir]}).encode('utf-8')
+            estado, _, datos = self._ejecutar(
+                servidor, lambda lector, escritor: _peticion(lector, escritor, 'POST', '/contar', cuerpo))
+        finally:
+            os.rmdir(otro_dir)
+        
+        assert estado == 403
+        assert json.loads(datos)['rutas'] == [self.temp_dir]
+        assert expandidas == []
+    
+    def test_enlace_fuera_de_las_raices(self):
+        """Prueba que un directorio permitido con un enlace a un archivo de fuera se rechaza"""
+        permitido = os.path.join(self.temp_dir, "permitido")
+        os.mkdir(permitido)
+        os.symlink(self.archivo1, os.path.join(permitido, "enlace.txt"))
+        servidor = ServidorContador(num_trabajadores=1, usar_hilos=True, raices_permitidas=[permitido])
+        cuerpo = json.dumps({'rutas': [permitido]}).encode('utf-8')
+        
+        estado, _, datos = self._ejecutar(
+            servidor, lambda lector, escritor: _peticion(lector, escritor, 'POST', '/contar', cuerpo))
+        
+        assert estado == 403
+        assert json.loads(datos)['rutas'] == [permitido]
+    
+    def test_archivos_en_curso_por_peticion(self, monkeypatch):
+        """Prueba que una petición no envía al grupo más de max_archivos_en_curso archivos a la vez"""
+        rutas = [self._crear_archivo_prueba(f"texto{i}.txt", "uno dos " * (i + 1)) for i in range(8)]
+        en_curso = []
+        maximo = []
+        cerrojo = threading.Lock()
+        original = contador._contar_archivo_lote
+        
+        def contar_vigilado(*args, **kwargs):
+            with cerrojo:
+                en_curso.append(1)
+                maximo.append(len(en_curso))
+            try:
+                return original(*args, **kwargs)
+            finally:
+                with cerrojo:
+                    en_curso.pop()
+        
+        monkeypatch.setattr(contador, '_contar_archivo_lote', contar_vigilado)
+        servidor = ServidorContador(num_trabajadores=4, usar_hilos=True, max_archivos_en_curso=2,
+                                    raices_permitidas=[self.temp_dir])
+        cuerpo = json.dumps({'rutas': rutas}).encode('utf-8')
+        
+        estado, _, datos = self._ejecutar(
+            servidor, lambda lector, escritor: _peticion(lector, escritor, 'POST', '/contar', cuerpo))
+        
+        assert estado == 200
+        assert json.loads(datos.decode('utf-8').splitlines()[-1])['numero_total_palabras'] == 72
+        assert len(maximo) == 8
+        assert max(maximo) <= 2
+    
+    def test_trabajador_que_falla(self, monkeypatch):
+        """Prueba que un trabajador que lanza una excepción no deja la respuesta chunked a medias"""
+        original = contador._contar_archivo_lote
+        
+        def contar_con_fallo(ruta, **kwargs):
+            if ruta == self.archivo1:
+                raise RuntimeError("trabajador caído")
+            return original(ruta, **kwargs)
+        
+        def contar_texto_con_fallo(*args):
+            raise RuntimeError("trabajador caído")
+        
+        async def escenario(lector, escritor):
+            cuerpo = json.dumps({'rutas': [self.archivo1, self.archivo2]}).encode('utf-8')
+            rutas = await asyncio.wait_for(_peticion(lector, escritor, 'POST', '/contar', cuerpo), 5)
+            texto = await asyncio.wait_for(_peticion(lector, escritor, 'POST', '/contar-texto', b"hola"), 5)
+            return rutas, texto
+        
+        monkeypatch.setattr(contador, '_contar_archivo_lote', contar_con_fallo)
+        monkeypatch.setattr(contador, '_contar_texto_servidor', contar_texto_con_fallo)
+        servidor = ServidorContador(num_trabajadores=2, usar_hilos=True, raices_permitidas=[self.temp_dir])
+        
+        rutas, texto = self._ejecutar(servidor, escenario)
+        
+        assert rutas[0] == 200
+        registros = [json.loads(linea) for linea in rutas[2].decode('utf-8').splitlines()]
+        assert [r['exito'] for r in registros[:2]] == [False, True]
+        assert "trabajador caído" in registros[0]['mensaje_error']
+        assert registros[2]['archivos_con_error'] == 1
+        assert registros[2]['numero_total_palabras'] == 2
+        assert texto[0] == 500
+        assert "trabajador caído" in json.loads(texto[2])['error']
+    
+    def test_error_tras_la_cabecera(self, monkeypatch):
+        """Prueba que un error después de enviar la cabecera 200 se informa en un registro y cierra la respuesta"""
+        def fallar(*args):
+            raise RuntimeError("resumen imposible")
+        
+        monkeypatch.setattr(contador, 'palabras_mas_frecuentes', fallar)
+        servidor = ServidorContador(num_trabajadores=1, usar_hilos=True, raices_permitidas=[self.temp_dir])
+        cuerpo = json.dumps({'rutas': [self.archivo1]}).encode('utf-8')
+        
+        estado, _, datos = self._ejecutar(
+            servidor, lambda lector, escritor: asyncio.wait_for(
+                _peticion(lector, escritor, 'POST', '/contar', cuerpo), 5))
+        
+        assert estado == 200
+        registros = [json.loads(linea) for linea in datos.decode('utf-8').splitlines()]
+        assert registros[-1] == {'tipo': 'error', 'error': "Error al contar las rutas: resumen imposible"}
+    
+    def test_rechaza_cuando_esta_saturado(self):
+        """Prueba que las peticiones que no caben en la cola de espera reciben 503"""
+        servidor = ServidorContador(num_trabajadores=1, usar_hilos=True, max_concurrentes=1, max_en_espera=0)
+        
+        async def escenario(lector, escritor):
+            # Ocupa el único turno, como haría una petición lenta en curso
+            await servidor._semaforo.acquire()
+            try:
+                return await _peticion(lector, escritor, 'POST', '/contar-texto', b"hola")
+            finally:
+                servidor._semaforo.release()
+        
+        estado, cabeceras, _ = self._ejecutar(servidor, escenario)
+        
+        assert estado == 503
+        assert cabeceras['retry-after'] == '1'
+    
+    def test_socket_unix(self):
+        """Prueba el servidor escuchando en un socket Unix"""
+        ruta_socket = os.path.join(self.temp_dir, "contador.sock")
+        estado, _, datos = self._ejecutar(
+            ServidorContador(num_trabajadores=1, usar_hilos=True),
+            lambda lector, escritor: _peticion(lector, escritor, 'POST', '/contar-texto', b"a b a"),
+            ruta_unix=ruta_socket)
+        
+        assert estado == 200
+        assert json.loads(datos)['palabras_mas_frecuentes'][0] == ['a', 2]
+    
+    def test_motor_no_valido(self):
+        """Prueba que se rechazan motores que no se pueden usar por archivo"""
+        with pytest.raises(ValueError):
+            ServidorContador(motor='paralelo')
+    
+    @pytest.mark.parametrize("opciones, raices", [([], None), (['--raiz-permitida', 'datos'], ['datos'])])
+    def test_linea_de_comandos_sin_raiz_usa_el_directorio_actual(self, monkeypatch, opciones, raices):
+        """Prueba que --servidor sin --raiz-permitida solo deja contar el directorio actual"""
+        servidores = []
+        
+        async def servir(servidor, host, puerto, ruta_unix):
+            servidores.append(servidor)
+        
+        monkeypatch.setattr(ServidorContador, 'servir', servir)
+        monkeypatch.chdir(self.temp_dir)
+        
+        assert contador.main(['--servidor'] + opciones) == 0
+        
+        esperadas = [os.path.realpath(raiz) for raiz in raices or [self.temp_dir]]
+        assert servidores[0].raices_permitidas == esperadas
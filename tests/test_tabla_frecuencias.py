@@ -0,0 +1,127 @@
+"""
+Pruebas para el formato binario de tablas de frecuencias y su combinación
+"""
+import json
+import os
+import tempfile
+from collections import Counter
+import pytest
+from contador import (ContadorPalabras, EscritorTablaFrecuencias, LectorTablaFrecuencias,
+                      cargar_tabla_frecuencias, combinar_tablas_frecuencias,
+                      guardar_tabla_frecuencias, main)
+
+
+class TestTablaFrecuencias:
+    """Clase de pruebas para las tablas de frecuencias binarias"""
+    
+    def setup_method(self):
+        """Configuración antes de cada prueba"""
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def teardown_method(self):
+        """Limpieza después de cada prueba"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def _ruta(self, nombre):
+        """Método auxiliar para obtener una ruta dentro del directorio temporal"""
+        return os.path.join(self.temp_dir, nombre)
+    
+    def test_ida_y_vuelta(self):
+        """Prueba que una tabla guardada se carga idéntica, con frecuencias grandes y multibyte"""
+        contador = Counter({'casa': 3, 'casas': 1, 'camión': 2 ** 40, 'ñandú': 7, 'a': 1, '日本': 5})
+        ruta = self._ruta("tabla.cptf")
+        guardar_tabla_frecuencias(ruta, contador, 123)
+        
+        assert cargar_tabla_frecuencias(ruta) == (123, contador)
+    
+    def test_orden_y_prefijos(self):
+        """Prueba que las entradas salen ordenadas y que los prefijos comunes ahorran espacio"""
+        contador = Counter({f"prefijo_muy_largo_{i:04d}": i + 1 for i in range(500)})
+        ruta = self._ruta("tabla.cptf")
+        guardar_tabla_frecuencias(ruta, contador, sum(contador.values()))
+        
+        with LectorTablaFrecuencias(ruta) as lector:
+            palabras = [palabra for palabra, _ in lector]
+        assert palabras == sorted(palabras)
+        assert os.path.getsize(ruta) < sum(len(palabra) for palabra in contador) / 2
+    
+    def test_tabla_vacia(self):
+        """Prueba que se puede guardar y leer una tabla sin palabras"""
+        ruta = self._ruta("vacia.cptf")
+        guardar_tabla_frecuencias(ruta, Counter(), 0)
+        
+        assert cargar_tabla_frecuencias(ruta) == (0, Counter())
+    
+    def test_escritor_exige_orden(self):
+        """Prueba que el escritor rechaza palabras desordenadas y no deja archivo a medias"""
+        ruta = self._ruta("tabla.cptf")
+        with pytest.raises(ValueError):
+            with EscritorTablaFrecuencias(ruta) as escritor:
+                escritor.anadir(b"b", 1)
+                escritor.anadir(b"a", 1)
+        assert os.listdir(self.temp_dir) == []
+    
+    def test_archivo_no_valido(self):
+        """Prueba que un archivo que no es una tabla se rechaza"""
+        ruta = self._ruta("texto.txt")
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write("hola mundo con texto suficiente para la cabecera")
+        with pytest.raises(ValueError):
+            LectorTablaFrecuencias(ruta)
+    
+    def test_combinar_equivale_a_sumar(self):
+        """Prueba que la mezcla de k vías coincide con sumar los Counter"""
+        contadores = [Counter({'a': 1, 'b': 2, 'z': 1}), Counter({'b': 5, 'c': 1}),
+                      Counter(), Counter({'a': 4, 'ñ': 2})]
+        rutas = []
+        for i, contador in enumerate(contadores):
+            rutas.append(self._ruta(f"parte{i}.cptf"))
+            guardar_tabla_frecuencias(rutas[-1], contador, sum(contador.values()) + 1)
+        
+        salida = self._ruta("corpus.cptf")
+        total, entradas = combinar_tablas_frecuencias(rutas, salida)
+        
+        esperado = sum(contadores, Counter())
+        assert total == sum(esperado.values()) + 4
+        assert entradas == len(esperado)
+        assert cargar_tabla_frecuencias(salida) == (total, esperado)
+    
+    def test_mas_frecuentes_sin_cargar(self):
+        """Prueba las palabras más frecuentes leídas directamente de la tabla"""
+        ruta = self._ruta("tabla.cptf")
+        guardar_tabla_frecuencias(ruta, Counter({'b': 3, 'a': 3, 'c': 5, 'd': 1}), 12)
+        
+        with LectorTablaFrecuencias(ruta) as lector:
+            assert lector.mas_frecuentes(3) == [('c', 5), ('a', 3), ('b', 3)]
+    
+    def test_guardar_desde_contador(self):
+        """Prueba que ContadorPalabras guarda su tabla completa"""
+        entrada = self._ruta("texto.txt")
+        with open(entrada, 'w', encoding='utf-8') as f:
+            f.write("uno dos dos tres tres tres")
+        contador = ContadorPalabras(motor='streaming')
+        contador.procesar_archivo(entrada)
+        contador.guardar_tabla(self._ruta("tabla.cptf"))
+        
+        assert cargar_tabla_frecuencias(self._ruta("tabla.cptf")) == (6, contador.contador_palabras)
+    
+    @pytest.mark.integration
+    def test_cli_guardar_y_combinar(self, capsys):
+        """Prueba guardar tablas por fragmento y combinarlas desde la línea de comandos"""
+        rutas_tablas = []
+        for i, texto in enumerate(["hola mundo", "hola hola adiós"]):
+            entrada = self._ruta(f"texto{i}.txt")
+            with open(entrada, 'w', encoding='utf-8') as f:
+                f.write(texto)
+            rutas_tablas.append(self._ruta(f"tabla{i}.cptf"))
+            assert main(['--hilos', '-f', 'json', '--tabla-salida', rutas_tablas[-1], entrada]) == 0
+        capsys.readouterr()
+        
+        codigo = main(['-f', 'json', '--combinar-tablas', '--tabla-salida', self._ruta("corpus.cptf"),
+                       *rutas_tablas])
+        
+        assert codigo == 0
+        salida = json.loads(capsys.readouterr().out)
+        assert salida['corpus']['numero_total_palabras'] == 5
+        assert salida['corpus']['palabras_mas_frecuentes'][0] == ['hola', 3]
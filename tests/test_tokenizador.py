@@ -0,0 +1,118 @@
+"""
+Pruebas para Tokenizador y la normalización de palabras en ContadorPalabras
+"""
+import io
+import json
+import os
+import tempfile
+import pytest
+from contador import ContadorPalabras, ProcesadorLotes, Tokenizador, main
+
+
+class TestTokenizador:
+    """Clase de pruebas para Tokenizador"""
+    
+    def setup_method(self):
+        """Configuración antes de cada prueba"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.texto = "Hola, hola HOLA! ¿Camión? camion CAMIÓN — e-mail l'agua\n" * 20
+        self.archivo = self._crear_archivo_prueba("texto.txt", self.texto)
+    
+    def teardown_method(self):
+        """Limpieza después de cada prueba"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def _crear_archivo_prueba(self, nombre, contenido):
+        """Método auxiliar para crear archivos de prueba"""
+        ruta = os.path.join(self.temp_dir, nombre)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(contenido)
+        return ruta
+    
+    def test_sin_opciones_no_cambia_el_texto(self):
+        """Prueba que un tokenizador sin opciones deja el texto igual"""
+        assert Tokenizador().normalizar(self.texto) == self.texto
+    
+    def test_minusculas(self):
+        """Prueba el pliegue de mayúsculas"""
+        assert Tokenizador(minusculas=True).normalizar("Hola STRASSE Straße") == "hola strasse strasse"
+    
+    def test_quitar_puntuacion(self):
+        """Prueba que solo se quita la puntuación de los bordes de las palabras"""
+        tokenizador = Tokenizador(quitar_puntuacion=True)
+        assert tokenizador.normalizar("¡hola, mundo! «e-mail» l'agua ...").split() == \
+            ["hola", "mundo", "e-mail", "l'agua"]
+    
+    def test_normalizar_nfc(self):
+        """Prueba que las formas descompuesta y compuesta quedan iguales"""
+        tokenizador = Tokenizador(normalizar_nfc=True)
+        assert tokenizador.normalizar("café") == "café"
+    
+    def test_quitar_acentos(self):
+        """Prueba que se eliminan tildes y diacríticos"""
+        tokenizador = Tokenizador(quitar_acentos=True)
+        assert tokenizador.normalizar("camión pingüino café año") == "camion pinguino cafe ano"
+    
+    def test_puntuacion_no_rompe_marcas_combinables(self):
+        """Prueba que una tilde combinable al final de la palabra no se toma por puntuación"""
+        tokenizador = Tokenizador(quitar_puntuacion=True)
+        assert tokenizador.normalizar("café,") == "café"
+    
+    def test_normalizar_conteo_fusiona_y_descarta(self):
+        """Prueba que el conteo normalizado fusiona variantes y descarta las palabras vacías"""
+        from collections import Counter
+        tokenizador = Tokenizador(minusculas=True, quitar_puntuacion=True)
+        resultado = tokenizador.normalizar_conteo(Counter({"Hola": 2, "hola,": 3, "—": 4, "mundo": 1}))
+        assert resultado == Counter({"hola": 5, "mundo": 1})
+    
+    def test_firma(self):
+        """Prueba que la firma refleja las opciones activas"""
+        assert Tokenizador().firma() == "ninguna"
+        assert Tokenizador(minusculas=True, quitar_acentos=True).firma() == "minusculas+quitar_acentos"
+    
+    @pytest.mark.parametrize("motor", ['completo', 'streaming', 'paralelo', 'mmap'])
+    def test_motores_coinciden(self, motor):
+        """Prueba que todos los motores dan el mismo conteo normalizado"""
+        tokenizador = Tokenizador(minusculas=True, quitar_puntuacion=True, quitar_acentos=True)
+        contador = ContadorPalabras(motor=motor, tamano_bloque=7, tamano_rango=64, num_procesos=2,
+                                    tokenizador=tokenizador)
+        exito, _ = contador.procesar_archivo(self.archivo)
+        
+        assert exito is True
+        assert contador.numero_total_palabras == 160
+        assert dict(contador.contador_palabras) == {'hola': 60, 'camion': 60, 'e-mail': 20, "l'agua": 20}
+    
+    def test_conteo_aproximado_normaliza_por_bloques(self):
+        """Prueba la normalización junto con la tabla de frecuencias aproximada"""
+        contador = ContadorPalabras(motor='streaming', tamano_bloque=5, capacidad_aproximada=10,
+                                    tokenizador=Tokenizador(minusculas=True, quitar_puntuacion=True))
+        contador.procesar_archivo(self.archivo)
+        
+        assert contador.numero_total_palabras == 160
+        assert contador.contador_palabras['hola'] == 60
+    
+    def test_procesar_flujo(self):
+        """Prueba la normalización al leer un flujo"""
+        contador = ContadorPalabras(tokenizador=Tokenizador(minusculas=True))
+        contador.procesar_flujo(io.BytesIO("Hola hola HOLA".encode('utf-8')))
+        
+        assert contador.contador_palabras == {'hola': 3}
+    
+    def test_lote_con_tokenizador(self):
+        """Prueba que el tokenizador llega a los trabajadores del lote"""
+        procesador = ProcesadorLotes(num_trabajadores=2, tokenizador=Tokenizador(minusculas=True))
+        resumen = procesador.procesar([self.archivo])
+        
+        assert resumen['contador_palabras']['hola'] == 20
+        assert resumen['contador_palabras']['hola,'] == 20
+    
+    @pytest.mark.integration
+    def test_cli_opciones_de_normalizacion(self, capsys):
+        """Prueba las opciones de normalización de la línea de comandos"""
+        codigo = main(['--hilos', '-f', 'json', '--minusculas', '--sin-puntuacion', '--sin-acentos',
+                       self.archivo])
+        
+        assert codigo == 0
+        salida = json.loads(capsys.readouterr().out)
+        assert salida['corpus']['palabras_mas_frecuentes'][:2] == [['camion', 60], ['hola', 60]]
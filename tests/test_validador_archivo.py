@@ -110,3 +110,103 @@ class TestValidadorArchivo:
         assert "No se encontró" in mensaje
         assert "NO existe" in mensaje
         assert "Sugerencias:" in mensaje
+    
+    @pytest.mark.unit
+    def test_validar_ruta_tuberia(self):
+        """Prueba que una tubería con nombre se acepta como entrada"""
+        tuberia = os.path.join(self.temp_dir, "tuberia")
+        os.mkfifo(tuberia)
+        
+        es_valida, mensaje = ValidadorArchivo.validar_ruta_archivo(tuberia)
+        
+        assert es_valida is True
+        assert mensaje == ""
+    
+    @pytest.mark.unit
+    def test_buscar_archivos_similares_ordenados_y_limitados(self):
+        """Prueba que las sugerencias se ordenan por parecido y respetan el límite"""
+        for nombre in ["informe_2023.txt", "mi_informe.txt", "informe.txt.bak"] + [f"datos_{i}.csv" for i in range(30)]:
+            with open(os.path.join(self.temp_dir, nombre), 'w') as f:
+                f.write("contenido")
+        
+        similares = ValidadorArchivo.buscar_archivos_similares("informe.txt", self.temp_dir)
+        limitados = ValidadorArchivo.buscar_archivos_similares("datos", self.temp_dir, limite=5)
+        
+        # Primero los que empiezan igual y después los que solo lo contienen
+        assert similares == ["informe.txt.bak", "informe_2023.txt", "mi_informe.txt"]
+        assert len(limitados) == 5
+    
+    @pytest.mark.unit
+    def test_buscar_archivos_similares_con_erratas(self):
+        """Prueba que se sugieren nombres con letras cambiadas de sitio"""
+        with open(os.path.join(self.temp_dir, "presupuesto_anual.txt"), 'w') as f:
+            f.write("contenido")
+        
+        similares = ValidadorArchivo.buscar_archivos_similares("presupeusto_anual.txt", self.temp_dir)
+        
+        assert similares == ["presupuesto_anual.txt"]
+    
+    @pytest.mark.unit
+    def test_indice_directorio_se_reutiliza_hasta_que_cambia(self):
+        """Prueba que el índice se reutiliza mientras no cambia la fecha del directorio"""
+        from contador import obtener_indice_directorio
+        antes = os.stat(self.temp_dir).st_mtime - 60
+        os.utime(self.temp_dir, (antes, antes))
+        
+        indice = obtener_indice_directorio(self.temp_dir)
+        assert obtener_indice_directorio(self.temp_dir) is indice
+        
+        with open(os.path.join(self.temp_dir, "nuevo.txt"), 'w') as f:
+            f.write("contenido")
+        nuevo = obtener_indice_directorio(self.temp_dir)
+        assert nuevo is not indice
+        assert "nuevo.txt" in nuevo.nombres
+    
+    @pytest.mark.unit
+    def test_mensaje_limita_archivos_txt(self):
+        """Prueba que la lista de archivos .txt del mensaje de error está acotada"""
+        for i in range(25):
+            with open(os.path.join(self.temp_dir, f"capitulo_{i:02d}.txt"), 'w') as f:
+                f.write("contenido")
+        
+        mensaje = ValidadorArchivo._generar_mensaje_archivo_no_encontrado(os.path.join(self.temp_dir, "x.txt"))
+        
+        assert "capitulo_00.txt" in mensaje
+        assert "capitulo_24.txt" not in mensaje
+        assert "y 16 archivos .txt más" in mensaje
+    
+    @pytest.mark.unit
+    def test_describir_ruta(self):
+        """Prueba que la descripción de una ruta incluye tipo, tamaño y fecha"""
+        registro = ValidadorArchivo.describir_ruta(self.archivo_prueba)
+        carpeta = ValidadorArchivo.describir_ruta(self.temp_dir)
+        
+        assert registro['valida'] is True
+        assert registro['tipo'] == 'archivo'
+        assert registro['tamano'] == os.path.getsize(self.archivo_prueba)
+        assert registro['mtime_ns'] == os.stat(self.archivo_prueba).st_mtime_ns
+        assert carpeta['valida'] is False
+        assert carpeta['tipo'] == 'carpeta'
+    
+    @pytest.mark.unit
+    @pytest.mark.parametrize("cantidad", [3, ValidadorArchivo.UMBRAL_SCANDIR + 5])
+    def test_validar_rutas_en_bloque(self, cantidad):
+        """Prueba la validación en bloque con stat por ruta y con os.scandir por carpeta"""
+        rutas = []
+        for i in range(cantidad):
+            ruta = os.path.join(self.temp_dir, f"archivo_{i}.txt")
+            with open(ruta, 'w') as f:
+                f.write("x" * i)
+            rutas.append(ruta)
+        inexistente = os.path.join(self.temp_dir, "no_existe.txt")
+        
+        registros = ValidadorArchivo.validar_rutas(rutas + [inexistente, '-', self.temp_dir])
+        
+        assert [registro['ruta'] for registro in registros[:cantidad]] == rutas
+        assert [registro['tamano'] for registro in registros[:cantidad]] == list(range(cantidad))
+        assert all(registro['valida'] for registro in registros[:cantidad])
+        assert registros[cantidad]['valida'] is False
+        assert registros[cantidad]['tipo'] is None
+        assert "No such file" in registros[cantidad]['mensaje_error']
+        assert registros[cantidad + 1]['tipo'] == 'flujo'
+        assert registros[cantidad + 2]['tipo'] == 'carpeta'
@@ -0,0 +1,164 @@
+"""
+Pruebas unitarias para la clase VocabularioCompacto
+"""
+import os
+import pickle
+import random
+import tempfile
+import tracemalloc
+from collections import Counter
+import pytest
+from contador import (AlmacenIncremental, CacheResultados, ContadorPalabras, ProcesadorLotes,
+                      Tokenizador, VocabularioCompacto, palabras_mas_frecuentes)
+
+
+class TestVocabularioCompacto:
+    """Clase de pruebas para VocabularioCompacto"""
+    
+    TEXTO = "Hola mundo, hola canción\nel año del pingüino\n" * 30
+    
+    def setup_method(self):
+        """Configuración antes de cada prueba"""
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def teardown_method(self):
+        """Limpieza después de cada prueba"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def _crear_archivo_prueba(self, nombre, contenido):
+        """Método auxiliar para crear archivos de prueba"""
+        ruta = os.path.join(self.temp_dir, nombre)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(contenido)
+        return ruta
+    
+    def _generar_palabras(self, cantidad, vocabulario):
+        """Método auxiliar que genera palabras con una distribución sesgada"""
+        aleatorio = random.Random(42)
+        pesos = [1 / (rango + 1) for rango in range(vocabulario)]
+        return aleatorio.choices([f"p{i}ñ" for i in range(vocabulario)], weights=pesos, k=cantidad)
+    
+    @pytest.mark.unit
+    def test_igual_que_counter(self):
+        """Prueba que la interfaz de lectura coincide con la de Counter"""
+        palabras = self._generar_palabras(20000, 3000)
+        exacto = Counter()
+        compacto = VocabularioCompacto()
+        for inicio in range(0, len(palabras), 1000):
+            exacto.update(palabras[inicio:inicio + 1000])
+            compacto.update(palabras[inicio:inicio + 1000])
+        
+        assert len(compacto) == len(exacto)
+        assert list(compacto) == list(exacto)
+        assert dict(compacto.items()) == dict(exacto)
+        assert sum(compacto.values()) == compacto.total() == len(palabras)
+        assert compacto.most_common(20) == exacto.most_common(20)
+        assert compacto.most_common() == exacto.most_common()
+        assert palabras_mas_frecuentes(compacto, 10) == palabras_mas_frecuentes(exacto, 10)
+        assert compacto['p0ñ'] == exacto['p0ñ']
+        assert compacto['no_existe'] == 0
+        assert 'no_existe' not in compacto
+        assert compacto == exacto
+    
+    @pytest.mark.unit
+    def test_pop_y_readicion(self):
+        """Prueba que pop quita la palabra y que puede volver a contarse"""
+        compacto = VocabularioCompacto(Counter(hola=3, mundo=1))
+        
+        assert compacto.pop('hola') == 3
+        assert compacto.pop('hola', 0) == 0
+        with pytest.raises(KeyError):
+            compacto.pop('hola')
+        assert len(compacto) == 1
+        assert 'hola' not in compacto
+        assert compacto.get('hola') is None
+        
+        compacto.update(['hola'])
+        assert compacto['hola'] == 1
+        assert len(compacto) == 2
+    
+    @pytest.mark.unit
+    def test_frecuencias_negativas(self):
+        """Prueba que las frecuencias negativas se rechazan"""
+        with pytest.raises(ValueError):
+            VocabularioCompacto({'hola': -1})
+    
+    @pytest.mark.unit
+    def test_pickle(self):
+        """Prueba que se puede enviar a otro proceso y seguir contando"""
+        compacto = VocabularioCompacto(self._generar_palabras(5000, 500))
+        copia = pickle.loads(pickle.dumps(compacto))
+        
+        copia.update(['p1ñ'])
+        
+        assert copia['p1ñ'] == compacto['p1ñ'] + 1
+        assert copia.most_common(5)[2:] == compacto.most_common(5)[2:]
+    
+    @pytest.mark.unit
+    def test_fraccion_de_la_memoria(self):
+        """Prueba que ocupa bastante menos memoria que un Counter con el mismo vocabulario"""
+        # Las palabras se crean en cada conteo, como al leer un archivo
+        vocabulario = 50000
+        tracemalloc.start()
+        try:
+            exacto = Counter(f"palabra{i}" for i in range(vocabulario))
+            memoria_counter = tracemalloc.get_traced_memory()[0]
+            del exacto
+            base = tracemalloc.get_traced_memory()[0]
+            compacto = VocabularioCompacto(Counter(f"palabra{i}" for i in range(vocabulario)))
+            memoria_compacto = tracemalloc.get_traced_memory()[0] - base
+        finally:
+            tracemalloc.stop()
+        
+        assert len(compacto) == vocabulario
+        assert memoria_compacto < memoria_counter / 2
+        assert compacto.memoria_bytes() <= memoria_compacto
+    
+    @pytest.mark.parametrize("motor", ['completo', 'streaming', 'paralelo', 'mmap'])
+    def test_contador_palabras_por_motor(self, motor):
+        """Prueba que cualquier motor deja el mismo conteo en un VocabularioCompacto"""
+        archivo = self._crear_archivo_prueba("texto.txt", self.TEXTO)
+        opciones = {'motor': motor, 'tamano_bloque': 16, 'tamano_rango': 128, 'num_procesos': 2,
+                    'tokenizador': Tokenizador(minusculas=True, quitar_puntuacion=True),
+                    'palabras_vacias': frozenset({'el', 'del'})}
+        exacto = ContadorPalabras(**opciones)
+        compacto = ContadorPalabras(vocabulario_compacto=True, **opciones)
+        
+        exacto.procesar_archivo(archivo)
+        exito, _ = compacto.procesar_archivo(archivo)
+        
+        assert exito is True
+        assert isinstance(compacto.contador_palabras, VocabularioCompacto)
+        assert compacto.contador_palabras == exacto.contador_palabras
+        assert compacto.obtener_estadisticas() == exacto.obtener_estadisticas()
+    
+    def test_con_cache_e_incremental(self):
+        """Prueba que las respuestas de la caché y del estado incremental también se compactan"""
+        archivo = self._crear_archivo_prueba("texto.txt", self.TEXTO)
+        cache = CacheResultados(os.path.join(self.temp_dir, "cache.db"))
+        almacen = AlmacenIncremental(os.path.join(self.temp_dir, "estado"))
+        for opciones in ({'cache': cache}, {'incremental': almacen}):
+            contador = ContadorPalabras(motor='streaming', vocabulario_compacto=True, **opciones)
+            contador.procesar_archivo(archivo)
+            contador.procesar_archivo(archivo)
+            
+            assert isinstance(contador.contador_palabras, VocabularioCompacto)
+            assert contador.contador_palabras['pingüino'] == 30
+    
+    def test_no_admite_conteo_aproximado(self):
+        """Prueba que no se puede combinar con el conteo aproximado"""
+        with pytest.raises(ValueError):
+            ContadorPalabras(motor='streaming', capacidad_aproximada=10, vocabulario_compacto=True)
+    
+    @pytest.mark.parametrize("usar_hilos", [True, False])
+    def test_lote(self, usar_hilos):
+        """Prueba que el lote combina el corpus en un VocabularioCompacto"""
+        archivos = [self._crear_archivo_prueba(f"texto{i}.txt", self.TEXTO * (i + 1)) for i in range(3)]
+        
+        exacto = ProcesadorLotes(num_trabajadores=2, usar_hilos=usar_hilos).procesar(archivos)
+        compacto = ProcesadorLotes(num_trabajadores=2, usar_hilos=usar_hilos, tamano_tarea=200,
+                                   vocabulario_compacto=True).procesar(archivos)
+        
+        assert isinstance(compacto['contador_palabras'], VocabularioCompacto)
+        assert compacto == exacto